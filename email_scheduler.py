@@ -1,8 +1,14 @@
+import argparse
+import heapq
+import os
+import time
 import pandas as pd
-from datetime import datetime
-import smtplib
-from email.mime.text import MIMEText
+from datetime import datetime, timedelta
 from pathlib import Path
+from utils.data_access import append_rows, data_version, load_tables, table_paths, update_rows
+from utils.deadlines import DUE_FORMAT, parse_due, reminder_due, urgency
+from utils.outbox import OutboxWorker, deliver_due, message_id, outbox_row, smtp_settings
+from utils.task_pages import task_key, task_ref
 
 BASE = Path(__file__).parent
 DB = BASE / "data" / "database.xlsx"
@@ -14,73 +20,231 @@ REMINDER_HOURS = {
     "Low": 9
 }
 
+# daemon mode: how often storage is checked for changes (one stat per file)
+POLL_SECONDS = 5
+# a reminder that failed to queue is tried again after this long
+RETRY_SECONDS = 60
+
 def log(msg):
     with open(LOG, "a") as f:
         f.write(f"{datetime.now()} - {msg}\n")
 
-def send_email(to, subject, body):
-    import streamlit as st
-    sender = st.secrets["EMAIL_USER"]
-    password = st.secrets["EMAIL_PASS"]
+def secret(name):
+    try:
+        import streamlit as st
+        return st.secrets[name]
+    except Exception:
+        return os.environ.get(name, "")
+
+def mail_settings():
+    return smtp_settings(user=secret("EMAIL_USER"), password=secret("EMAIL_PASS"))
+
+# ================= REMINDERS =================
+def task_id(row):
+    return (str(row["email"]).strip().lower(), str(row["task"]), *task_ref(row))
+
+def next_reminder(row, now):
+    # when this task's next reminder is due, None if it needs none
+    if str(row["status"]).strip() != "Pending":
+        return None
+
+    hours = REMINDER_HOURS.get(str(row["priority"]).strip(), 9)
+    last_sent = row.get("last_email_sent", "")
+
+    if pd.isna(last_sent) or not str(last_sent).strip():
+        return now
+
+    last_time = pd.to_datetime(last_sent, errors="coerce")
+    if pd.isna(last_time):
+        return now
+
+    # a near deadline shortens the cadence (see DUE_ESCALATION)
+    return reminder_due(last_time.to_pydatetime(), hours, parse_due(row.get("due")))
+
+def remind(row, now, db_path):
+    # queue the mail and stamp the task; keyed on the previous stamp so a
+    # second scheduler instance queues the same reminder only once
+    email = str(row["email"]).strip().lower()
+    task = row["task"]
+    priority = str(row["priority"]).strip()
+    last_sent = row.get("last_email_sent", "")
+    due = parse_due(row.get("due"))
+
+    subject = f"⏰ Task Reminder ({priority})"
+    body = f"Reminder for your task:\n\n{task}\n\nPriority: {priority}"
+
+    if due is not None:
+        body += f"\nDue: {due.strftime(DUE_FORMAT)}"
+
+        label = urgency(due, now)
+        if label:
+            subject = f"⚠ Task {label.upper()} ({priority})"
+
+    append_rows("Outbox", [outbox_row(
+        message_id(email, task, *task_ref(row), "scheduler", last_sent),
+        email,
+        subject,
+        body,
+        now,
+    )], db_path)
+
+    # row-level update so tasks added meanwhile are not overwritten
+    update_rows(
+        "Tasks",
+        {**task_key(row), "email": email},
+        {"last_email_sent": now.strftime("%Y-%m-%d %H:%M:%S")},
+        db_path
+    )
+    log(f"Email queued to {email} for task {task}")
+
+def run_once(db_path=DB):
+    log("Scheduler started")
 
-    msg = MIMEText(body)
-    msg["Subject"] = subject
-    msg["From"] = sender
-    msg["To"] = to
+    try:
+        tasks = load_tables(["Tasks"], db_path)["Tasks"]
+    except Exception as e:
+        log(f"ERROR reading Excel: {e}")
+        raise
 
-    server = smtplib.SMTP("smtp.gmail.com", 587)
-    server.starttls()
-    server.login(sender, password)
-    server.send_message(msg)
-    server.quit()
+    now = datetime.now()
 
-log("Scheduler started")
+    for idx, row in tasks.iterrows():
+        try:
+            due = next_reminder(row, now)
 
-try:
-    tasks = pd.read_excel(DB, sheet_name="Tasks", dtype=str)
-except Exception as e:
-    log(f"ERROR reading Excel: {e}")
-    raise
+            if due is not None and due <= now:
+                remind(row, now, db_path)
 
-tasks.columns = tasks.columns.str.strip()
+        except Exception as e:
+            log(f"ERROR processing row {idx}: {e}")
 
-now = datetime.now()
+    result = deliver_due(mail_settings(), db_path)
+    log(f"Scheduler finished ({result['sent']} sent, {result['retry']} retrying, {result['dead']} dead)")
 
-for idx, row in tasks.iterrows():
-    try:
-        email = str(row["Email"]).strip().lower()
-        status = str(row["Status"]).strip()
-        priority = str(row["Priority"]).strip()
-
-        if status != "Pending":
-            continue
-
-        hours = REMINDER_HOURS.get(priority, 9)
-        last_sent = row.get("Last_Email_Sent", "")
-
-        send_now = False
-
-        if pd.isna(last_sent) or not str(last_sent).strip():
-            send_now = True
-        else:
-            last_time = pd.to_datetime(last_sent)
-            diff = (now - last_time).total_seconds() / 3600
-            if diff >= hours:
-                send_now = True
-
-        if send_now:
-            send_email(
-                to=email,
-                subject=f"⏰ Task Reminder ({priority})",
-                body=f"Reminder for your task:\n\n{row['Task']}\n\nPriority: {priority}"
-            )
-            tasks.loc[idx, "Last_Email_Sent"] = now.strftime("%Y-%m-%d %H:%M:%S")
-            log(f"Email sent to {email} for task {row['Task']}")
+# ================= DAEMON =================
+class ReminderIndex:
+    # due time of every pending task, refreshed one storage file at a time
 
-    except Exception as e:
-        log(f"ERROR processing row {idx}: {e}")
+    def __init__(self):
+        self.rows = {}
+        self.state = {}
+        self.due = {}
+        self.keys_by_source = {}
+        self.heap = []
+
+    def load(self, source, tasks, now):
+        # only tasks whose priority/status/last send/deadline changed are rescheduled
+        seen = set()
+        changed = 0
+
+        for _, row in tasks.iterrows():
+            key = task_id(row)
+            state = tuple(str(row.get(c, "")) for c in ["priority", "status", "last_email_sent", "due"])
+            seen.add(key)
+
+            if self.state.get(key) == state:
+                continue
 
-with pd.ExcelWriter(DB, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
-    tasks.to_excel(writer, sheet_name="Tasks", index=False)
+            self.rows[key] = row
+            self.state[key] = state
+            self._schedule(key, next_reminder(row, now))
+            changed += 1
+
+        for key in self.keys_by_source.get(source, set()) - seen:
+            self.rows.pop(key, None)
+            self.state.pop(key, None)
+            self.due.pop(key, None)
+
+        self.keys_by_source[source] = seen
+        return changed
+
+    def _schedule(self, key, due):
+        self.due[key] = due
+        if due is not None:
+            heapq.heappush(self.heap, (due, key))
+
+    def pop_due(self, now):
+        rows = []
+
+        while self.heap and self.heap[0][0] <= now:
+            due, key = heapq.heappop(self.heap)
+
+            # stale heap entries are skipped instead of being removed on change
+            if self.due.get(key) == due:
+                rows.append(self.rows[key])
+                self.due[key] = None
+
+        return rows
+
+    def retry(self, key, at):
+        # pop_due already cleared the task; put it back unless it was removed meanwhile
+        if key in self.rows:
+            self._schedule(key, at)
+
+    def next_due(self):
+        while self.heap and self.due.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+        return self.heap[0][0] if self.heap else None
+
+def run_daemon(db_path=DB, poll_seconds=POLL_SECONDS):
+    log("Scheduler daemon started")
+
+    worker = OutboxWorker(mail_settings(), db_path)
+    worker.start()
+
+    index = ReminderIndex()
+    versions = {}
+
+    while True:
+        now = datetime.now()
+
+        # with sharding only the shards that changed are read again
+        for path in table_paths("Tasks", db_path):
+            version = data_version(path)
+
+            if versions.get(path) == version:
+                continue
 
-log("Scheduler finished")
+            try:
+                changed = index.load(path, load_tables(["Tasks"], path)["Tasks"], now)
+                versions[path] = version
+                if changed:
+                    log(f"Reloaded {path}: {changed} tasks rescheduled")
+            except Exception as e:
+                log(f"ERROR reading {path}: {e}")
+
+        due_rows = index.pop_due(now)
+
+        for row in due_rows:
+            try:
+                remind(row, now, db_path)
+            except Exception as e:
+                log(f"ERROR reminding {task_id(row)}: {e}")
+                index.retry(task_id(row), now + timedelta(seconds=RETRY_SECONDS))
+
+        if due_rows:
+            worker.wake()
+
+        # sleep until the next reminder, but keep watching for changes
+        next_due = index.next_due()
+        wait = poll_seconds
+        if next_due is not None:
+            wait = min(wait, max((next_due - datetime.now()).total_seconds(), 0))
+
+        time.sleep(wait)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send task reminder emails")
+    parser.add_argument("--daemon", action="store_true", help="keep running and react to data changes")
+    parser.add_argument("--poll-seconds", type=float, default=POLL_SECONDS)
+    parser.add_argument("--db", default=str(DB))
+    args = parser.parse_args()
+
+    if args.daemon:
+        try:
+            run_daemon(args.db, args.poll_seconds)
+        except KeyboardInterrupt:
+            log("Scheduler daemon stopped")
+    else:
+        run_once(args.db)
@@ -0,0 +1,95 @@
+import argparse
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from utils.academic_calendar import load_calendar
+from utils.archive import tables_with_history
+from utils.excel_utils import write_workbook
+from utils.materialized import (
+    MATERIALIZED_DB,
+    SOURCE_TABLES,
+    changed_users,
+    compute_materialized,
+    load_materialized,
+    load_state,
+    merge_materialized,
+    save_state,
+    state_path,
+    user_fingerprints,
+)
+
+BASE = Path(__file__).parent
+DB = BASE / "data" / "database.xlsx"
+LOG = BASE / "scheduler_log.txt"
+
+# Precomputes per-user scores, streaks, rollups, attendance risk and
+# suggestions into data/materialized.xlsx. Schedule nightly, e.g.
+#   0 2 * * *  cd /path/to/app && python materialize.py
+# and optionally every few minutes with --incremental.
+
+def log(msg):
+    with open(LOG, "a") as f:
+        f.write(f"{datetime.now()} - materialize: {msg}\n")
+
+def run(incremental=False, db_path=DB, out_path=MATERIALIZED_DB, today=None):
+    today = today or date.today()
+
+    # rows are current for pages until the source changes after this point
+    read_ns = time.time_ns()
+    tables = tables_with_history(SOURCE_TABLES, db_path)
+    fingerprints = user_fingerprints(tables)
+    state_file = state_path(out_path)
+    state = load_state(state_file)
+    calendar = load_calendar(db_path)
+
+    changed = changed_users(fingerprints, state, today) if incremental else None
+
+    if changed is None:
+        # full rebuild
+        result = compute_materialized(tables, today, calendar)
+        processed = len(fingerprints)
+
+    elif not changed:
+        # the stored rows still match the data read just now
+        save_state({**state, "source_read_ns": read_ns}, state_file)
+        log("no changes since last run")
+        return 0
+
+    else:
+        subset = {
+            name: df[df["email"].isin(changed)] for name, df in tables.items()
+        }
+        fresh = compute_materialized(subset, today, calendar)
+        result = merge_materialized(load_materialized(path=out_path), fresh, changed)
+        processed = len(changed)
+
+    write_workbook(out_path, result)
+
+    save_state({
+        "date": today.strftime("%Y-%m-%d"),
+        "source_read_ns": read_ns,
+        "finished_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "users": fingerprints,
+    }, state_file)
+
+    return processed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialize heavy per-user aggregates")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only recompute users whose rows changed since the last run today")
+    parser.add_argument("--db", default=str(DB))
+    parser.add_argument("--out", default=str(MATERIALIZED_DB))
+    args = parser.parse_args()
+
+    log("started")
+
+    try:
+        count = run(args.incremental, args.db, args.out)
+    except Exception as e:
+        log(f"ERROR: {e}")
+        raise
+
+    log(f"finished, {count} users processed")
+    print(f"Materialized {count} users into {args.out}")
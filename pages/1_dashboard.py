@@ -1,9 +1,7 @@
 import streamlit as st
-import pandas as pd
 from pathlib import Path
 from datetime import date
-from utils.productivity import calculate_productivity
-from utils.suggestions import get_suggestions
+from utils.snapshot import dashboard_snapshot
 
 # ================= PAGE CONFIG =================
 st.set_page_config(page_title="Dashboard", layout="wide")
@@ -24,122 +22,19 @@ css_path = Path(__file__).parent.parent / "assets" / "style.css"
 if css_path.exists():
     st.markdown(f"<style>{css_path.read_text()}</style>", unsafe_allow_html=True)
 
-# ================= SAFE READ =================
-def read_sheet(sheet):
-    try:
-        df = pd.read_excel(DB, sheet_name=sheet)
-        df.columns = df.columns.astype(str).str.strip().str.lower()
-        return df
-    except:
-        return pd.DataFrame()
-
 # ================= LOAD DATA =================
-habits = read_sheet("Habits")
-habit_log = read_sheet("HabitLog")
-study_log = read_sheet("StudyLog")
-attendance = read_sheet("Attendance")
-tasks = read_sheet("Tasks")
-settings = read_sheet("Settings")
-
-# =================================================
-# HABITS (FIXED)
-# =================================================
-total_habits = 0
-completed_habits = 0
-
-if not habits.empty and "email" in habits.columns:
-
-    habits["email"] = habits["email"].astype(str).str.strip().str.lower()
-
-    user_habits = habits[habits["email"] == email]
-
-    total_habits = len(user_habits)
-
-if not habit_log.empty and {"email", "date"}.issubset(habit_log.columns):
-
-    habit_log["email"] = habit_log["email"].astype(str).str.strip().str.lower()
-
-    habit_log["date"] = pd.to_datetime(
-        habit_log["date"], errors="coerce"
-    ).dt.date
-
-    completed_habits = habit_log[
-        (habit_log["email"] == email) &
-        (habit_log["date"] == today)
-    ].shape[0]
-
-# =================================================
-# STUDY HOURS (MONTHLY)
-# =================================================
-study_minutes = 0
-
-if not study_log.empty and "minutes" in study_log.columns:
-
-    study_log["email"] = study_log["email"].astype(str).str.strip().str.lower()
-
-    date_col = next((c for c in study_log.columns if "date" in c), None)
-
-    if date_col:
-
-        study_log[date_col] = pd.to_datetime(
-            study_log[date_col], errors="coerce"
-        )
-
-        study_minutes = study_log[
-            (study_log["email"] == email) &
-            (study_log[date_col].dt.month == today.month) &
-            (study_log[date_col].dt.year == today.year)
-        ]["minutes"].astype(float).sum()
-
-study_hours = round(study_minutes / 60, 2)
-
-# =================================================
-# ATTENDANCE (TODAY)
-# =================================================
-total_periods_today = 5
-present_periods_today = 0
-attendance_percent = 0
-
-if not attendance.empty and {"email","date"}.issubset(attendance.columns):
-
-    attendance["email"] = attendance["email"].astype(str).str.strip().str.lower()
-
-    attendance["date"] = pd.to_datetime(
-        attendance["date"], errors="coerce"
-    ).dt.date
-
-    today_att = attendance[
-        (attendance["email"] == email) &
-        (attendance["date"] == today)
-    ]
-
-    present_periods_today = len(today_att)
-
-    attendance_percent = round(
-        (present_periods_today / total_periods_today) * 100, 1
-    )
-
-# =================================================
-# TASKS
-# =================================================
-total_tasks = 0
-completed_tasks = 0
-
-if not tasks.empty and {"email","status"}.issubset(tasks.columns):
-
-    tasks["email"] = tasks["email"].astype(str).str.strip().str.lower()
-
-    tasks["status"] = tasks["status"].astype(str).str.lower()
-
-    user_tasks = tasks[tasks["email"] == email]
-
-    total_tasks = len(user_tasks)
-
-    completed_tasks = user_tasks[
-        user_tasks["status"] == "completed"
-    ].shape[0]
-
-task_percent = int((completed_tasks / total_tasks) * 100) if total_tasks else 0
+# every metric below comes from one memoized snapshot
+snap = dashboard_snapshot(email, today)
+
+total_habits = snap["total_habits"]
+completed_habits = snap["completed_habits"]
+study_hours = snap["study_hours"]
+total_periods_today = snap["periods_today"]
+present_periods_today = snap["present_periods_today"]
+attendance_percent = snap["attendance_percent"]
+total_tasks = snap["total_tasks"]
+completed_tasks = snap["completed_tasks"]
+task_percent = snap["task_percent"]
 
 # =================================================
 # DASHBOARD UI
@@ -159,7 +54,7 @@ with c2:
 with c3:
     st.metric(
         "Attendance Today",
-        f"{present_periods_today}/5",
+        f"{present_periods_today}/{total_periods_today}",
         f"{attendance_percent}%"
     )
 
@@ -175,7 +70,7 @@ with c4:
 # =================================================
 st.divider()
 
-score = calculate_productivity(email)
+score = snap["score"]
 
 st.subheader("📊 Today's Productivity Score")
 
@@ -195,7 +90,7 @@ else:
 # =================================================
 st.subheader("🧠 Smart Study Suggestions")
 
-tips = get_suggestions(email)
+tips = snap["suggestions"]
 
 for tip in tips:
     st.info(tip)
\ No newline at end of file
@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 from datetime import date, timedelta
 from pathlib import Path
+from utils.user_view import session_view
+from utils.habit_bits import habit_bitsets
 
 # ================= PAGE CONFIG =================
 st.set_page_config(page_title="Habits", layout="wide")
@@ -33,36 +35,23 @@ if css_path.exists():
 
 st.title("✅ Habit Tracker")
 
-# ==================================================
-# SAFE READ FUNCTION
-# ==================================================
-def read_sheet(sheet, cols):
-    try:
-        df = pd.read_excel(DB, sheet_name=sheet, dtype=str)
-        df.columns = df.columns.str.strip().str.lower()
-        return df
-    except:
-        return pd.DataFrame(columns=cols)
-
 # ==================================================
 # LOAD DATA
 # ==================================================
-habits = read_sheet("Habits", ["email", "habit"])
-habit_log = read_sheet("HabitLog", ["email", "date", "habit"])
+# session-local copy: after our own writes the rerun reads nothing back
+view = session_view(st.session_state, email)
+data = view.tables(["Habits", "HabitLog"])
+
+habits = data["Habits"]
 
 # Normalize
-habits["email"] = habits["email"].astype(str).str.strip().str.lower()
 habits["habit"] = habits["habit"].astype(str).str.strip()
 
-habit_log["email"] = habit_log["email"].astype(str).str.strip().str.lower()
-habit_log["habit"] = habit_log["habit"].astype(str).str.strip()
+# {(habit, date)}: every "done on day X?" below is one set lookup
+done = view.keys("HabitLog")
 
-habit_log["date"] = pd.to_datetime(
-    habit_log["date"], errors="coerce"
-).dt.strftime("%Y-%m-%d")
-
-# ================= USER HABITS ONLY =================
-habits = habits[habits["email"] == email]
+# per-habit day bitsets for streaks and the weekly table
+bits = {habit: b for (_, habit), b in habit_bitsets(data["HabitLog"]).items()}
 
 # ==================================================
 # TODAY PROGRESS
@@ -71,12 +60,7 @@ st.subheader("📊 Today's Progress")
 
 total_habits = len(habits)
 
-done_today = habit_log[
-    (habit_log["email"] == email) &
-    (habit_log["date"] == today)
-]
-
-done_count = len(done_today)
+done_count = sum((habit, today) in done for habit in habits["habit"])
 
 progress = int((done_count / total_habits) * 100) if total_habits else 0
 
@@ -99,24 +83,16 @@ if st.button("Add Habit"):
     if not clean:
         st.warning("Habit name cannot be empty")
 
-    elif clean.lower() in habits["habit"].str.lower().tolist():
+    elif clean.lower() in {h.lower() for h, in view.keys("Habits")}:
         st.info("Habit already exists")
 
     else:
 
-        full_habits = read_sheet("Habits", ["email", "habit"])
-
-        new_row = pd.DataFrame([{
+        view.append("Habits", [{
             "email": email,
             "habit": clean
         }])
 
-        full_habits = pd.concat([full_habits, new_row], ignore_index=True)
-
-        with pd.ExcelWriter(DB, engine="openpyxl", mode="a", if_sheet_exists="replace") as w:
-            full_habits.to_excel(w, sheet_name="Habits", index=False)
-            habit_log.to_excel(w, sheet_name="HabitLog", index=False)
-
         st.success("Habit added ✅")
         st.rerun()
 
@@ -133,11 +109,7 @@ if habits.empty:
 
 for habit in habits["habit"]:
 
-    already_done = (
-        (habit_log["email"] == email) &
-        (habit_log["habit"] == habit) &
-        (habit_log["date"] == today)
-    ).any()
+    already_done = (habit, today) in done
 
     col1, col2 = st.columns([4, 1])
 
@@ -150,20 +122,11 @@ for habit in habits["habit"]:
 
             if st.checkbox(habit, key=f"{habit}_{today}"):
 
-                habit_log = pd.concat(
-                    [habit_log, pd.DataFrame([{
-                        "email": email,
-                        "habit": habit,
-                        "date": today
-                    }])],
-                    ignore_index=True
-                )
-
-                full_habits = read_sheet("Habits", ["email", "habit"])
-
-                with pd.ExcelWriter(DB, engine="openpyxl", mode="a", if_sheet_exists="replace") as w:
-                    full_habits.to_excel(w, sheet_name="Habits", index=False)
-                    habit_log.to_excel(w, sheet_name="HabitLog", index=False)
+                view.append_unique("HabitLog", [{
+                    "email": email,
+                    "habit": habit,
+                    "date": today
+                }])
 
                 st.success(f"Marked '{habit}' as done ✅")
                 st.rerun()
@@ -171,21 +134,7 @@ for habit in habits["habit"]:
     # ================= STREAK =================
     with col2:
 
-        dates = habit_log[
-            (habit_log["email"] == email) &
-            (habit_log["habit"] == habit)
-        ]["date"]
-
-        streak = 0
-        current = date.today()
-
-        for d in sorted(pd.to_datetime(dates, errors="coerce").dt.date, reverse=True):
-
-            if d == current:
-                streak += 1
-                current -= timedelta(days=1)
-            else:
-                break
+        streak = bits[habit].current_streak(date.today()) if habit in bits else 0
 
         st.markdown(f"🔥 **{streak}**")
 
@@ -203,17 +152,16 @@ last_7_days = [
 
 weekly_data = []
 
+week_start = date.today() - timedelta(days=6)
+
 for habit in habits["habit"]:
 
     row = {"Habit": habit}
+    week = bits[habit].window(week_start, 7) if habit in bits else [False] * 7
 
-    for d in last_7_days:
+    for d, hit in zip(last_7_days, week):
 
-        row[d] = "✅" if (
-            (habit_log["email"] == email) &
-            (habit_log["habit"] == habit) &
-            (habit_log["date"] == d)
-        ).any() else "❌"
+        row[d] = "✅" if hit else "❌"
 
     weekly_data.append(row)
 
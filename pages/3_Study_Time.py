@@ -1,6 +1,6 @@
 import streamlit as st
-import pandas as pd
 from datetime import date
+from utils.user_view import session_view
 
 st.set_page_config(page_title="Study Time Tracker", layout="wide")
 
@@ -15,6 +15,8 @@ DB = "data/database.xlsx"
 
 st.title("📚 Study Time Tracker")
 
+view = session_view(st.session_state, email)
+
 # ======================================================
 # 🧠 ADD SUBJECT SECTION
 # ======================================================
@@ -28,34 +30,20 @@ if st.button("Add Subject"):
         st.warning("Enter a valid subject name")
         st.stop()
 
-    try:
-        subjects = pd.read_excel(DB, sheet_name="Subjects")
-    except:
-        subjects = pd.DataFrame(columns=["email", "subject"])
-
-    subjects.columns = [c.strip().lower() for c in subjects.columns]
-
-    if "email" in subjects.columns:
-        subjects["email"] = subjects["email"].astype(str).str.strip().str.lower()
+    subjects = view.table("Subjects")
 
     duplicate = (
-        (subjects["email"] == email) &
-        (subjects["subject"].str.lower() == new_subject.lower())
+        subjects["subject"].astype(str).str.lower() == new_subject.strip().lower()
     )
 
     if duplicate.any():
         st.info("Subject already added.")
     else:
 
-        new_row = pd.DataFrame({
-            "email": [email],
-            "subject": [new_subject.strip()]
-        })
-
-        subjects = pd.concat([subjects, new_row], ignore_index=True)
-
-        with pd.ExcelWriter(DB, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
-            subjects.to_excel(writer, sheet_name="Subjects", index=False)
+        view.append("Subjects", [{
+            "email": email,
+            "subject": new_subject.strip()
+        }])
 
         st.success("Subject added successfully!")
 
@@ -67,15 +55,9 @@ st.divider()
 st.subheader("⏱ Record Study Time")
 
 # load subjects
-try:
-    subjects = pd.read_excel(DB, sheet_name="Subjects")
-    subjects.columns = [c.strip().lower() for c in subjects.columns]
-    subjects["email"] = subjects["email"].astype(str).str.strip().str.lower()
-
-    user_subjects = subjects[subjects["email"] == email]["subject"].tolist()
+data = view.tables(["Subjects", "StudyLog"])
 
-except:
-    user_subjects = []
+user_subjects = data["Subjects"]["subject"].dropna().tolist()
 
 if len(user_subjects) == 0:
     st.warning("Add at least one subject first.")
@@ -95,46 +77,28 @@ if st.button("Save Study Time"):
 
     today = date.today()
 
-    try:
-        study_log = pd.read_excel(DB, sheet_name="StudyLog")
-    except:
-        study_log = pd.DataFrame(columns=["email", "subject", "minutes", "date"])
-
-    study_log.columns = [c.strip().lower() for c in study_log.columns]
-
-    if "email" in study_log.columns:
-        study_log["email"] = study_log["email"].astype(str).str.strip().str.lower()
-
-    if not study_log.empty:
-        study_log["date"] = pd.to_datetime(study_log["date"], errors="coerce").dt.date
-
-    existing = (
-        (study_log["email"] == email) &
-        (study_log["subject"] == subject) &
-        (study_log["date"] == today)
+    # update today's entry for this subject, or add a new one
+    data["StudyLog"], updated = view.update(
+        "StudyLog",
+        {"email": email, "subject": subject, "date": today},
+        {"minutes": minutes}
     )
 
-    if existing.any():
+    if updated:
 
-        study_log.loc[existing, "minutes"] = minutes
         st.info("Today's study time updated.")
 
     else:
 
-        new_row = pd.DataFrame({
-            "email": [email],
-            "subject": [subject],
-            "minutes": [minutes],
-            "date": [today]
-        })
-
-        study_log = pd.concat([study_log, new_row], ignore_index=True)
+        data["StudyLog"] = view.append("StudyLog", [{
+            "email": email,
+            "subject": subject,
+            "minutes": minutes,
+            "date": today
+        }])
 
         st.success("Study time saved!")
 
-    with pd.ExcelWriter(DB, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
-        study_log.to_excel(writer, sheet_name="StudyLog", index=False)
-
 st.divider()
 
 # ======================================================
@@ -142,22 +106,9 @@ st.divider()
 # ======================================================
 st.subheader("Today's Study Record")
 
-try:
-    study_log = pd.read_excel(DB, sheet_name="StudyLog")
-    study_log.columns = [c.strip().lower() for c in study_log.columns]
-
-    study_log["email"] = study_log["email"].astype(str).str.strip().str.lower()
-    study_log["date"] = pd.to_datetime(study_log["date"], errors="coerce").dt.date
-
-    today_log = study_log[
-        (study_log["email"] == email) &
-        (study_log["date"] == date.today())
-    ]
-
-    if today_log.empty:
-        st.info("No study recorded today.")
-    else:
-        st.dataframe(today_log[["subject", "minutes"]], use_container_width=True)
+today_log = view.range("StudyLog", date.today(), date.today())
 
-except:
-    st.info("No study data available.")
\ No newline at end of file
+if today_log.empty:
+    st.info("No study recorded today.")
+else:
+    st.dataframe(today_log[["subject", "minutes"]], use_container_width=True)
@@ -1,9 +1,16 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, date, time
+from datetime import datetime, date
 from pathlib import Path
 import math
-from utils.excel_utils import safe_write
+import numpy as np
+from utils.user_view import session_view
+from utils.academic_calendar import load_calendar
+from utils.archive import cold_summary
+from utils import attendance_sim
+from utils.attendance_sim import (
+    absence_plan, first_day_reaching, per_period_status, project_curves, upcoming_days
+)
 
 # ================= AUTH CHECK =================
 if "logged_in" not in st.session_state or not st.session_state.logged_in:
@@ -26,18 +33,17 @@ DB = "data/database.xlsx"
 TODAY = date.today().strftime("%Y-%m-%d")
 NOW = datetime.now().time()
 
-PERIODS_PER_DAY = 5
 REQUIRED_PERCENT = 0.75
 
-# ================= LOAD ATTENDANCE =================
-try:
-    attendance_log = pd.read_excel(DB, sheet_name="Attendance", dtype=str)
-except:
-    attendance_log = pd.DataFrame(columns=["email", "date", "period"])
+# working days, holidays and per-weekday timetable
+calendar = load_calendar()
 
-attendance_log.columns = attendance_log.columns.str.strip().str.lower()
+# ================= LOAD ATTENDANCE =================
+view = session_view(st.session_state, email)
+attendance_log = view.table("Attendance")
 
-attendance_log["email"] = attendance_log["email"].astype(str).str.strip().str.lower()
+# {(date, period)}: "already marked?" is one set lookup
+marked = view.keys("Attendance")
 
 # convert date properly
 attendance_log["date"] = pd.to_datetime(
@@ -51,33 +57,27 @@ attendance_log = attendance_log.drop_duplicates(
 
 # ================= PERIOD TIMINGS =================
 periods = {
-    "Period 1": (time(10, 0), time(11, 0)),
-    "Period 2": (time(11, 0), time(12, 0)),
-    "Period 3": (time(12, 0), time(13, 0)),
-    "Period 4": (time(13, 0), time(14, 0)),
-    "Period 5": (time(14, 0), time(15, 0)),
+    name: (start, end)
+    for name, start, end in calendar.periods_on(date.today())
 }
-# ================= TODAY STATUS =================
-today_att = attendance_log[
-    (attendance_log["email"] == email) &
-    (attendance_log["date"] == date.today())
-]
+PERIODS_TODAY = len(periods)
 
+# ================= TODAY STATUS =================
 st.title("🗓 Attendance Tracker")
 
-today_count = len(today_att)
-today_percent = (today_count / PERIODS_PER_DAY) * 100
+today_count = sum((TODAY, p) in marked for p in periods)
+today_percent = (today_count / PERIODS_TODAY) * 100 if PERIODS_TODAY else 0
 
 st.metric(
     "Today's Attendance",
-    f"{today_count} / {PERIODS_PER_DAY}",
+    f"{today_count} / {PERIODS_TODAY}",
     f"{today_percent:.0f}%"
 )
 
 # ================= MARK ATTENDANCE =================
 valid_periods = [
     p for p, (s, e) in periods.items()
-    if s <= NOW <= e and p not in today_att["period"].values
+    if s <= NOW <= e and (TODAY, p) not in marked
 ]
 
 if valid_periods:
@@ -87,24 +87,13 @@ if valid_periods:
     if st.button("📍 Mark Attendance"):
 
         # prevent duplicate marking
-        if not (
-            (attendance_log["email"] == email) &
-            (attendance_log["date"] == date.today()) &
-            (attendance_log["period"] == selected)
-        ).any():
-
-            new_row = pd.DataFrame([{
-                "email": email,
-                "date": date.today(),
-                "period": selected
-            }])
+        _, added = view.append_unique("Attendance", [{
+            "email": email,
+            "date": date.today(),
+            "period": selected
+        }])
 
-            attendance_log = pd.concat(
-                [attendance_log, new_row],
-                ignore_index=True
-            )
-
-            safe_write(DB, {"Attendance": attendance_log})
+        if added:
 
             st.success("Attendance marked successfully ✅")
 
@@ -113,6 +102,9 @@ if valid_periods:
         else:
             st.warning("Attendance already marked for this period.")
 
+elif not periods:
+    st.info("No classes today (weekend or holiday).")
+
 else:
     st.info("No active periods right now.")
 
@@ -121,18 +113,26 @@ st.divider()
 
 user_all = attendance_log[attendance_log["email"] == email]
 
+# rows moved to the cold archive only count here, they are never loaded
+cold_rows, cold_first_day = cold_summary(email, "Attendance")
+
 # Attended classes
-A = len(user_all)
+A = len(user_all) + cold_rows
 
 # ================= TOTAL CLASSES LOGIC =================
-if not user_all.empty:
+# classes actually held since the first recorded day (no weekends / holidays)
+if not user_all.empty or cold_rows:
 
-    first_day = user_all["date"].min()
-    today = date.today()
+    first_days = [d for d in [user_all["date"].min(), cold_first_day] if pd.notna(d)]
+    first_day = min(pd.to_datetime(first_days).date)
 
-    total_days = (today - first_day).days + 1
+    # a first record on a weekend / holiday starts at the next class day,
+    # and records on such days count as extra classes held
+    start = calendar.first_working_days([first_day])
+    days = pd.to_datetime(user_all["date"], errors="coerce", format="mixed").dropna()
+    off_days = int((~calendar.working_mask(days.to_numpy())).sum())
 
-    T = total_days * PERIODS_PER_DAY
+    T = int(calendar.total_classes(start, date.today())[0]) + off_days
 
 else:
     T = 0
@@ -219,4 +219,79 @@ else:
         st.error(
             f"⚠ You are below safe attendance. "
             f"You must attend at least **{shortage} more classes** to become safe."
-        )
\ No newline at end of file
+        )
+# =====================================================
+# 🔮 WHAT-IF SIMULATOR
+# =====================================================
+st.divider()
+
+st.subheader("🔮 What-if Simulator")
+
+if T == 0:
+
+    st.info("Not enough data to simulate yet.")
+
+else:
+
+    horizon = st.slider("Days ahead", 7, 120, 30)
+
+    days, day_periods = upcoming_days(calendar, n_days=horizon)
+    class_days = [str(d) for d, n in zip(days, day_periods) if n > 0]
+
+    skip_days = st.multiselect("Days I plan to miss", class_days)
+    skip_percent = st.slider("…and skip this share of other classes (%)", 0, 100, 0, 5)
+
+    thresholds = st.multiselect(
+        "Targets (%)", [60, 65, 70, 75, 80, 85, 90], default=[int(REQUIRED_PERCENT * 100)]
+    )
+
+    scenarios = {
+        "Attend everything": absence_plan(day_periods),
+        "My plan": absence_plan(
+            day_periods, skip_days, skip_percent / 100, days
+        ),
+    }
+
+    curves = project_curves([A], [T], day_periods, np.stack(list(scenarios.values())))[0]
+
+    chart = pd.DataFrame(
+        curves.T, index=pd.to_datetime(days), columns=list(scenarios)
+    )
+    st.line_chart(chart)
+
+    if thresholds:
+        targets = np.array(thresholds) / 100
+
+        rows = []
+
+        for name, curve in zip(scenarios, curves):
+            reach = first_day_reaching(
+                np.repeat(curve[None, :], len(targets), axis=0)[None], targets
+            )[0]
+
+            for target, idx in zip(thresholds, reach):
+                rows.append({
+                    "Scenario": name,
+                    "Target": f"{target}%",
+                    "Final %": round(curve[-1], 1),
+                    "Reached on": str(days[idx]) if idx >= 0 else "Not within range",
+                })
+
+        st.dataframe(pd.DataFrame(rows), use_container_width=True)
+
+        # module-qualified: the 75% sections above use these names for ints
+        needed = attendance_sim.classes_needed([A], [T], targets)[0]
+        bunks = attendance_sim.safe_bunks([A], [T], targets)[0]
+
+        st.dataframe(pd.DataFrame({
+            "Target": [f"{t}%" for t in thresholds],
+            "Classes needed": needed,
+            "Safe bunks": np.maximum(bunks, 0),
+        }), use_container_width=True)
+
+    # ---------------- PER PERIOD ----------------
+    with st.expander("Per-period attendance"):
+        st.dataframe(
+            per_period_status(user_all, calendar, first_day, threshold=REQUIRED_PERCENT),
+            use_container_width=True
+        )
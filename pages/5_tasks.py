@@ -2,11 +2,13 @@ import streamlit as st
 import pandas as pd
 from datetime import date, datetime
 from pathlib import Path
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import threading
 import time
+from utils.data_access import append_rows, load_tables, update_rows
+from utils.task_pages import PAGE_SIZES, TASK_SORTS, new_task_id, task_key, task_page, task_ref
+from utils.outbox import ensure_worker, message_id, outbox_row, smtp_settings, task_message
+from utils.deadlines import DUE_FORMAT, due_views, parse_due, reminder_due
+from utils.user_view import session_view
 
 # ---------------- PAGE CONFIG ----------------
 st.set_page_config(page_title="Tasks", layout="wide")
@@ -31,94 +33,37 @@ SENDER_EMAIL = st.secrets["SENDER_EMAIL"]
 APP_PASSWORD = st.secrets["APP_PASSWORD"]
 
 # =====================================================
-# EMAIL FUNCTION
+# EMAIL OUTBOX
 # =====================================================
-def send_task_email(receiver_email, task, priority):
+# mails are queued next to the task and sent by a background worker,
+# so the page never waits on the SMTP server
+outbox_worker = ensure_worker(smtp_settings(user=SENDER_EMAIL, password=APP_PASSWORD))
 
-    # -------- SUBJECT & MESSAGE BASED ON PRIORITY --------
-    if priority == "High":
-        subject = "🚨 HIGH PRIORITY TASK ALERT"
-        body = f"""
-Hello,
-
-You have a HIGH PRIORITY task pending.
-
-Task: {task}
-
-Please complete it immediately.
-
-- Student Productivity Tracker
-"""
-
-    elif priority == "Medium":
-        subject = "⏰ Task Reminder"
-        body = f"""
-Hello,
-
-Reminder to complete your task:
-
-Task: {task}
-Priority: Medium
-
-Try to finish it soon.
-
-- Student Productivity Tracker
-"""
-
-    else:  # LOW PRIORITY
-        subject = "📝 Friendly Task Reminder"
-        body = f"""
-Hello,
-
-This is a gentle reminder for your task.
-
-Task: {task}
-Priority: Low
-
-You can complete it whenever you are free.
-
-- Student Productivity Tracker
-"""
-
-    # -------- SEND MAIL --------
-    try:
-        msg = MIMEMultipart()
-        msg["From"] = SENDER_EMAIL
-        msg["To"] = receiver_email
-        msg["Subject"] = subject
-        msg.attach(MIMEText(body, "plain"))
-
-        server = smtplib.SMTP("smtp.gmail.com", 587)
-        server.starttls()
-        server.login(SENDER_EMAIL, APP_PASSWORD)
-        server.send_message(msg)
-        server.quit()
-
-        print("EMAIL SENT SUCCESSFULLY")
-
-    except Exception as e:
-        print("MAIL ERROR:", e)
+def task_email_row(receiver_email, task, priority, *key_parts):
+    subject, body = task_message(task, priority)
+    return outbox_row(message_id(receiver_email, task, *key_parts), receiver_email, subject, body)
 
 
 # =====================================================
 # LOAD DATA
 # =====================================================
-def load_tasks():
-    try:
-        return pd.read_excel(DB, sheet_name="Tasks")
-    except:
-        return pd.DataFrame(columns=[
-            "Email", "Task", "Priority", "Status", "Created_Date", "Last_Reminded"
-        ])
+view = session_view(st.session_state, email)
+tasks = view.table("Tasks")
 
-def load_users():
-    try:
-        return pd.read_excel(DB, sheet_name="Users")
-    except:
-        return pd.DataFrame(columns=["Email", "Password"])
+def queue_task_action(action, key):
+    # button callback: applied below on this rerun, before anything renders
+    st.session_state.task_action = (action, key)
 
-tasks = load_tasks()
-users = load_users()
+# Complete / Delete patch the session copy; the page renders from the result
+task_action = st.session_state.pop("task_action", None)
+
+if task_action:
+    action, key = task_action
+
+    if action == "complete":
+        tasks, _ = view.update("Tasks", key, {"status": "Completed"})
+    else:
+        tasks, _ = view.delete("Tasks", key)
 
 # =====================================================
 # REMINDER SETTINGS (HOURS)
@@ -129,7 +74,7 @@ REMINDER_INTERVAL = {
     "Low": 9
 }
 
-def should_send(priority, last_reminded):
+def should_send(priority, last_reminded, due=None):
 
     if pd.isna(last_reminded):
         return True
@@ -139,8 +84,9 @@ def should_send(priority, last_reminded):
     except:
         return True
 
-    hours_passed = (datetime.now() - last_time).total_seconds() / 3600
-    return hours_passed >= REMINDER_INTERVAL.get(priority, 6)
+    # reminders come faster as the deadline gets close
+    next_time = reminder_due(last_time, REMINDER_INTERVAL.get(priority, 6), parse_due(due))
+    return datetime.now() >= next_time
 
 
 # =====================================================
@@ -148,26 +94,36 @@ def should_send(priority, last_reminded):
 # =====================================================
 def check_pending_tasks():
 
-    tasks_df = load_tasks()
-    updated = False
+    data = load_tables(["Tasks", "Outbox"])
+    tasks_df = data["Tasks"]
+    queued = set(data["Outbox"]["id"].astype(str))
 
     for i, row in tasks_df.iterrows():
 
-        if row["Status"] != "Pending":
+        if row["status"] != "Pending":
             continue
 
-        if should_send(row["Priority"], row["Last_Reminded"]):
+        if should_send(row["priority"], row["last_reminded"], row.get("due")):
 
-            print("Sending scheduled reminder:", row["Task"])
-            send_task_email(row["Email"], row["Task"], row["Priority"])
+            # keyed on the previous reminder time: sessions racing on the
+            # same task queue the same id once
+            mail = task_email_row(
+                row["email"], row["task"], row["priority"],
+                *task_ref(row), "reminder", row["last_reminded"]
+            )
 
-            tasks_df.loc[i, "Last_Reminded"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            updated = True
+            if mail["id"] not in queued:
+                print("Queueing scheduled reminder:", row["task"])
+                append_rows("Outbox", [mail])
+                queued.add(mail["id"])
 
-    if updated:
-        with pd.ExcelWriter(DB, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
-            users.to_excel(writer, sheet_name="Users", index=False)
-            tasks_df.to_excel(writer, sheet_name="Tasks", index=False)
+            update_rows(
+                "Tasks",
+                task_key(row),
+                {"last_reminded": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+            )
+
+    outbox_worker.wake()
 
 
 # =====================================================
@@ -191,6 +147,13 @@ st.title("📋 Mandatory Tasks")
 task_name = st.text_input("Task Name")
 priority = st.selectbox("Priority", ["High", "Medium", "Low"])
 
+due = ""
+if st.checkbox("Set a due date"):
+    col1, col2 = st.columns(2)
+    due_day = col1.date_input("Due date", min_value=date.today())
+    due_time = col2.time_input("Due time", value=datetime.strptime("23:59", "%H:%M").time())
+    due = datetime.combine(due_day, due_time).strftime(DUE_FORMAT)
+
 # ⭐⭐⭐ IMPORTANT FIX — SEND MAIL ON ADD ⭐⭐⭐
 if st.button("Add Task"):
 
@@ -198,27 +161,67 @@ if st.button("Add Task"):
         st.warning("Task name cannot be empty")
     else:
         now_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        task_id = new_task_id()
+
+        new_rows = {"Tasks": [{
+            "email": email,
+            "id": task_id,
+            "task": task_name,
+            "priority": priority,
+            "status": "Pending",
+            "created_date": TODAY,
+            "last_reminded": now_time,
+            "due": due
+        }]}
+
+        # 🔴 QUEUE IMMEDIATE EMAIL, in the same write as the task
+        mail = task_email_row(email, task_name, priority, task_id, "added")
+        if mail["id"] not in set(view.table("Outbox")["id"].astype(str)):
+            new_rows["Outbox"] = [mail]
+
+        tasks = view.append_many(new_rows)["Tasks"]
+        outbox_worker.wake()
+
+        # the list below renders from the updated copy, no rerun needed
+        st.success("Task added & email notification queued ✅")
+
+
+# =====================================================
+# SEARCH
+# =====================================================
+query = st.text_input("🔎 Search tasks, habits and subjects", placeholder="e.g. phys lab")
+
+if query:
+    hits = view.search(query)
+
+    if not hits:
+        st.caption("No matches.")
+    else:
+        results = pd.DataFrame(hits).rename(columns={"table": "type", "text": "name"})
+        results = results.drop(columns=["score"]).fillna("")
+        st.dataframe(results, use_container_width=True, hide_index=True)
 
-        new_task = pd.DataFrame([{
-            "Email": email,
-            "Task": task_name,
-            "Priority": priority,
-            "Status": "Pending",
-            "Created_Date": TODAY,
-            "Last_Reminded": now_time
-        }])
 
-        tasks = pd.concat([tasks, new_task], ignore_index=True)
+# =====================================================
+# DEADLINES
+# =====================================================
+st.subheader("⏳ Deadlines")
 
-        # 🔴 SEND IMMEDIATE EMAIL
-        send_task_email(email, task_name, priority)
+# consecutive slices of the deadline-ordered index, not filters over all tasks
+views = due_views(view.index("Tasks", "due", "m"))
 
-        with pd.ExcelWriter(DB, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
-            users.to_excel(writer, sheet_name="Users", index=False)
-            tasks.to_excel(writer, sheet_name="Tasks", index=False)
+tab1, tab2, tab3 = st.tabs([
+    f"🚨 Overdue ({len(views['overdue'])})",
+    f"📅 Due today ({len(views['today'])})",
+    f"🗓 Next 7 days ({len(views['week'])})",
+])
 
-        st.success("Task added & email notification sent ✅")
-        st.rerun()
+for tab, key in [(tab1, "overdue"), (tab2, "today"), (tab3, "week")]:
+    with tab:
+        if views[key].empty:
+            st.caption("Nothing here.")
+        else:
+            st.dataframe(views[key][["task", "priority", "due"]], use_container_width=True, hide_index=True)
 
 
 # =====================================================
@@ -226,27 +229,75 @@ if st.button("Add Task"):
 # =====================================================
 st.subheader("🗂 Your Tasks")
 
-user_tasks = tasks[tasks["Email"] == email]
+user_tasks = tasks
+
+# ---------------- FILTERS ----------------
+f1, f2, f3, f4, f5 = st.columns([2, 2, 3, 2, 1])
+
+status_filter = f1.multiselect("Status", ["Pending", "Completed"])
+priority_filter = f2.multiselect("Priority", ["High", "Medium", "Low"], key="priority_filter")
+created_range = f3.date_input("Created between", value=(), key="task_created_range")
+sort_order = f4.selectbox("Sort", list(TASK_SORTS))
+page_size = f5.selectbox("Per page", PAGE_SIZES, index=1)
+
+start = created_range[0] if len(created_range) > 0 else None
+end = created_range[1] if len(created_range) > 1 else None
+
+# a different filter starts again at page 1
+filters = (tuple(status_filter), tuple(priority_filter), start, end, sort_order, page_size)
+if st.session_state.get("task_filters") != filters:
+    st.session_state.task_filters = filters
+    st.session_state.task_page = 0
+
+# the session copy sorted once per change; a page is a few masks and a take
+ordered = view.task_order(sort_order)
 
-for i, row in user_tasks.iterrows():
+page_rows, matching = task_page(
+    ordered, status_filter, priority_filter, start, end,
+    st.session_state.task_page, page_size
+)
+
+page_count = max((matching + page_size - 1) // page_size, 1)
+if st.session_state.task_page >= page_count:
+    # e.g. the last task on the last page was just deleted
+    st.session_state.task_page = page_count - 1
+    page_rows, _ = task_page(
+        ordered, status_filter, priority_filter, start, end,
+        st.session_state.task_page, page_size
+    )
+
+if page_rows.empty:
+    st.info("No tasks match these filters.")
+
+for i, row in page_rows.reset_index(drop=True).iterrows():
 
     col1, col2, col3 = st.columns([6,2,2])
 
     with col1:
-        st.write(f"**{row['Task']}** | Priority: {row['Priority']}")
+        due_text = f" | Due: {row['due']}" if parse_due(row.get("due")) else ""
+        st.write(f"**{row['task']}** | Priority: {row['priority']}{due_text}")
 
     with col2:
-        if row["Status"] == "Pending":
-            if st.button("✅ Complete", key=f"done_{i}"):
-                tasks.loc[i, "Status"] = "Completed"
+        if row["status"] == "Pending":
+            st.button("✅ Complete", key=f"done_{i}", on_click=queue_task_action,
+                      args=("complete", task_key(row)))
 
     with col3:
-        if st.button("🗑 Delete", key=f"del_{i}"):
-            tasks = tasks.drop(i)
+        st.button("🗑 Delete", key=f"del_{i}", on_click=queue_task_action,
+                  args=("delete", task_key(row)))
+
+# ---------------- PAGER ----------------
+p1, p2, p3 = st.columns([1, 3, 1])
+
+if p1.button("⬅ Previous", disabled=st.session_state.task_page == 0):
+    st.session_state.task_page -= 1
+    st.rerun()
+
+p2.caption(f"Page {st.session_state.task_page + 1} of {page_count} · {matching} matching tasks")
 
-with pd.ExcelWriter(DB, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
-    users.to_excel(writer, sheet_name="Users", index=False)
-    tasks.to_excel(writer, sheet_name="Tasks", index=False)
+if p3.button("Next ➡", disabled=st.session_state.task_page >= page_count - 1):
+    st.session_state.task_page += 1
+    st.rerun()
 
 
 # =====================================================
@@ -255,7 +306,7 @@ with pd.ExcelWriter(DB, engine="openpyxl", mode="a", if_sheet_exists="replace")
 st.divider()
 
 total = len(user_tasks)
-completed = len(user_tasks[user_tasks["Status"] == "Completed"])
+completed = len(user_tasks[user_tasks["status"] == "Completed"])
 pending = total - completed
 
 st.write(f"Total Tasks: {total}")
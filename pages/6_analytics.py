@@ -1,7 +1,13 @@
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
-from datetime import date
+from datetime import date, timedelta
+import numpy as np
+from utils.archive import user_history
+from utils.academic_calendar import attendance_totals, load_calendar
+from utils.materialized import cohort_position, current_rows
+from utils.habit_bits import DayBits, habit_bitsets
+from utils.attendance_bits import AttendanceMasks
 
 # ---------------- PAGE CONFIG ----------------
 st.set_page_config(page_title="Analytics", layout="wide")
@@ -22,55 +28,55 @@ DB = "data/database.xlsx"
 
 st.title("📈 Analytics Dashboard")
 
-# ---------------- SAFE EXCEL LOADER ----------------
-def load_sheet_safe(sheet_name):
-    try:
-        df = pd.read_excel(DB, sheet_name=sheet_name)
-        df.columns = [str(c).strip().lower() for c in df.columns]
-        return df
-    except:
-        return pd.DataFrame()
+# ---------------- LOAD DATA ----------------
+# materialize.py rows first; the full history (hot rows plus archived
+# partitions) is read only if some of them are missing or stale
+rollups = current_rows(email, "StudyRollups")
+risk = current_rows(email, "AttendanceRisk")
+breakdown = current_rows(email, "AttendanceBreakdown")
+streaks = current_rows(email, "HabitStreaks")
+
+_history = {}
+
+def history(table):
+    if not _history:
+        _history.update(user_history(email, ["StudyLog", "Attendance", "HabitLog"]))
+    return _history[table]
+
+def user_rows(df):
+    if df.empty or "email" not in df.columns:
+        return df.iloc[0:0]
+    return df[df["email"].astype(str).str.strip().str.lower() == email]
 
 # =====================================================
 # 📚 STUDY TIME ANALYSIS
 # =====================================================
 st.subheader("📚 Study Time Analysis")
 
-study = load_sheet_safe("StudyLog")
+if rollups is not None:
+    study = rollups
+else:
+    study = user_rows(history("StudyLog"))
 
 if study.empty:
     st.info("No study data available.")
 
 else:
 
-    if "email" in study.columns:
-
-        study["email"] = study["email"].astype(str).str.strip().str.lower()
-
-        user_study = study[study["email"] == email]
+    minutes = pd.to_numeric(study["minutes"], errors="coerce").fillna(0)
+    subject_summary = minutes.groupby(study["subject"]).sum() / 60
 
-        if user_study.empty:
-            st.info("No study data available.")
+    fig, ax = plt.subplots()
 
-        else:
+    ax.bar(subject_summary.index, subject_summary.values)
 
-            user_study["minutes"] = pd.to_numeric(
-                user_study["minutes"], errors="coerce"
-            ).fillna(0)
+    ax.set_ylabel("Hours")
+    ax.set_title("Study Time by Subject")
 
-            subject_summary = user_study.groupby("subject")["minutes"].sum() / 60
+    plt.xticks(rotation=45)
+    plt.tight_layout()
 
-            fig, ax = plt.subplots()
-
-            ax.bar(subject_summary.index, subject_summary.values)
-
-            ax.set_ylabel("Hours")
-            ax.set_title("Study Time by Subject")
-
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-
-            st.pyplot(fig)
+    st.pyplot(fig)
 
 st.divider()
 
@@ -79,123 +85,219 @@ st.divider()
 # =====================================================
 st.subheader("🗓 Attendance Analysis")
 
-attendance = load_sheet_safe("Attendance")
+def live_attendance():
 
-if attendance.empty:
-    st.info("No attendance data found.")
-
-else:
+    attendance = history("Attendance")
 
     required_cols = ["email", "date", "period"]
 
-    if not all(col in attendance.columns for col in required_cols):
+    if not attendance.empty and not all(col in attendance.columns for col in required_cols):
         st.error("Attendance sheet format incorrect.")
         st.stop()
 
     # ---------------- CLEAN DATA ----------------
+    attendance = user_rows(attendance)
 
-    attendance["email"] = attendance["email"].astype(str).str.strip().str.lower()
+    attendance = attendance.assign(
+        date=pd.to_datetime(attendance["date"], errors="coerce").dt.date
+    ).dropna(subset=["date"])
 
-    attendance["date"] = pd.to_datetime(
-        attendance["date"], errors="coerce"
-    ).dt.date
+    return attendance.drop_duplicates(subset=["email", "date", "period"])
 
-    attendance = attendance.dropna(subset=["date"])
+if risk is not None:
+    totals = risk.iloc[0]
+else:
+    user_att = live_attendance()
+    totals = None if user_att.empty else attendance_totals(user_att, load_calendar()).iloc[0]
 
-    attendance = attendance.drop_duplicates(
-        subset=["email", "date", "period"]
-    )
+if totals is None:
+    st.info("No attendance records yet.")
 
-    user_att = attendance[attendance["email"] == email]
+else:
 
-    if user_att.empty:
-        st.info("No attendance records yet.")
+    # ---------------- PRESENT / HELD CLASSES ----------------
+    present_classes = int(float(totals["attended"]))
+    total_classes = int(float(totals["total"]))
 
-    else:
+    percent = float(totals["percent"])
 
-        PERIODS_PER_DAY = 5
+    absent_classes = max(0, total_classes - present_classes)
 
-        # ---------------- PRESENT CLASSES ----------------
-        present_classes = len(user_att)
+    # ---------------- CHART ----------------
+    fig, ax = plt.subplots()
 
-        # ---------------- TOTAL CLASSES LOGIC ----------------
-        first_day = user_att["date"].min()
-        today = date.today()
+    ax.pie(
+        [present_classes, absent_classes],
+        labels=["Present", "Absent"],
+        autopct="%1.1f%%",
+        startangle=90,
+        wedgeprops=dict(width=0.4)
+    )
 
-        total_days = (today - first_day).days + 1
-        total_classes = total_days * PERIODS_PER_DAY
+    ax.set_title("Overall Attendance")
 
-        percent = (present_classes / total_classes) * 100 if total_classes > 0 else 0
+    st.pyplot(fig)
 
-        absent_classes = max(0, total_classes - present_classes)
+    # ---------------- METRICS ----------------
+    st.metric("Overall Attendance %", f"{percent:.1f}%")
 
-        # ---------------- CHART ----------------
-        fig, ax = plt.subplots()
+    st.caption(f"Attended Classes: {present_classes} / {total_classes}")
 
-        ax.pie(
-            [present_classes, absent_classes],
-            labels=["Present", "Absent"],
-            autopct="%1.1f%%",
-            startangle=90,
-            wedgeprops=dict(width=0.4)
-        )
+    if percent < 75:
+        st.warning("⚠ Attendance below 75%")
+    else:
+        st.success("✅ Attendance is good")
 
-        ax.set_title("Overall Attendance")
+    # ---------------- PERIOD / WEEKDAY BREAKDOWN ----------------
+    if breakdown is not None:
+        counts = breakdown.assign(
+            attended=pd.to_numeric(breakdown["attended"]),
+            held=pd.to_numeric(breakdown["held"]),
+        )
+        by_period = counts[counts["kind"] == "period"].set_index("name")
+        by_weekday = counts[counts["kind"] == "weekday"].set_index("name")
+    else:
+        masks = AttendanceMasks(live_attendance(), load_calendar())
+        by_period = masks.per_period().set_index("period")
+        by_weekday = masks.by_weekday().set_index("weekday")
 
-        st.pyplot(fig)
+    by_weekday = by_weekday[by_weekday["held"] > 0]
 
-        # ---------------- METRICS ----------------
-        st.metric("Overall Attendance %", f"{percent:.1f}%")
+    col1, col2 = st.columns(2)
 
-        st.caption(f"Attended Classes: {present_classes} / {total_classes}")
+    with col1:
+        st.caption("Attendance % by period")
+        st.bar_chart(
+            (by_period["attended"] * 100 / by_period["held"].where(by_period["held"] > 0)).fillna(0)
+        )
 
-        if percent < 75:
-            st.warning("⚠ Attendance below 75%")
-        else:
-            st.success("✅ Attendance is good")
+    with col2:
+        st.caption("Attendance % by weekday")
+        st.bar_chart(by_weekday["attended"] * 100 / by_weekday["held"])
 
 # =====================================================
 # 🔥 HABIT ANALYSIS
 # =====================================================
 st.subheader("🔥 Habit Analysis")
 
-habit_log = load_sheet_safe("HabitLog")
+# one day bitset per habit: stored by materialize.py, or built from the log
+if streaks is not None:
+    bits = {(email, row["habit"]): DayBits.from_text(row["history"]) for _, row in streaks.iterrows()}
+else:
+    bits = habit_bitsets(user_rows(history("HabitLog")))
+
+bits = {key: b for key, b in bits.items() if b.start is not None}
+today = date.today()
 
-if habit_log.empty:
-    st.info("No habit data available.")
+if not bits:
+    st.info("No habits recorded yet.")
 
 else:
 
-    if "email" in habit_log.columns:
+    # ---------------- DAILY TREND ----------------
+    first_day = date.fromordinal(min(b.start for b in bits.values()))
+    last = max(b.start + b.bits.bit_length() - 1 for b in bits.values())
+    n_days = max(last, today.toordinal()) - first_day.toordinal() + 1
+
+    per_day = sum(b.window(first_day, n_days).astype(int) for b in bits.values())
+    done = np.flatnonzero(per_day)
+
+    fig, ax = plt.subplots()
+
+    ax.plot(
+        [first_day + timedelta(days=int(i)) for i in done],
+        per_day[done],
+        marker="o"
+    )
+
+    ax.set_ylabel("Habits Completed")
+    ax.set_xlabel("Date")
+    ax.set_title("Daily Habit Completion Trend")
+
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+
+    st.pyplot(fig)
+
+    # ---------------- BITSET VIEWS ----------------
+    # popcounts and shifted windows over each habit's day bitset
+    month_start = today - timedelta(days=29)
+
+    rates = pd.DataFrame([
+        {
+            "Habit": habit,
+            "Last 30 days": f"{b.rate(month_start, today) * 100:.0f}%",
+            "Days done": b.count(),
+        }
+        for (_, habit), b in bits.items()
+    ])
+    st.dataframe(rates, use_container_width=True)
+
+    weeks = 12
+    # start on a Monday so every column is one calendar week
+    grid_start = today - timedelta(days=today.weekday() + 7 * (weeks - 1))
+    per_day = sum(b.window(grid_start, 7 * weeks).astype(int) for b in bits.values())
+
+    fig, ax = plt.subplots(figsize=(8, 2.5))
+    ax.imshow(np.reshape(per_day, (weeks, 7)).T, cmap="Greens", aspect="auto")
+    ax.set_yticks(range(7), ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"])
+    ax.set_xticks([])
+    ax.set_title(f"Habits done per day, last {weeks} weeks")
+    st.pyplot(fig)
+
+# =====================================================
+# 🏅 HABIT STREAKS
+# =====================================================
+st.subheader("🏅 Habit Streaks")
+
+if not bits:
+    st.info("No habits recorded yet.")
 
-        habit_log["email"] = habit_log["email"].astype(str).str.strip().str.lower()
+elif streaks is not None:
 
-        user_log = habit_log[habit_log["email"] == email]
+    counts = ["current_streak", "longest_streak", "days_done"]
 
-        if user_log.empty:
-            st.info("No habits recorded yet.")
+    st.dataframe(
+        streaks[["habit"] + counts].astype({c: int for c in counts}),
+        use_container_width=True
+    )
+
+else:
 
-        else:
+    st.dataframe(pd.DataFrame([
+        {
+            "habit": habit,
+            "current_streak": b.current_streak(today),
+            "longest_streak": b.longest_streak(),
+            "days_done": b.count(),
+        }
+        for (_, habit), b in bits.items()
+    ]), use_container_width=True)
 
-            user_log["date"] = pd.to_datetime(
-                user_log["date"], errors="coerce"
-            ).dt.date
+# =====================================================
+# 👥 COMPARED TO YOUR CLASS
+# =====================================================
+st.subheader("👥 Compared to Your Class")
 
-            daily_count = user_log.groupby("date").size()
+# quantiles come from the nightly UserScores table, cached until it is rebuilt
+cohort = cohort_position(email)
 
-            fig, ax = plt.subplots()
+if cohort.empty:
+    st.info("Class comparisons are computed nightly. Check back tomorrow.")
 
-            ax.plot(
-                daily_count.index,
-                daily_count.values,
-                marker="o"
-            )
+else:
 
-            ax.set_ylabel("Habits Completed")
-            ax.set_xlabel("Date")
-            ax.set_title("Daily Habit Completion Trend")
+    cols = st.columns(len(cohort))
 
-            plt.xticks(rotation=45)
-            plt.tight_layout()
+    for col, (_, row) in zip(cols, cohort.iterrows()):
+        col.metric(
+            row["metric"],
+            f"{row['you']:.1f}",
+            f"{row['you'] - row['median']:+.1f} vs median",
+        )
+        col.caption(f"Top {100 - row['percentile']:.0f}% of class")
 
-            st.pyplot(fig)
\ No newline at end of file
+    st.dataframe(
+        cohort.set_index("metric").round(1),
+        use_container_width=True
+    )
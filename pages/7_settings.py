@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
 from pathlib import Path
+from utils.user_view import session_view
+from utils.export import DOWNLOAD_MAX_MB, discard_export, write_temp_export
 import streamlit as st
 
 if "logged_in" not in st.session_state or not st.session_state.logged_in:
@@ -24,15 +26,9 @@ css_path = Path(__file__).parent.parent / "assets" / "style.css"
 with open(css_path) as f:
     st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
-# ================= LOAD USERS =================
-try:
-    users = pd.read_excel(DB, sheet_name="Users", dtype=str)
-except:
-    users = pd.DataFrame(columns=[
-        "email", "name", "monthlygoal", "minattendance"
-    ])
-
-users.columns = users.columns.str.strip().str.lower()
+# ================= LOAD USER =================
+view = session_view(st.session_state, email)
+users = view.table("Users")
 
 # Ensure required columns
 for col in ["email", "name", "monthlygoal", "minattendance"]:
@@ -40,22 +36,18 @@ for col in ["email", "name", "monthlygoal", "minattendance"]:
         users[col] = ""
 
 # ================= GET CURRENT USER =================
-user_row = users[users["email"] == email]
+is_new_profile = users.empty
 
-if user_row.empty:
+if is_new_profile:
     # First-time profile creation
-    users = pd.concat(
-        [users, pd.DataFrame([{
-            "email": email,
-            "name": "",
-            "monthlygoal": "40",
-            "minattendance": "75"
-        }])],
-        ignore_index=True
-    )
-    idx = users.index[-1]
-else:
-    idx = user_row.index[0]
+    users = pd.DataFrame([{
+        "email": email,
+        "name": "",
+        "monthlygoal": "40",
+        "minattendance": "75"
+    }])
+
+idx = users.index[0]
 
 # ================= FORM =================
 st.subheader("👤 Student Profile")
@@ -82,24 +74,49 @@ min_attendance = st.number_input(
 
 # ================= SAVE =================
 if st.button("💾 Save Settings"):
-    users.loc[idx, "name"] = name.strip()
-    users.loc[idx, "monthlygoal"] = str(monthly_goal)
-    users.loc[idx, "minattendance"] = str(min_attendance)
-
-    from utils.excel_utils import safe_write
+    values = {
+        "name": name.strip(),
+        "monthlygoal": str(monthly_goal),
+        "minattendance": str(min_attendance)
+    }
 
-    safe_write(DB, {
-        "Users": users
-})
-
-
-        # Preserve other sheets safely
-    for sheet in ["Habits", "HabitLog", "StudyLog", "Attendance", "Tasks"]:
-            try:
-                pd.read_excel(DB, sheet_name=sheet).to_excel(
-                    writer, sheet_name=sheet, index=False
-                )
-            except:
-                pass
+    if is_new_profile:
+        view.append("Users", [{"email": email, **values}])
+    else:
+        view.update("Users", {"email": email}, values)
 
     st.success("✅ Profile & settings updated successfully!")
+
+# ================= EXPORT =================
+st.divider()
+st.subheader("📤 Export My Data")
+
+export_format = st.selectbox("Format", ["zip", "jsonl"], key="export_format")
+
+if st.button("Prepare Export"):
+    # streamed chunk by chunk from this user's rows only into a temp file;
+    # session state keeps just the path. The download itself is held in memory,
+    # so exports past DOWNLOAD_MAX_MB are refused
+    discard_export(st.session_state.pop("export_path", None))
+    try:
+        st.session_state.export_path, _ = write_temp_export(
+            [email], export_format, prefix="student_data_", max_bytes=DOWNLOAD_MAX_MB * 2**20
+        )
+        st.session_state.export_name = f"student_data.{export_format}"
+    except ValueError as e:
+        st.error(str(e))
+
+
+def drop_export():
+    discard_export(st.session_state.pop("export_path", None))
+
+
+if "export_path" in st.session_state and Path(st.session_state.export_path).exists():
+    with open(st.session_state.export_path, "rb") as f:
+        st.download_button(
+            "⬇ Download",
+            data=f,
+            file_name=st.session_state.export_name,
+            mime="application/octet-stream",
+            on_click=drop_export
+        )
@@ -0,0 +1,246 @@
+import streamlit as st
+from pathlib import Path
+from utils.bulk_import import IMPORT_TABLES, import_file
+from utils.export import DOWNLOAD_MAX_MB, EXPORT_FORMATS, discard_export, write_temp_export
+from utils.data_access import load_tables, replace_table, update_rows, user_cache
+from utils.academic_calendar import (
+    calendar_from_frames, default_timetable_frame, load_calendar
+)
+from utils.attendance_bits import load_masks
+from utils.attendance_sim import flag_at_risk
+from utils.deadlines import deadline_index, due_views
+
+# ================= PAGE CONFIG =================
+st.set_page_config(page_title="Admin", layout="wide")
+
+# ================= AUTH =================
+if "logged_in" not in st.session_state or not st.session_state.logged_in:
+    st.warning("Please login first.")
+    st.switch_page("app.py")
+    st.stop()
+
+email = st.session_state.email.strip().lower()
+
+# admins are listed in .streamlit/secrets.toml as ADMIN_EMAILS = ["..."]
+admins = [a.strip().lower() for a in st.secrets.get("ADMIN_EMAILS", [])]
+
+if email not in admins:
+    st.error("This page is for admins only.")
+    st.stop()
+
+# ================= LOAD CSS =================
+css_path = Path(__file__).parent.parent / "assets" / "style.css"
+if css_path.exists():
+    st.markdown(f"<style>{css_path.read_text()}</style>", unsafe_allow_html=True)
+
+st.title("🛠 Admin")
+
+st.subheader("📥 Bulk Import")
+
+st.write(
+    "Load a whole class's attendance or study log from CSV, XLSX or Parquet. "
+    "Rows already recorded for the same student, date and period (or subject) are skipped."
+)
+
+table = st.selectbox("Import into", list(IMPORT_TABLES))
+
+st.caption("Required columns: " + ", ".join(IMPORT_TABLES[table]["columns"]))
+
+upload = st.file_uploader("File", type=["csv", "xlsx", "parquet"])
+
+if upload is not None and st.button("Import"):
+
+    bar = st.progress(0.0)
+    status = st.empty()
+    total_bytes = max(upload.size, 1)
+
+    def show_progress(summary):
+        # bytes consumed so far is the best estimate we have while streaming
+        try:
+            done = min(upload.tell() / total_bytes, 1.0)
+        except Exception:
+            done = 0.0
+
+        bar.progress(done)
+        status.write(
+            f"Read {summary['read']} rows · "
+            f"{summary['invalid']} invalid · {summary['duplicates']} duplicates"
+        )
+
+    try:
+        summary = import_file(upload, table, name=upload.name, progress=show_progress)
+    except (ValueError, ImportError) as e:
+        st.error(str(e))
+        st.stop()
+
+    bar.progress(1.0)
+
+    st.success(f"Imported {summary['imported']} rows into {table} ✅")
+
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Rows read", summary["read"])
+    c2.metric("Invalid", summary["invalid"])
+    c3.metric("Duplicates skipped", summary["duplicates"])
+
+# ================= COHORT EXPORT =================
+st.divider()
+st.subheader("📤 Cohort Export")
+
+cohort_text = st.text_area("Student emails (one per line)")
+cohort_format = st.selectbox("Format", EXPORT_FORMATS[:2])
+
+if st.button("Build Export"):
+
+    cohort = [e.strip() for e in cohort_text.splitlines() if e.strip()]
+
+    if not cohort:
+        st.warning("Enter at least one email.")
+    else:
+        # streamed to disk chunk by chunk; a fresh temp file per build, and the
+        # previous one is dropped. The download button holds the file in memory,
+        # so cohorts past DOWNLOAD_MAX_MB have to use the CLI export
+        discard_export(st.session_state.pop("cohort_export", None))
+        try:
+            out_path, size = write_temp_export(
+                cohort, cohort_format, prefix="cohort_export_", max_bytes=DOWNLOAD_MAX_MB * 2**20
+            )
+        except ValueError as e:
+            st.error(f"{e} (or split the cohort)")
+        else:
+            st.session_state.cohort_export = out_path
+            st.session_state.cohort_export_name = f"cohort_export.{cohort_format}"
+            st.success(f"Export ready ({size / 1024:.1f} KB)")
+
+
+def drop_cohort_export():
+    # the button has already served the file by the time this runs
+    discard_export(st.session_state.pop("cohort_export", None))
+
+
+if "cohort_export" in st.session_state and Path(st.session_state.cohort_export).exists():
+    with open(st.session_state.cohort_export, "rb") as f:
+        st.download_button(
+            "⬇ Download cohort export",
+            data=f,
+            file_name=st.session_state.cohort_export_name,
+            mime="application/octet-stream",
+            on_click=drop_cohort_export
+        )
+
+# ================= ACADEMIC CALENDAR =================
+st.divider()
+st.subheader("🗓 Academic Calendar")
+
+calendar_data = load_tables(["Timetable", "Holidays"])
+
+timetable = calendar_data["Timetable"]
+if timetable.empty:
+    timetable = default_timetable_frame()
+
+st.caption("Timetable: one row per weekday and period (times as HH:MM). Days without rows have no classes.")
+edited_timetable = st.data_editor(
+    timetable[["weekday", "period", "start", "end"]],
+    num_rows="dynamic",
+    use_container_width=True,
+    key="timetable_editor"
+)
+
+st.caption("Holidays: dates with no classes.")
+edited_holidays = st.data_editor(
+    calendar_data["Holidays"][["date", "name"]],
+    num_rows="dynamic",
+    use_container_width=True,
+    key="holidays_editor"
+)
+
+if st.button("💾 Save Calendar"):
+    try:
+        calendar_from_frames(edited_timetable, edited_holidays)
+    except (ValueError, TypeError) as e:
+        st.error(f"Calendar not saved: {e}")
+    else:
+        replace_table("Timetable", edited_timetable.dropna(how="all"))
+        replace_table("Holidays", edited_holidays.dropna(how="all"))
+        st.success("Calendar saved ✅")
+
+# ================= ATTENDANCE RISK =================
+st.divider()
+st.subheader("🚩 Students at Attendance Risk")
+
+risk_threshold = st.slider("Required attendance (%)", 50, 100, 75, 5)
+risk_horizon = st.slider("Look ahead (days)", 7, 120, 30)
+
+if st.button("Check all students"):
+    calendar = load_calendar()
+    masks = load_masks()
+    risk = flag_at_risk(masks.totals(), calendar, risk_threshold / 100, risk_horizon)
+
+    flagged = risk[risk["status"] != "safe"].sort_values("percent")
+
+    st.write(f"{len(flagged)} of {len(risk)} students below {risk_threshold}%")
+    st.dataframe(flagged.round(1), use_container_width=True)
+
+    # class-wide breakdowns straight from the same masks
+    col1, col2 = st.columns(2)
+
+    for col, frame, key in [
+        (col1, masks.per_period(), "period"),
+        (col2, masks.by_weekday(), "weekday"),
+    ]:
+        summary = frame.groupby(key, sort=False)[["attended", "held"]].sum()
+        summary = summary[summary["held"] > 0]
+        summary["percent"] = summary["attended"] * 100 / summary["held"]
+        col.dataframe(summary.round(1), use_container_width=True)
+
+# ================= DEADLINES =================
+st.divider()
+st.subheader("⏳ Task Deadlines (All Students)")
+
+# one deadline-ordered index over every pending task, rebuilt on data change
+deadlines = due_views(deadline_index())
+
+c1, c2, c3 = st.columns(3)
+c1.metric("Overdue", len(deadlines["overdue"]))
+c2.metric("Due today", len(deadlines["today"]))
+c3.metric("Next 7 days", len(deadlines["week"]))
+
+if not deadlines["overdue"].empty:
+    st.dataframe(
+        deadlines["overdue"][["email", "task", "priority", "due"]],
+        use_container_width=True, hide_index=True
+    )
+
+# ================= EMAIL OUTBOX =================
+st.divider()
+st.subheader("✉️ Email Outbox")
+
+outbox = load_tables(["Outbox"])["Outbox"]
+
+if outbox.empty:
+    st.info("No notifications queued yet.")
+else:
+    counts = outbox["status"].value_counts()
+    st.write(" · ".join(f"{status}: {n}" for status, n in counts.items()))
+
+    dead = outbox[outbox["status"] == "dead"]
+
+    if not dead.empty:
+        st.dataframe(dead[["email", "subject", "attempts", "last_error", "created"]], use_container_width=True)
+
+        if st.button("🔁 Retry dead messages"):
+            retried = update_rows("Outbox", {"status": "dead"}, {"status": "pending", "attempts": 0})
+            st.success(f"{retried} messages queued again")
+
+# ================= CACHE =================
+st.divider()
+st.subheader("🧠 Working-Set Cache")
+
+stats = user_cache.stats()
+
+c1, c2, c3, c4 = st.columns(4)
+c1.metric("Cached users", stats["users"])
+c2.metric("Memory", f"{stats['bytes'] / 2**20:.1f} / {stats['budget_bytes'] / 2**20:.0f} MB")
+c3.metric("Hit rate", f"{stats['hit_rate'] * 100:.0f}%")
+c4.metric("Evictions", stats["evictions"])
+
+st.caption(f"{stats['hits']} hits · {stats['misses']} misses · {stats['invalidations']} invalidations (this worker only)")
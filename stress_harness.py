@@ -0,0 +1,353 @@
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import openpyxl
+
+BASE = Path(__file__).parent
+DB = BASE / "data" / "database.xlsx"
+
+# Simulates many sessions (one process each, like separate Streamlit workers)
+# plus email_scheduler.py and archive passes hammering a COPY of the workbook,
+# then checks that nothing was lost, duplicated or corrupted. e.g.
+#   python stress_harness.py --users 16 --ops 40
+#   python stress_harness.py --users 32 --ops 25 --shards 4
+
+OPERATIONS = {
+    "mark_habit": 30,
+    "mark_attendance": 25,
+    "save_study": 20,
+    "add_task": 15,
+    "complete_task": 10,
+}
+HABITS = ["Exercise", "Reading", "Meditation", "Water"]
+SUBJECTS = ["Maths", "Physics", "Chemistry"]
+PERIODS = [f"Period {i}" for i in range(1, 6)]
+DAYS_BACK = 10
+
+
+def user_email(i):
+    return f"stress-{i}@example.com"
+
+
+# ================= ONE SESSION =================
+def run_user(i, db_path, ops, seed):
+    # same calls the pages make; returns the journal of what should be stored
+    from utils.outbox import message_id, outbox_row, task_message
+    from utils.task_pages import new_task_id
+    from utils.user_view import UserView
+
+    rng = random.Random(seed + i)
+    email = user_email(i)
+    view = UserView(email, db_path)
+    today = date.today()
+
+    journal = {"HabitLog": set(), "Attendance": set(), "StudyLog": {}, "Tasks": {}, "mails": set()}
+    task_ids = {}
+    latencies = []
+    errors = []
+
+    names, weights = zip(*OPERATIONS.items())
+
+    for n in range(ops):
+        op = rng.choices(names, weights)[0]
+        day = (today - timedelta(days=rng.randrange(DAYS_BACK))).strftime("%Y-%m-%d")
+        started = time.perf_counter()
+
+        try:
+            if op == "mark_habit":
+                habit = rng.choice(HABITS)
+                view.append_unique("HabitLog", [{"habit": habit, "date": day}])
+                journal["HabitLog"].add((habit, day))
+
+            elif op == "mark_attendance":
+                period = rng.choice(PERIODS)
+                view.append_unique("Attendance", [{"date": day, "period": period}])
+                journal["Attendance"].add((day, period))
+
+            elif op == "save_study":
+                subject, minutes = rng.choice(SUBJECTS), rng.randrange(5, 240, 5)
+                _, updated = view.update("StudyLog", {"subject": subject, "date": day}, {"minutes": minutes})
+                if not updated:
+                    view.append("StudyLog", [{"subject": subject, "minutes": minutes, "date": day}])
+                journal["StudyLog"][(subject, day)] = str(minutes)
+
+            elif op == "add_task":
+                task = f"stress task {i}-{n}"
+                task_id = new_task_id()
+                priority = rng.choice(["High", "Medium", "Low"])
+                created = today.strftime("%Y-%m-%d")
+                subject, body = task_message(task, priority)
+                mail = outbox_row(message_id(email, task, task_id, "added"), email, subject, body)
+
+                view.append_many({
+                    "Tasks": [{"id": task_id, "task": task, "priority": priority,
+                               "status": "Pending", "created_date": created}],
+                    "Outbox": [mail],
+                })
+                journal["Tasks"][task] = "Pending"
+                task_ids[task] = task_id
+                journal["mails"].add(mail["id"])
+
+            elif op == "complete_task":
+                pending = [t for t, s in journal["Tasks"].items() if s == "Pending"]
+                if not pending:
+                    continue
+                task = rng.choice(pending)
+                view.update("Tasks", {"id": task_ids[task]}, {"status": "Completed"})
+                journal["Tasks"][task] = "Completed"
+
+        except Exception as e:
+            errors.append(f"{email} {op}: {e!r}")
+            continue
+
+        latencies.append((op, time.perf_counter() - started))
+
+    return email, journal, latencies, errors
+
+
+# ================= SCHEDULER =================
+def run_scheduler(db_path, runs, log_path):
+    # real run_once passes; SMTP points at a closed local port so sends fail fast
+    import email_scheduler
+
+    email_scheduler.LOG = Path(log_path)
+    latencies, errors = [], []
+
+    for _ in range(runs):
+        started = time.perf_counter()
+        try:
+            email_scheduler.run_once(db_path)
+        except Exception as e:
+            errors.append(f"scheduler: {e!r}")
+        latencies.append(("scheduler_run", time.perf_counter() - started))
+        time.sleep(0.2)
+
+    return latencies, errors
+
+
+# ================= ARCHIVER =================
+def run_archiver(db_path, runs, archive_dir):
+    # moves rows past the shortest allowed horizon while sessions append
+    from utils.archive import MIN_HORIZON_DAYS, archive_old_rows
+
+    latencies, errors = [], []
+
+    for _ in range(runs):
+        started = time.perf_counter()
+        try:
+            archive_old_rows(MIN_HORIZON_DAYS, db_path, archive_dir)
+        except Exception as e:
+            errors.append(f"archiver: {e!r}")
+        latencies.append(("archive_run", time.perf_counter() - started))
+        time.sleep(0.5)
+
+    return latencies, errors
+
+
+# ================= INVARIANTS =================
+def workbook_paths(db_path):
+    from utils import sharding
+
+    return [db_path] + (sharding.shard_paths(db_path) if sharding.is_sharded(db_path) else [])
+
+
+def check_workbooks(db_path):
+    problems = []
+
+    for path in workbook_paths(db_path):
+        try:
+            wb = openpyxl.load_workbook(path, read_only=True)
+            for ws in wb.worksheets:
+                for _ in ws.iter_rows(values_only=True):
+                    pass
+            wb.close()
+        except Exception as e:
+            problems.append(f"corrupted workbook {path}: {e!r}")
+
+    return problems
+
+
+ARCHIVE_KEYS = {
+    "HabitLog": ["email", "habit", "date"],
+    "Attendance": ["email", "date", "period"],
+    "StudyLog": ["email", "subject", "date", "minutes"],
+}
+
+
+def log_rows(tables):
+    return {
+        table: set(zip(*(tables[table][c].astype(str).str.strip() for c in columns)))
+        for table, columns in ARCHIVE_KEYS.items()
+    }
+
+
+def check_archive(db_path, archive_dir, before):
+    # every pre-existing log row is still there, hot or archived
+    from utils.archive import tables_with_history
+
+    after = log_rows(tables_with_history(list(ARCHIVE_KEYS), db_path, archive_dir))
+
+    return [
+        f"{table} lost pre-existing row {row}"
+        for table in ARCHIVE_KEYS
+        for row in sorted(before[table] - after[table])
+    ]
+
+
+def check_rows(db_path, journals):
+    from utils.data_access import load_tables
+
+    tables = load_tables(["HabitLog", "Attendance", "StudyLog", "Tasks", "Outbox"], db_path)
+    problems = []
+
+    def rows_of(table, email, columns):
+        df = tables[table]
+        mine = df[df["email"].astype(str) == email]
+        return Counter(zip(*(mine[c].astype(str) for c in columns)))
+
+    for email, journal in journals.items():
+        for table, columns in [("HabitLog", ["habit", "date"]), ("Attendance", ["date", "period"])]:
+            stored = rows_of(table, email, columns)
+            problems += [f"{table} lost {email} {k}" for k in journal[table] if k not in stored]
+            problems += [f"{table} duplicated {email} {k} x{n}" for k, n in stored.items() if n > 1]
+            problems += [f"{table} unexpected {email} {k}" for k in stored if k not in journal[table]]
+
+        study = rows_of("StudyLog", email, ["subject", "date", "minutes"])
+        stored = Counter((s, d) for s, d, _ in study.elements())
+        values = {(s, d): m for s, d, m in study}
+        for key, minutes in journal["StudyLog"].items():
+            if key not in stored:
+                problems.append(f"StudyLog lost {email} {key}")
+            elif stored[key] > 1:
+                problems.append(f"StudyLog duplicated {email} {key} x{stored[key]}")
+            elif values[key] != minutes:
+                problems.append(f"StudyLog stale {email} {key}: {values[key]} != {minutes}")
+
+        tasks = rows_of("Tasks", email, ["task", "status"])
+        seen = Counter(t for t, _ in tasks.elements())
+        status = {t: s for t, s in tasks}
+        for task, expected in journal["Tasks"].items():
+            if task not in seen:
+                problems.append(f"Tasks lost {email} {task}")
+            elif seen[task] > 1:
+                problems.append(f"Tasks duplicated {email} {task} x{seen[task]}")
+            elif status[task] != expected:
+                problems.append(f"Tasks status {email} {task}: {status[task]} != {expected}")
+
+        mail_ids = Counter(tables["Outbox"].loc[tables["Outbox"]["email"].astype(str) == email, "id"].astype(str))
+        problems += [f"Outbox lost {email} {m}" for m in journal["mails"] if m not in mail_ids]
+
+    ids = Counter(tables["Outbox"]["id"].astype(str))
+    problems += [f"Outbox duplicated id {k} x{n}" for k, n in ids.items() if n > 1]
+
+    return problems
+
+
+# ================= REPORT =================
+def report(latencies, elapsed):
+    by_op = {}
+    for op, seconds in latencies:
+        by_op.setdefault(op, []).append(seconds * 1000)
+
+    total = sum(len(v) for op, v in by_op.items() if op not in ["scheduler_run", "archive_run"])
+    print(f"\n{total} operations in {elapsed:.1f}s -> {total / elapsed:.1f} ops/s\n")
+    print(f"{'operation':<16}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+
+    for op in sorted(by_op):
+        ms = np.array(by_op[op])
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        print(f"{op:<16}{len(ms):>7}{p50:>10.0f}{p95:>10.0f}{p99:>10.0f}{ms.max():>10.0f}")
+
+
+def prepare(source, workdir, shards):
+    # never touches the real workbook
+    db_path = os.path.join(workdir, "database.xlsx")
+    shutil.copyfile(source, db_path)
+
+    if shards:
+        from utils.sharding import create_shards
+        create_shards(shards, db_path)
+
+    return db_path
+
+
+def main(args):
+    os.environ.setdefault("SMTP_HOST", "127.0.0.1")
+    os.environ.setdefault("SMTP_PORT", "9")
+    os.environ.setdefault("SMTP_STARTTLS", "0")
+    os.environ.setdefault("SMTP_TIMEOUT", "2")
+
+    workdir = tempfile.mkdtemp(prefix="stress-")
+    db_path = prepare(args.db, workdir, args.shards)
+    print(f"Working copy: {db_path} ({args.users} users x {args.ops} ops, {args.shards or 'no'} shards)")
+
+    from utils.data_access import load_tables
+
+    archive_dir = os.path.join(workdir, "archive")
+    before = log_rows(load_tables(list(ARCHIVE_KEYS), db_path))
+
+    journals, latencies, errors = {}, [], []
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=args.users + 2) as pool:
+        scheduler = pool.submit(run_scheduler, db_path, args.scheduler_runs, os.path.join(workdir, "scheduler_log.txt"))
+        archiver = pool.submit(run_archiver, db_path, args.archive_runs, archive_dir)
+        users = [pool.submit(run_user, i, db_path, args.ops, args.seed) for i in range(args.users)]
+
+        for future in users:
+            email, journal, user_latencies, user_errors = future.result()
+            journals[email] = journal
+            latencies += user_latencies
+            errors += user_errors
+
+        for job in [scheduler, archiver]:
+            job_latencies, job_errors = job.result()
+            latencies += job_latencies
+            errors += job_errors
+
+    elapsed = time.perf_counter() - started
+
+    report(latencies, elapsed)
+
+    problems = (
+        errors + check_workbooks(db_path) + check_rows(db_path, journals)
+        + check_archive(db_path, archive_dir, before)
+    )
+
+    if problems:
+        print(f"\nFAILED: {len(problems)} problems")
+        for p in problems[:50]:
+            print("  " + p)
+    else:
+        print("\nOK: no lost or duplicated rows, all workbooks readable")
+
+    if args.keep:
+        print(f"Kept {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent sessions + scheduler stress test")
+    parser.add_argument("--users", type=int, default=8, help="concurrent sessions")
+    parser.add_argument("--ops", type=int, default=30, help="mutations per session")
+    parser.add_argument("--scheduler-runs", type=int, default=3)
+    parser.add_argument("--archive-runs", type=int, default=2, help="concurrent archive passes")
+    parser.add_argument("--shards", type=int, default=0, help="shard the working copy first")
+    parser.add_argument("--seed", type=int, default=int(datetime.now().timestamp()))
+    parser.add_argument("--db", default=str(DB), help="workbook to copy as the starting state")
+    parser.add_argument("--keep", action="store_true", help="keep the working copy for inspection")
+
+    sys.exit(main(parser.parse_args()))
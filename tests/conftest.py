@@ -0,0 +1,15 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def workbook(tmp_path, monkeypatch):
+    # pages and utils use the relative data/database.xlsx: run them against a copy
+    (tmp_path / "data").mkdir()
+    shutil.copy(ROOT / "data" / "database.xlsx", tmp_path / "data" / "database.xlsx")
+    monkeypatch.chdir(tmp_path)
+    return "data/database.xlsx"
@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.academic_calendar import AcademicCalendar
+from utils.attendance_bits import AttendanceMasks
+
+TODAY = date(2026, 10, 16)
+
+
+def _attendance():
+    # weekday classes, a Saturday make-up class and a holiday record
+    rng = np.random.default_rng(7)
+    days = [TODAY - timedelta(days=i) for i in range(40)]
+    periods = ["Period 1", "Period 2", "Period 3", "Period 4", "Period 5"]
+
+    rows = pd.DataFrame({
+        "email": rng.choice(["a@x.com", "b@x.com", "c@x.com"], 300),
+        "date": [str(d) for d in rng.choice(days, 300)],
+        "period": rng.choice(periods, 300),
+    })
+    extra = pd.DataFrame({
+        "email": ["a@x.com", "a@x.com", "b@x.com"],
+        "date": ["2026-10-10", "2026-10-10", "2026-10-05"],
+        "period": ["Period 1", "Period 2", "Period 3"],
+    })
+    return pd.concat([rows, extra], ignore_index=True)
+
+
+def test_breakdowns_sum_to_totals():
+    calendar = AcademicCalendar(holidays=[date(2026, 10, 5)])
+    masks = AttendanceMasks(_attendance(), calendar, TODAY)
+
+    totals = masks.totals().set_index("email")[["attended", "total"]]
+
+    for breakdown in [masks.per_period(), masks.by_weekday()]:
+        sums = breakdown.groupby("email")[["attended", "held"]].sum()
+        assert (sums["attended"] == totals["attended"]).all()
+        assert (sums["held"] == totals["total"]).all()
+        assert (breakdown["attended"] <= breakdown["held"]).all()
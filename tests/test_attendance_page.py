@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from utils.attendance_sim import absence_plan
+from utils.data_access import append_rows
+
+AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+
+PAGE = str(__import__("pathlib").Path(__file__).parent.parent / "pages" / "4_attendance.py")
+EMAIL = "page.test@example.com"
+
+
+def _render(workbook, rows):
+    append_rows("Attendance", rows, workbook)
+
+    at = AppTest.from_file(PAGE, default_timeout=30)
+    at.session_state.logged_in = True
+    at.session_state.email = EMAIL
+    return at.run()
+
+
+def test_renders_with_attendance_data(workbook):
+    start = date.today() - timedelta(days=21)
+    rows = [
+        {"email": EMAIL, "date": str(start + timedelta(days=i)), "period": "Period 1"}
+        for i in range(0, 21, 2)
+    ]
+
+    at = _render(workbook, rows)
+
+    assert not at.exception
+    assert [s.value for s in at.subheader][-1] == "🔮 What-if Simulator"
+    assert len(at.dataframe) >= 2
+
+
+def test_skip_share_matches_slider():
+    periods = np.full(20, 5)
+
+    for share in [0.05, 0.25, 0.5]:
+        plan = absence_plan(periods, skip_fraction=share)
+        assert plan.sum() == periods.sum() * (1 - share)
+        assert (plan <= periods).all() and (plan >= 0).all()
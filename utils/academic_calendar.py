@@ -0,0 +1,208 @@
+from datetime import date, time
+
+import numpy as np
+import pandas as pd
+
+from utils.data_access import DB, data_version, load_tables
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# used when the workbook has no Timetable sheet yet
+DEFAULT_PERIODS = [
+    ("Period 1", time(10, 0), time(11, 0)),
+    ("Period 2", time(11, 0), time(12, 0)),
+    ("Period 3", time(12, 0), time(13, 0)),
+    ("Period 4", time(13, 0), time(14, 0)),
+    ("Period 5", time(14, 0), time(15, 0)),
+]
+DEFAULT_WORKDAYS = WEEKDAYS[:5]
+
+
+def _parse_time(value):
+    return pd.to_datetime(str(value).strip(), format="mixed").time()
+
+
+def _weekday_index(value):
+    value = str(value).strip()[:3].title()
+    return WEEKDAYS.index(value) if value in WEEKDAYS else int(value)
+
+
+class AcademicCalendar:
+
+    def __init__(self, timetable=None, holidays=()):
+        # timetable: weekday index -> [(period, start, end), ...]
+        if timetable is None:
+            timetable = {
+                WEEKDAYS.index(d): list(DEFAULT_PERIODS) for d in DEFAULT_WORKDAYS
+            }
+
+        self.timetable = {
+            wd: sorted(periods, key=lambda p: p[1])
+            for wd, periods in timetable.items() if periods
+        }
+        self.holidays = np.array(sorted(set(holidays)), dtype="datetime64[D]")
+
+        self.periods_per_weekday = np.array(
+            [len(self.timetable.get(wd, [])) for wd in range(7)], dtype=np.int64
+        )
+        self.weekmask = [bool(n) for n in self.periods_per_weekday]
+
+    # ---------------- SINGLE DAY ----------------
+    def is_working_day(self, day):
+        if not any(self.weekmask):
+            return False
+        return bool(np.is_busday(
+            np.datetime64(day, "D"), weekmask=self.weekmask, holidays=self.holidays
+        ))
+
+    def periods_on(self, day):
+        if not self.is_working_day(day):
+            return []
+        return self.timetable.get(day.weekday(), [])
+
+    def period_count(self, day):
+        return len(self.periods_on(day))
+
+    # ---------------- VECTORIZED RANGES ----------------
+    def working_days(self, starts, end):
+        # inclusive [start, end] business days for every start at once
+        starts = np.asarray(starts, dtype="datetime64[D]")
+        stop = np.datetime64(end, "D") + 1
+
+        if not any(self.weekmask):
+            return np.zeros(starts.shape, dtype=np.int64)
+
+        return np.busday_count(
+            np.minimum(starts, stop), stop,
+            weekmask=self.weekmask, holidays=self.holidays
+        )
+
+    def working_mask(self, days):
+        # True where a day is a scheduled class day
+        days = np.asarray(days, dtype="datetime64[D]")
+
+        if not any(self.weekmask):
+            return np.zeros(days.shape, dtype=bool)
+
+        return np.is_busday(days, weekmask=self.weekmask, holidays=self.holidays)
+
+    def first_working_days(self, starts):
+        # each start rolled forward to the next class day (unchanged if it is one)
+        starts = np.asarray(starts, dtype="datetime64[D]")
+
+        if not any(self.weekmask):
+            return starts
+
+        return np.busday_offset(
+            starts, 0, roll="forward", weekmask=self.weekmask, holidays=self.holidays
+        )
+
+    def total_classes(self, starts, end):
+        # periods vary by weekday, so count each weekday separately and weight it
+        starts = np.asarray(starts, dtype="datetime64[D]")
+        stop = np.datetime64(end, "D") + 1
+        starts = np.minimum(starts, stop)
+
+        totals = np.zeros(starts.shape, dtype=np.int64)
+
+        for wd in range(7):
+            periods = self.periods_per_weekday[wd]
+
+            if not periods:
+                continue
+
+            only_wd = [i == wd for i in range(7)]
+
+            totals += periods * np.busday_count(
+                starts, stop, weekmask=only_wd, holidays=self.holidays
+            )
+
+        return totals
+
+
+# ================= LOADING =================
+def calendar_from_frames(timetable_df, holidays_df):
+    timetable = None
+
+    if timetable_df is not None and not timetable_df.empty:
+        timetable = {}
+
+        for _, row in timetable_df.dropna(subset=["weekday", "period"]).iterrows():
+            wd = _weekday_index(row["weekday"])
+            timetable.setdefault(wd, []).append((
+                str(row["period"]).strip(),
+                _parse_time(row["start"]),
+                _parse_time(row["end"]),
+            ))
+
+    holidays = []
+
+    if holidays_df is not None and not holidays_df.empty:
+        parsed = pd.to_datetime(holidays_df["date"], errors="coerce", format="mixed")
+        holidays = parsed.dropna().dt.date.tolist()
+
+    return AcademicCalendar(timetable, holidays)
+
+
+_calendar_cache = {}
+
+def load_calendar(db_path=DB):
+    # rebuilt only when the stored data changes
+    version = data_version(db_path)
+    cached = _calendar_cache.get(db_path)
+
+    if cached and cached[0] == version:
+        return cached[1]
+
+    data = load_tables(["Timetable", "Holidays"], db_path)
+    calendar = calendar_from_frames(data["Timetable"], data["Holidays"])
+
+    _calendar_cache[db_path] = (version, calendar)
+    return calendar
+
+
+def default_timetable_frame():
+    return pd.DataFrame([
+        {"weekday": d, "period": p, "start": s.strftime("%H:%M"), "end": e.strftime("%H:%M")}
+        for d in DEFAULT_WORKDAYS
+        for p, s, e in DEFAULT_PERIODS
+    ])
+
+
+# ================= ATTENDANCE TOTALS =================
+def attendance_totals(attendance, calendar, today=None):
+    # attended / held classes for every email in the frame, in one pass
+    today = today or date.today()
+
+    columns = ["email", "attended", "total", "percent"]
+
+    if attendance.empty:
+        return pd.DataFrame(columns=columns)
+
+    att = attendance.dropna(subset=["date"]).copy()
+    att["date"] = pd.to_datetime(att["date"], errors="coerce", format="mixed")
+    att = att.dropna(subset=["date"]).drop_duplicates(subset=["email", "date", "period"])
+
+    # a record on a weekend / holiday is an extra class that was held
+    att["off_day"] = ~calendar.working_mask(att["date"].to_numpy().astype("datetime64[D]"))
+
+    grouped = att.groupby("email").agg(
+        first=("date", "min"), attended=("date", "size"), off_days=("off_day", "sum")
+    )
+
+    # a first record on a non-class day starts the count at the next class day
+    starts = calendar.first_working_days(grouped["first"].to_numpy().astype("datetime64[D]"))
+    total = calendar.total_classes(starts, today) + grouped["off_days"].to_numpy()
+    attended = grouped["attended"].to_numpy()
+
+    percent = np.divide(
+        attended * 100.0, total,
+        out=np.zeros(len(total), dtype=float), where=total > 0
+    )
+
+    return pd.DataFrame({
+        "email": grouped.index,
+        "attended": attended,
+        "total": total,
+        "percent": percent,
+    }).reset_index(drop=True)
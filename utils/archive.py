@@ -0,0 +1,283 @@
+import argparse
+import json
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from utils.data_access import DB, get_client, load_tables, load_user_rows, load_user_tables, table_paths
+from utils.excel_utils import file_lock, load_sheets, normalize_dates, safe_write
+
+BASE = Path(__file__).parent.parent
+ARCHIVE_DIR = BASE / "data" / "archive"
+
+ARCHIVED_TABLES = ["HabitLog", "StudyLog", "Attendance"]
+
+# pages look at today / this week / this month, so the hot window
+# must always cover at least two full months
+DEFAULT_HORIZON_DAYS = 120
+MIN_HORIZON_DAYS = 62
+
+
+# ================= MANIFEST =================
+def _manifest_path(archive_dir):
+    return Path(archive_dir) / "manifest.json"
+
+
+def load_manifest(archive_dir=ARCHIVE_DIR):
+    try:
+        with open(_manifest_path(archive_dir)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, archive_dir=ARCHIVE_DIR):
+    path = _manifest_path(archive_dir)
+    tmp = path.with_suffix(".tmp")
+
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    tmp.replace(path)
+
+
+def cold_cutoff(table, archive_dir=ARCHIVE_DIR):
+    # rows dated before this live only in cold partitions
+    return load_manifest(archive_dir).get(table, {}).get("cutoff")
+
+
+# ================= PARTITIONS =================
+def _partition_path(table, month, archive_dir):
+    return Path(archive_dir) / table / f"{month}.csv.gz"
+
+
+def read_partition(table, month, archive_dir=ARCHIVE_DIR):
+    path = _partition_path(table, month, archive_dir)
+
+    if not path.exists():
+        return pd.DataFrame()
+
+    return pd.read_csv(path, dtype=str, compression="gzip")
+
+
+def write_partition(table, month, df, archive_dir=ARCHIVE_DIR):
+    path = _partition_path(table, month, archive_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = path.with_name(path.name + ".tmp")
+    df.to_csv(tmp, index=False, compression="gzip")
+    tmp.replace(path)
+
+
+def _months_between(start, end):
+    months = pd.period_range(pd.Period(start, "M"), pd.Period(end, "M"), freq="M")
+    return [str(m) for m in months]
+
+
+# ================= ARCHIVING =================
+def _refuse_service():
+    # the data service holds the workbook in memory and writes all of it back
+    # on its next mutation, which would put archived rows back in the hot sheet
+    if get_client():
+        raise ValueError("DATA_SERVICE_URL is set; stop the data service before archiving")
+
+
+def archive_old_rows(horizon_days=DEFAULT_HORIZON_DAYS, db_path=DB,
+                     archive_dir=ARCHIVE_DIR, today=None):
+    _refuse_service()
+
+    horizon_days = max(int(horizon_days), MIN_HORIZON_DAYS)
+    today = today or date.today()
+    cutoff = (today - timedelta(days=horizon_days)).strftime("%Y-%m-%d")
+
+    manifest = load_manifest(archive_dir)
+    moved = {table: 0 for table in ARCHIVED_TABLES}
+
+    # one pass per workbook, so a sharded store is archived shard by shard
+    by_path = {}
+    for table in ARCHIVED_TABLES:
+        for path in table_paths(table, db_path):
+            by_path.setdefault(path, []).append(table)
+
+    for path, tables in by_path.items():
+        # read, archive and rewrite under the workbook lock: a row appended
+        # meanwhile would otherwise be dropped by the rewrite of the hot sheet
+        with file_lock(path):
+            raw = load_sheets(path, tables)
+
+            for table in tables:
+                moved[table] += _archive_sheet(table, raw[table], cutoff, manifest, path, archive_dir)
+
+    return moved
+
+
+def _archive_sheet(table, df, cutoff, manifest, path, archive_dir):
+    if df.empty:
+        return 0
+
+    date_col = next(c for c in df.columns if str(c).strip().lower() == "date")
+    days = normalize_dates(df[date_col])
+    old = days < cutoff
+
+    if not old.any():
+        return 0
+
+    cold = df[old].assign(**{date_col: days[old]})
+    cold.columns = cold.columns.astype(str).str.strip().str.lower()
+
+    # cold first, then shrink the hot table: a crash in between only
+    # leaves duplicates, which readers drop, never lost rows
+    summary = manifest.setdefault(table, {}).setdefault("summary", {})
+
+    added = []
+
+    for month, part in cold.groupby(cold["date"].str[:7]):
+        existing = read_partition(table, month, archive_dir)
+        merged = pd.concat([existing, part], ignore_index=True).drop_duplicates()
+        write_partition(table, month, merged, archive_dir)
+
+        # partitions are stored deduplicated, so whatever follows them is new;
+        # rows left hot by a crashed run are not counted a second time
+        added.append(merged.iloc[len(existing):])
+
+        months = manifest[table].setdefault("partitions", [])
+        if month not in months:
+            months.append(month)
+            months.sort()
+
+    added = pd.concat(added, ignore_index=True)
+
+    for email, group in added.groupby(added["email"].astype(str).str.strip().str.lower()):
+        entry = summary.get(email, {"rows": 0, "first_date": group["date"].min()})
+        entry["rows"] += len(group)
+        entry["first_date"] = min(entry["first_date"], group["date"].min())
+        summary[email] = entry
+
+    manifest[table]["cutoff"] = max(cutoff, manifest[table].get("cutoff", cutoff))
+    save_manifest(manifest, archive_dir)
+
+    # caller holds file_lock(path); readers notice the new file version
+    safe_write(path, {table: df[~old].reset_index(drop=True)})
+    return int(old.sum())
+
+
+# ================= RANGE READS =================
+def read_cold(table, start=None, end=None, emails=None, archive_dir=ARCHIVE_DIR):
+    info = load_manifest(archive_dir).get(table, {})
+    months = info.get("partitions", [])
+
+    if not months:
+        return pd.DataFrame()
+
+    if start is not None or end is not None:
+        wanted = set(_months_between(start or months[0] + "-01", end or date.today()))
+        months = [m for m in months if m in wanted]
+
+    parts = [read_partition(table, m, archive_dir) for m in months]
+    parts = [p for p in parts if not p.empty]
+
+    if not parts:
+        return pd.DataFrame()
+
+    df = pd.concat(parts, ignore_index=True).drop_duplicates()
+    df["email"] = df["email"].astype(str).str.strip().str.lower()
+
+    if emails is not None:
+        df = df[df["email"].isin({str(e).strip().lower() for e in emails})]
+    if start is not None:
+        df = df[df["date"] >= str(start)]
+    if end is not None:
+        df = df[df["date"] <= str(end)]
+
+    return df
+
+
+def iter_cold(table, emails=None, archive_dir=ARCHIVE_DIR):
+    # cold rows one monthly partition at a time, optionally only these emails
+    if emails is not None:
+        emails = {str(e).strip().lower() for e in emails}
+
+    for month in load_manifest(archive_dir).get(table, {}).get("partitions", []):
+        part = read_partition(table, month, archive_dir)
+
+        if part.empty:
+            continue
+
+        part["email"] = part["email"].astype(str).str.strip().str.lower()
+
+        if emails is not None:
+            part = part[part["email"].isin(emails)]
+
+        if not part.empty:
+            yield part.drop_duplicates()
+
+
+def _needs_cold(table, start, archive_dir):
+    cutoff = cold_cutoff(table, archive_dir)
+    return cutoff is not None and (start is None or str(start) < cutoff)
+
+
+def add_cold_rows(email, frames, start=None, end=None, archive_dir=ARCHIVE_DIR):
+    # extend already-loaded hot frames with cold rows, only where the range needs them
+    frames = dict(frames)
+
+    for table, hot in frames.items():
+        if table in ARCHIVED_TABLES and _needs_cold(table, start, archive_dir):
+            cold = read_cold(table, start, end, [email], archive_dir)
+            frames[table] = pd.concat([cold, hot], ignore_index=True).drop_duplicates()
+
+    return frames
+
+
+def user_range(email, table, start=None, end=None, db_path=DB, archive_dir=ARCHIVE_DIR):
+    # the hot read already stops at the range, cold rows are filtered by read_cold
+    hot = {table: load_user_rows(email, table, start, end, db_path=db_path)}
+    df = add_cold_rows(email, hot, start, end, archive_dir)[table]
+
+    return df.reset_index(drop=True)
+
+
+def user_history(email, tables, db_path=DB, archive_dir=ARCHIVE_DIR):
+    # full history: one hot read plus the cold partitions that exist
+    return add_cold_rows(email, load_user_tables(email, tables, db_path), archive_dir=archive_dir)
+
+
+def tables_with_history(tables, db_path=DB, archive_dir=ARCHIVE_DIR):
+    # full history of every user, for batch jobs
+    hot = load_tables(tables, db_path)
+
+    for table in tables:
+        if table in ARCHIVED_TABLES and _needs_cold(table, None, archive_dir):
+            cold = read_cold(table, archive_dir=archive_dir)
+            hot[table] = pd.concat([cold, hot[table]], ignore_index=True).drop_duplicates()
+
+    return hot
+
+
+def cold_summary(email, table, archive_dir=ARCHIVE_DIR):
+    # (rows archived, first archived date) without opening any partition
+    info = load_manifest(archive_dir).get(table, {})
+    entry = info.get("summary", {}).get(str(email).strip().lower())
+
+    if not entry:
+        return 0, None
+
+    return entry["rows"], entry["first_date"]
+
+
+# ================= CLI =================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old log rows into compressed monthly partitions")
+    parser.add_argument("--horizon-days", type=int, default=DEFAULT_HORIZON_DAYS)
+    parser.add_argument("--db", default=DB)
+    parser.add_argument("--archive-dir", default=str(ARCHIVE_DIR))
+    args = parser.parse_args()
+
+    try:
+        moved = archive_old_rows(args.horizon_days, args.db, args.archive_dir)
+    except ValueError as e:
+        parser.exit(1, f"{e}\n")
+
+    for table, count in moved.items():
+        print(f"{table}: {count} rows archived")
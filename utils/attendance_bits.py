@@ -0,0 +1,206 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from utils.academic_calendar import WEEKDAYS, load_calendar
+from utils.data_access import DB, data_version, load_tables
+
+MAX_PERIODS = 64
+
+
+def popcount(a):
+    # set bits per element of a uint64 array
+    a = np.asarray(a, dtype=np.uint64)
+
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(a).astype(np.int64)
+
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+    return table[a.view(np.uint8)].reshape(a.shape + (8,)).sum(axis=-1)
+
+
+def period_names(calendar, extra=()):
+    # bit order: timetable periods by start time, then any unknown names
+    names = []
+
+    for periods in calendar.timetable.values():
+        for name, start, _ in periods:
+            if name not in names:
+                names.append(name)
+
+    starts = {
+        name: start
+        for periods in calendar.timetable.values()
+        for name, start, _ in periods
+    }
+    names.sort(key=lambda n: starts[n])
+
+    for name in extra:
+        if name not in names:
+            names.append(name)
+
+    if len(names) > MAX_PERIODS:
+        raise ValueError(f"at most {MAX_PERIODS} distinct periods fit in one mask")
+
+    return names
+
+
+class AttendanceMasks:
+    # users x days uint64 matrix: bit p of [u, d] = user u attended period p on day d
+
+    def __init__(self, attendance, calendar, today=None):
+        self.calendar = calendar
+        self.today = np.datetime64(today or date.today(), "D")
+
+        att = attendance[["email", "date", "period"]].dropna()
+        att = att.assign(
+            day=pd.to_datetime(att["date"].astype(str), errors="coerce", format="mixed"),
+            period=att["period"].astype(str).str.strip(),
+        ).dropna(subset=["day"])
+
+        self.periods = period_names(calendar, sorted(att["period"].unique()))
+        self.bit = {name: i for i, name in enumerate(self.periods)}
+
+        self.emails, user_idx = np.unique(att["email"].astype(str).to_numpy(), return_inverse=True)
+        days = att["day"].to_numpy().astype("datetime64[D]")
+
+        if len(days):
+            self.first_day = days.min()
+            self.last_day = max(days.max(), self.today)
+        else:
+            self.first_day = self.last_day = self.today
+
+        n_days = int((self.last_day - self.first_day).astype(np.int64)) + 1
+        day_idx = (days - self.first_day).astype(np.int64)
+        bits = np.left_shift(
+            np.uint64(1), att["period"].map(self.bit).to_numpy().astype(np.uint64)
+        )
+
+        self.masks = np.zeros((len(self.emails), n_days), dtype=np.uint64)
+        # OR-accumulate, so duplicate rows collapse into one bit
+        np.bitwise_or.at(self.masks, (user_idx, day_idx), bits)
+
+        self.dates = self.first_day + np.arange(n_days)
+        self.weekday = ((self.dates.astype(np.int64) - 4) % 7).astype(np.int64)  # 1970-01-01 was a Thursday
+
+        self.held_masks = self._held_masks()
+        self.user_first = self._user_first_days()
+
+    # ---------------- CALENDAR SIDE ----------------
+    def _held_masks(self):
+        # bits of the periods that ran on each day (0 on weekends / holidays)
+        per_weekday = np.zeros(7, dtype=np.uint64)
+
+        for wd, periods in self.calendar.timetable.items():
+            for name, _, _ in periods:
+                per_weekday[wd] |= np.uint64(1) << np.uint64(self.bit[name])
+
+        held = per_weekday[self.weekday]
+
+        if len(self.calendar.holidays):
+            held[np.isin(self.dates, self.calendar.holidays)] = 0
+
+        return held
+
+    def _user_first_days(self):
+        # index of each user's first attended day (start of their held window)
+        any_day = self.masks != 0
+        return np.where(any_day.any(axis=1), any_day.argmax(axis=1), 0)
+
+    def _window(self):
+        # users x days: True from the user's first day up to today
+        today_idx = int((self.today - self.first_day).astype(np.int64))
+        columns = np.arange(len(self.dates))
+        return (columns >= self.user_first[:, None]) & (columns <= today_idx)
+
+    def _user_held(self):
+        # users x days: periods held, plus any attended on a weekend / holiday
+        off_day = np.where(self.held_masks[None, :] == 0, self.masks, np.uint64(0))
+        return self.held_masks[None, :] | off_day
+
+    # ---------------- REPORTS ----------------
+    def totals(self):
+        # same shape as academic_calendar.attendance_totals, for every user at once
+        window = self._window()
+        attended = (popcount(self.masks) * window).sum(axis=1)
+        total = (popcount(self._user_held()) * window).sum(axis=1)
+
+        percent = np.divide(
+            attended * 100.0, total,
+            out=np.zeros(len(total), dtype=float), where=total > 0
+        )
+
+        return pd.DataFrame({
+            "email": self.emails,
+            "attended": attended,
+            "total": total,
+            "percent": percent,
+        })
+
+    def per_period(self):
+        # attended / held count per (user, period)
+        window = self._window()
+        user_held = self._user_held()
+        rows = []
+
+        for name, b in self.bit.items():
+            flag = np.uint64(1) << np.uint64(b)
+            attended = (((self.masks & flag) != 0) & window).sum(axis=1)
+            held = (((user_held & flag) != 0) & window).sum(axis=1)
+            rows.append(pd.DataFrame({
+                "email": self.emails, "period": name, "attended": attended, "held": held
+            }))
+
+        return pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(
+            columns=["email", "period", "attended", "held"]
+        )
+
+    def by_weekday(self):
+        # attended / held classes per (user, weekday)
+        window = self._window()
+        attended_days = popcount(self.masks) * window
+        held_days = popcount(self._user_held()) * window
+
+        rows = []
+        for wd in range(7):
+            cols = self.weekday == wd
+            rows.append(pd.DataFrame({
+                "email": self.emails,
+                "weekday": WEEKDAYS[wd],
+                "attended": attended_days[:, cols].sum(axis=1),
+                "held": held_days[:, cols].sum(axis=1),
+            }))
+
+        return pd.concat(rows, ignore_index=True)
+
+    def user_mask(self, email, day):
+        # attended periods of one user on one day, as names
+        u = np.searchsorted(self.emails, email)
+        d = int((np.datetime64(day, "D") - self.first_day).astype(np.int64))
+
+        if u >= len(self.emails) or self.emails[u] != email or not 0 <= d < len(self.dates):
+            return []
+
+        mask = int(self.masks[u, d])
+        return [name for name, b in self.bit.items() if mask >> b & 1]
+
+
+# ================= LOADING =================
+_masks_cache = {}
+
+def load_masks(db_path=DB, today=None):
+    # every user's masks, rebuilt only when the stored data (or the day) changes
+    today = today or date.today()
+    key = (data_version(db_path), today)
+    cached = _masks_cache.get(db_path)
+
+    if cached and cached[0] == key:
+        return cached[1]
+
+    masks = AttendanceMasks(
+        load_tables(["Attendance"], db_path)["Attendance"], load_calendar(db_path), today
+    )
+
+    _masks_cache[db_path] = (key, masks)
+    return masks
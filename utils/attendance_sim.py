@@ -0,0 +1,139 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_THRESHOLDS = (0.65, 0.75, 0.85)
+
+
+# ================= UPCOMING CALENDAR =================
+def upcoming_days(calendar, start=None, n_days=30):
+    # the next n_days calendar days with the number of classes held on each
+    start = start or date.today() + timedelta(days=1)
+    days = np.arange(
+        np.datetime64(start, "D"), np.datetime64(start, "D") + n_days
+    )
+
+    if any(calendar.weekmask):
+        working = np.is_busday(days, weekmask=calendar.weekmask, holidays=calendar.holidays)
+    else:
+        working = np.zeros(len(days), dtype=bool)
+
+    # numpy weekday: 1970-01-01 was a Thursday
+    weekday = (days.astype(np.int64) + 3) % 7
+    periods = np.where(working, calendar.periods_per_weekday[weekday], 0)
+
+    return days, periods
+
+
+# ================= CLOSED FORMS (MANY THRESHOLDS) =================
+def classes_needed(attended, held, thresholds=DEFAULT_THRESHOLDS):
+    # consecutive classes to attend to reach each threshold, shape (users, thresholds)
+    a = np.asarray(attended, dtype=float)[:, None]
+    t = np.asarray(held, dtype=float)[:, None]
+    r = np.asarray(thresholds, dtype=float)[None, :]
+
+    need = np.ceil((r * t - a) / (1 - r))
+    return np.maximum(need, 0).astype(np.int64)
+
+
+def safe_bunks(attended, held, thresholds=DEFAULT_THRESHOLDS):
+    # classes that can be missed and still stay at each threshold (negative = shortage)
+    a = np.asarray(attended, dtype=float)[:, None]
+    t = np.asarray(held, dtype=float)[:, None]
+    r = np.asarray(thresholds, dtype=float)[None, :]
+
+    return np.floor(a / r - t).astype(np.int64)
+
+
+# ================= SCENARIO CURVES =================
+def absence_plan(periods, skip_days=(), skip_fraction=0.0, days=None):
+    # periods attended per upcoming day for one scenario
+    attend = np.asarray(periods, dtype=float) * (1.0 - skip_fraction)
+
+    if days is not None and len(skip_days):
+        skip = np.isin(days, np.asarray(skip_days, dtype="datetime64[D]"))
+        attend = np.where(skip, 0, attend)
+
+    # round the running total, not each day, so the skipped share over the
+    # horizon matches skip_fraction (the epsilon absorbs float drift)
+    running = np.floor(np.cumsum(attend) + 1e-9)
+    return np.diff(running, prepend=0)
+
+
+def project_curves(attended, held, periods, plans):
+    # attendance % after each upcoming day, shape (users, scenarios, days)
+    #   attended, held: (users,)   periods: (days,)   plans: (scenarios, days)
+    a = np.asarray(attended, dtype=float)[:, None, None]
+    t = np.asarray(held, dtype=float)[:, None, None]
+
+    plans = np.minimum(np.atleast_2d(plans), periods)
+
+    a_curve = a + np.cumsum(plans, axis=1)[None, :, :]
+    t_curve = t + np.cumsum(periods)[None, None, :]
+
+    return np.divide(
+        a_curve * 100.0, t_curve,
+        out=np.zeros(np.broadcast_shapes(a_curve.shape, t_curve.shape)),
+        where=t_curve > 0
+    )
+
+
+def first_day_reaching(curves, thresholds):
+    # index of the first day each curve reaches its threshold (-1 = never)
+    target = np.asarray(thresholds, dtype=float) * 100
+    reached = curves >= target.reshape((1, -1) + (1,) * (curves.ndim - 2))
+    first = reached.argmax(axis=-1)
+    return np.where(reached.any(axis=-1), first, -1)
+
+
+# ================= CLASS-WIDE RISK =================
+def flag_at_risk(totals, calendar, threshold=0.75, horizon_days=30):
+    # totals: attendance_totals() frame for any number of students
+    if totals.empty:
+        return totals.assign(projected=[], status=[])
+
+    days, periods = upcoming_days(calendar, n_days=horizon_days)
+
+    attended = totals["attended"].to_numpy()
+    held = totals["total"].to_numpy()
+
+    # best case: every remaining class attended
+    best = project_curves(attended, held, periods, periods[None, :])[:, 0, -1]
+    current = totals["percent"].to_numpy()
+
+    status = np.select(
+        [current >= threshold * 100, best >= threshold * 100],
+        ["safe", "at risk"],
+        "cannot recover"
+    )
+
+    return totals.assign(projected=best, status=status)
+
+
+def per_period_status(user_att, calendar, first_day, today=None, threshold=0.75):
+    # attended vs held per period name, since the student's first recorded day
+    today = today or date.today()
+    start = np.datetime64(first_day, "D")
+    stop = np.datetime64(today, "D") + 1
+
+    held = {}
+
+    for wd, periods in calendar.timetable.items():
+        only_wd = [i == wd for i in range(7)]
+        count = int(np.busday_count(start, stop, weekmask=only_wd, holidays=calendar.holidays))
+
+        for name, _, _ in periods:
+            held[name] = held.get(name, 0) + count
+
+    attended = user_att["period"].astype(str).str.strip().value_counts()
+
+    df = pd.DataFrame({"held": pd.Series(held)})
+    df["attended"] = attended.reindex(df.index).fillna(0).astype(int)
+    df["percent"] = np.divide(
+        df["attended"] * 100.0, df["held"],
+        out=np.zeros(len(df)), where=df["held"] > 0
+    )
+    df["below_target"] = df["percent"] < threshold * 100
+
+    return df
@@ -0,0 +1,185 @@
+from pathlib import Path
+
+import pandas as pd
+
+from utils.data_access import append_rows, load_tables
+from utils.excel_utils import normalize_dates
+
+CHUNK_ROWS = 5000
+
+# ================= WHAT CAN BE IMPORTED =================
+IMPORT_TABLES = {
+    "Attendance": {
+        "columns": ["email", "date", "period"],
+        "key": ["email", "date", "period"],
+    },
+    "StudyLog": {
+        "columns": ["email", "subject", "minutes", "date"],
+        "key": ["email", "subject", "date"],
+    },
+}
+
+
+# ================= CHUNKED READERS =================
+def _file_kind(name):
+    suffix = Path(str(name)).suffix.lower()
+
+    if suffix in (".xlsx", ".xlsm"):
+        return "xlsx"
+    if suffix == ".parquet":
+        return "parquet"
+    return "csv"
+
+
+def _xlsx_chunks(source, chunk_rows):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(source, read_only=True, data_only=True)
+
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+
+        if header is None:
+            return
+
+        header = [str(h) for h in header]
+        buffer = []
+
+        for row in rows:
+            buffer.append(row)
+
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame(buffer, columns=header)
+                buffer = []
+
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header)
+
+    finally:
+        wb.close()
+
+
+def _parquet_chunks(source, chunk_rows):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet import needs pyarrow (pip install pyarrow)")
+
+    for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows):
+        yield batch.to_pandas()
+
+
+def read_chunks(source, name=None, chunk_rows=CHUNK_ROWS):
+    kind = _file_kind(name or getattr(source, "name", source))
+
+    if kind == "xlsx":
+        yield from _xlsx_chunks(source, chunk_rows)
+    elif kind == "parquet":
+        yield from _parquet_chunks(source, chunk_rows)
+    else:
+        yield from pd.read_csv(source, dtype=str, chunksize=chunk_rows)
+
+
+# ================= VALIDATION =================
+def _normalize_period(values):
+    values = values.astype(str).str.strip()
+    numeric = values.str.fullmatch(r"\d+")
+    return values.where(~numeric, "Period " + values)
+
+
+def validate_chunk(df, table):
+    spec = IMPORT_TABLES[table]
+
+    df = df.copy()
+    df.columns = df.columns.astype(str).str.strip().str.lower()
+
+    missing = [c for c in spec["columns"] if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns for {table}: {', '.join(missing)}")
+
+    df = df[spec["columns"]]
+
+    df["email"] = df["email"].astype(str).str.strip().str.lower()
+    df["date"] = pd.to_datetime(
+        df["date"], errors="coerce", format="mixed"
+    ).dt.strftime("%Y-%m-%d")
+
+    valid = df["email"].str.contains("@", regex=False) & df["date"].notna()
+
+    if table == "Attendance":
+        df["period"] = _normalize_period(df["period"])
+        valid &= df["period"].str.len() > 0
+
+    if table == "StudyLog":
+        df["subject"] = df["subject"].astype(str).str.strip()
+        df["minutes"] = pd.to_numeric(df["minutes"], errors="coerce")
+        valid &= df["minutes"].between(1, 600) & (df["subject"].str.len() > 0)
+        df["minutes"] = df["minutes"].fillna(0).astype(int).astype(str)
+
+    return df[valid], int((~valid).sum())
+
+
+def key_index(df, key):
+    # comparable (email, date, ...) keys as a MultiIndex for vectorized isin
+    keys = df[key].astype(str).apply(lambda s: s.str.strip())
+
+    if "date" in key:
+        keys["date"] = normalize_dates(keys["date"])
+    if "email" in key:
+        keys["email"] = keys["email"].str.lower()
+    if "period" in key:
+        keys["period"] = _normalize_period(keys["period"])
+
+    return pd.MultiIndex.from_frame(keys)
+
+
+# ================= IMPORT =================
+def import_file(source, table, name=None, progress=None, chunk_rows=CHUNK_ROWS):
+    if table not in IMPORT_TABLES:
+        raise ValueError(f"Bulk import is not supported for {table}")
+
+    key = IMPORT_TABLES[table]["key"]
+
+    existing = load_tables([table])[table]
+    seen = key_index(existing, key) if not existing.empty else None
+
+    summary = {"read": 0, "invalid": 0, "duplicates": 0, "imported": 0}
+    accepted = []
+
+    for chunk in read_chunks(source, name, chunk_rows):
+        summary["read"] += len(chunk)
+
+        valid, invalid = validate_chunk(chunk, table)
+        summary["invalid"] += invalid
+
+        keys = key_index(valid, key)
+
+        # drop rows already stored, and repeats inside the file itself
+        duplicate = keys.duplicated()
+        if seen is not None:
+            duplicate |= keys.isin(seen)
+
+        summary["duplicates"] += int(duplicate.sum())
+
+        fresh = valid[~duplicate]
+        accepted.append(fresh)
+
+        fresh_keys = keys[~duplicate]
+        seen = fresh_keys if seen is None else seen.append(fresh_keys)
+
+        if progress:
+            progress(summary)
+
+    rows = pd.concat(accepted, ignore_index=True) if accepted else pd.DataFrame()
+
+    # single write for the whole file
+    if not rows.empty:
+        append_rows(table, rows.to_dict("records"))
+
+    summary["imported"] = len(rows)
+
+    if progress:
+        progress(summary)
+
+    return summary
@@ -0,0 +1,362 @@
+import os
+
+import pandas as pd
+
+from utils import sharding
+from utils.data_client import DataClient
+from utils.date_index import DateIndex
+from utils.excel_utils import (
+    append_frame_rows,
+    delete_frame_rows,
+    file_lock,
+    load_sheets,
+    normalize_sheet,
+    read_user_sheets,
+    safe_write,
+    update_frame_rows,
+)
+from utils.working_set import WorkingSetCache, budget_from_env
+
+DB = "data/database.xlsx"
+
+# set DATA_SERVICE_URL (e.g. http://127.0.0.1:8765) to run against
+# `python -m utils.data_service` instead of opening the workbook directly
+DATA_SERVICE_URL = os.environ.get("DATA_SERVICE_URL", "").strip()
+
+# user tables move to data/shards/ once `python -m utils.sharding --shards N`
+# has been run; everything below routes by email from then on
+
+# columns every caller can rely on, even for a missing or empty sheet
+SCHEMAS = {
+    "Users": ["email", "name", "monthlygoal", "minattendance"],
+    "Habits": ["email", "habit"],
+    "HabitLog": ["email", "habit", "date"],
+    "Subjects": ["email", "subject"],
+    "StudyLog": ["email", "subject", "minutes", "date"],
+    "Attendance": ["email", "date", "period"],
+    "Tasks": ["email", "id", "task", "priority", "status", "created_date", "last_reminded", "due"],
+    "Timetable": ["weekday", "period", "start", "end"],
+    "Holidays": ["date", "name"],
+    "Outbox": ["id", "email", "subject", "body", "status", "attempts",
+               "next_attempt", "last_error", "created", "sent_at"],
+}
+
+
+# active users' rows stay in memory; see user_cache.stats()
+user_cache = WorkingSetCache(budget_from_env())
+
+
+def with_schema(table, df):
+    for col in SCHEMAS.get(table, []):
+        if col not in df.columns:
+            df[col] = pd.Series(dtype=object)
+    return df
+
+
+_clients = {}
+
+
+def get_client():
+    # one client per process, so versions seen in replies are shared by all checks
+    if not DATA_SERVICE_URL:
+        return None
+    if DATA_SERVICE_URL not in _clients:
+        _clients[DATA_SERVICE_URL] = DataClient(DATA_SERVICE_URL)
+    return _clients[DATA_SERVICE_URL]
+
+
+# ================= SHARD ROUTING =================
+def table_paths(table, db_path):
+    # every workbook holding rows of this table
+    if sharding.is_user_table(table) and sharding.is_sharded(db_path):
+        return sharding.shard_paths(db_path)
+    return [db_path]
+
+
+def _tables_by_path(tables, db_path, email=None):
+    # {workbook: [tables]} so each file is opened once
+    grouped = {}
+
+    for t in tables:
+        paths = [sharding.table_path(t, email, db_path)] if email is not None else table_paths(t, db_path)
+        for path in paths:
+            grouped.setdefault(path, []).append(t)
+
+    return grouped
+
+
+def _where_paths(table, where, db_path):
+    # a filter on email touches one shard, anything else scans them all
+    if "email" in where:
+        return [sharding.table_path(table, where["email"], db_path)]
+    return table_paths(table, db_path)
+
+
+# ================= READS =================
+def _file_version(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return ("missing",)
+
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def data_version(db_path=DB, email=None):
+    # changes whenever stored data changes; cheap enough to check on every rerun.
+    # with an email, writes to other users' shards (or service rows) don't count
+    client = get_client()
+
+    if client:
+        return ("service", *client.version(email))
+
+    if not sharding.is_sharded(db_path):
+        return _file_version(db_path)
+
+    if email is not None:
+        paths = [db_path, sharding.shard_for(email, db_path)]
+    else:
+        paths = [db_path] + sharding.shard_paths(db_path)
+
+    return tuple(_file_version(p) for p in paths)
+
+
+def _read_user_tables(email, tables, db_path):
+    client = get_client()
+
+    if client:
+        frames = client.user_tables(email, tables)
+    else:
+        # streamed: only this user's rows are ever turned into a DataFrame
+        frames = {}
+        for path, names in _tables_by_path(tables, db_path, email).items():
+            frames.update(read_user_sheets(path, names, email))
+
+    return {t: with_schema(t, frames[t]) for t in tables}
+
+
+def load_user_tables(email, tables, db_path=DB):
+    # every table a page needs for one user; storage is only read for
+    # tables not already in this process's working-set cache
+    email = str(email).strip().lower()
+
+    return user_cache.get_tables(
+        (db_path, email), data_version(db_path, email), tables,
+        lambda missing: _read_user_tables(email, missing, db_path),
+    )
+
+
+def cached_for_user(email, name, compute, db_path=DB):
+    # memoize a value derived from one user's rows, dropped with them
+    email = str(email).strip().lower()
+    return user_cache.get_derived((db_path, email), data_version(db_path, email), name, compute)
+
+
+def load_user_table(email, table, db_path=DB):
+    return load_user_tables(email, [table], db_path)[table]
+
+
+def user_date_index(email, table, db_path=DB, column="date", unit="D"):
+    # the user's rows sorted by `column`, built once per data version
+    return cached_for_user(
+        email, ("date_index", table, column, unit),
+        lambda: DateIndex(load_user_table(email, table, db_path), column, unit), db_path
+    )
+
+
+def query_range(email, table, start=None, end=None, db_path=DB, column="date", unit="D"):
+    # rows dated within [start, end] (inclusive, either side open) as a slice
+    # of the cached sorted frame: O(log n + k), nothing is parsed per call
+    return user_date_index(email, table, db_path, column, unit).range(start, end)
+
+
+def load_user_rows(email, table, start=None, end=None, columns=None, db_path=DB):
+    # uncached range read: date range and columns are applied while streaming
+    email = str(email).strip().lower()
+    client = get_client()
+
+    if client:
+        df = client.user_tables(email, [table])[table]
+        if start is not None:
+            df = df[df["date"] >= str(start)]
+        if end is not None:
+            df = df[df["date"] <= str(end)]
+        if columns is not None:
+            df = df[[c for c in df.columns if c in set(columns) | {"email"}]]
+        return df.reset_index(drop=True)
+
+    path = sharding.table_path(table, email, db_path)
+    df = read_user_sheets(path, [table], email, {table: columns}, start, end)[table]
+
+    if columns is not None:
+        return df
+    return with_schema(table, df)
+
+
+def load_tables(tables, db_path=DB):
+    # full tables for batch jobs (scheduler, admin); scans every shard
+    client = get_client()
+
+    if client:
+        frames = client.tables(tables)
+    else:
+        parts = {t: [] for t in tables}
+
+        for path, names in _tables_by_path(tables, db_path).items():
+            for t, df in load_sheets(path, names).items():
+                parts[t].append(normalize_sheet(df))
+
+        frames = {
+            t: dfs[0] if len(dfs) == 1 else pd.concat(dfs, ignore_index=True)
+            for t, dfs in parts.items()
+        }
+
+    return {t: with_schema(t, frames[t]) for t in tables}
+
+
+# ================= WRITES =================
+def _invalidate(db_path, emails=None):
+    # None means the write was not scoped to users: drop everyone on this store
+    if emails is None:
+        user_cache.invalidate_where(lambda key: key[0] == db_path)
+        return
+
+    for email in emails:
+        user_cache.invalidate((db_path, str(email).strip().lower()))
+
+
+def _row_emails(rows):
+    emails = {row.get("email") for row in rows}
+    return None if None in emails else emails
+
+
+def _where_emails(where):
+    return [where["email"]] if "email" in where else None
+
+
+# each local write is a read-modify-write of one workbook under its lock,
+# so writers on different shards never wait for each other
+def _local_sheet(table, db_path):
+    return load_sheets(db_path, [table])[table]
+
+
+def append_rows(table, rows, db_path=DB):
+    client = get_client()
+
+    if client:
+        count = client.append(table, rows)
+        _invalidate(db_path, _row_emails(rows))
+        return count
+
+    if sharding.is_user_table(table) and sharding.is_sharded(db_path):
+        grouped = sharding.group_by_shard(rows, db_path)
+    else:
+        grouped = {db_path: rows}
+
+    for path, shard_rows in grouped.items():
+        with file_lock(path):
+            df = append_frame_rows(_local_sheet(table, path), shard_rows, table)
+            safe_write(path, {table: df})
+
+    _invalidate(db_path, _row_emails(rows))
+    return len(rows)
+
+
+def append_rows_many(rows_by_table, db_path=DB):
+    # e.g. a task and its notification: each workbook is rewritten once,
+    # so the rows of all tables land together or not at all
+    client = get_client()
+    emails = _row_emails([row for rows in rows_by_table.values() for row in rows])
+
+    if client:
+        count = client.append_many(rows_by_table)
+        _invalidate(db_path, emails)
+        return count
+
+    by_path = {}
+    for table, rows in rows_by_table.items():
+        if sharding.is_user_table(table) and sharding.is_sharded(db_path):
+            grouped = sharding.group_by_shard(rows, db_path)
+        else:
+            grouped = {db_path: rows}
+
+        for path, shard_rows in grouped.items():
+            by_path.setdefault(path, {})[table] = shard_rows
+
+    for path, tables in by_path.items():
+        with file_lock(path):
+            current = load_sheets(path, list(tables))
+            safe_write(path, {
+                table: append_frame_rows(current[table], rows, table)
+                for table, rows in tables.items()
+            })
+
+    _invalidate(db_path, emails)
+    return sum(len(rows) for rows in rows_by_table.values())
+
+
+def update_rows(table, where, values, db_path=DB):
+    client = get_client()
+
+    if client:
+        count = client.update(table, where, values)
+        _invalidate(db_path, _where_emails(where))
+        return count
+
+    total = 0
+
+    for path in _where_paths(table, where, db_path):
+        with file_lock(path):
+            df, count = update_frame_rows(_local_sheet(table, path), where, values, table)
+
+            if count:
+                safe_write(path, {table: df})
+
+        total += count
+
+    _invalidate(db_path, _where_emails(where))
+    return total
+
+
+def delete_rows(table, where, db_path=DB):
+    client = get_client()
+
+    if client:
+        count = client.delete(table, where)
+        _invalidate(db_path, _where_emails(where))
+        return count
+
+    total = 0
+
+    for path in _where_paths(table, where, db_path):
+        with file_lock(path):
+            df, count = delete_frame_rows(_local_sheet(table, path), where, table)
+
+            if count:
+                safe_write(path, {table: df})
+
+        total += count
+
+    _invalidate(db_path, _where_emails(where))
+    return total
+
+
+def replace_table(table, df, db_path=DB):
+    client = get_client()
+
+    if client:
+        count = client.replace(table, df)
+        _invalidate(db_path)
+        return count
+
+    if sharding.is_user_table(table) and sharding.is_sharded(db_path):
+        parts = sharding.split_frame(df, sharding.shard_paths(db_path))
+    else:
+        parts = {db_path: df}
+
+    for path, part in parts.items():
+        with file_lock(path):
+            safe_write(path, {table: part})
+
+    _invalidate(db_path)
+    return len(df)
@@ -0,0 +1,94 @@
+import json
+import threading
+import time
+import urllib.request
+
+from utils.data_service import frame_to_payload, payload_to_frame
+
+
+# versions seen in any reply this recently are trusted without asking again
+VERSION_TTL = 1.0
+
+
+class DataServiceError(Exception):
+    pass
+
+
+class DataClient:
+
+    def __init__(self, url, timeout=10):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+        # version key (None = whole store, else an email) -> (seen_at, version)
+        self.seen = {}
+        self.seen_lock = threading.Lock()
+
+    def batch(self, ops):
+        body = json.dumps({"ops": ops}, default=str).encode("utf-8")
+
+        request = urllib.request.Request(
+            f"{self.url}/batch",
+            data=body,
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as resp:
+                reply = json.loads(resp.read())
+        except Exception as e:
+            raise DataServiceError(f"Data service request failed: {e}") from e
+
+        self._remember(reply.get("versions"))
+        return reply["results"]
+
+    def _remember(self, versions):
+        if not versions:
+            return
+
+        now = time.monotonic()
+        with self.seen_lock:
+            self.seen[None] = (now, tuple(versions["all"]))
+            for email, version in versions["users"].items():
+                self.seen[email] = (now, tuple(version))
+
+    # ---------------- QUERIES ----------------
+    def version(self, email=None):
+        # per-user when an email is given: other users' writes leave it alone
+        if email is not None:
+            email = str(email).strip().lower()
+
+        with self.seen_lock:
+            seen = self.seen.get(email)
+        if seen and time.monotonic() - seen[0] < VERSION_TTL:
+            return seen[1]
+
+        op = {"op": "version"} if email is None else {"op": "version", "email": email}
+        return tuple(self.batch([op])[0])
+
+    def user_tables(self, email, tables):
+        # one round trip for everything a page needs on this rerun
+        ops = [{"op": "user_table", "table": t, "email": email} for t in tables]
+        results = self.batch(ops)
+        return {t: payload_to_frame(r) for t, r in zip(tables, results)}
+
+    def tables(self, tables):
+        results = self.batch([{"op": "table", "table": t} for t in tables])
+        return {t: payload_to_frame(r) for t, r in zip(tables, results)}
+
+    # ---------------- MUTATIONS ----------------
+    def append(self, table, rows):
+        return self.batch([{"op": "append", "table": table, "rows": rows}])[0]
+
+    def append_many(self, rows_by_table):
+        return self.batch([{"op": "append_many", "rows": rows_by_table}])[0]
+
+    def update(self, table, where, values):
+        return self.batch([{"op": "update", "table": table, "where": where, "values": values}])[0]
+
+    def delete(self, table, where):
+        return self.batch([{"op": "delete", "table": table, "where": where}])[0]
+
+    def replace(self, table, df):
+        return self.batch([{"op": "replace", "table": table, "frame": frame_to_payload(df)}])[0]
@@ -0,0 +1,261 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from utils import sharding
+from utils.encoding import encode_sheets
+from utils.excel_utils import load_all_sheets, write_workbook
+
+DB = "data/database.xlsx"
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+# ================= FRAME <-> JSON =================
+def frame_to_payload(df):
+    df = df.astype(object).where(pd.notna(df), None)
+    return {"columns": [str(c) for c in df.columns], "rows": df.values.tolist()}
+
+
+def payload_to_frame(payload):
+    return pd.DataFrame(payload["rows"], columns=payload["columns"])
+
+
+# ================= VERSION SCOPES =================
+def _email(value):
+    return str(value).strip().lower()
+
+
+def _row_emails(rows):
+    # None when some row has no email: the write is not scoped to users
+    emails = {_email(row["email"]) if row.get("email") else None for row in rows}
+    return None if None in emails else emails
+
+
+def _where_emails(where):
+    return {_email(where["email"])} if where.get("email") else None
+
+
+def _op_emails(op):
+    # users whose versions a client will want back after this op
+    emails = set()
+
+    if op.get("email"):
+        emails.add(_email(op["email"]))
+    if op.get("where"):
+        emails |= _where_emails(op["where"]) or set()
+    if op.get("op") == "append":
+        emails |= _row_emails(op["rows"]) or set()
+    if op.get("op") == "append_many":
+        for rows in op["rows"].values():
+            emails |= _row_emails(rows) or set()
+
+    return emails
+
+
+# ================= IN-MEMORY STORE =================
+def _refuse_sharded(db_path):
+    if sharding.is_sharded(db_path):
+        raise ValueError(
+            f"{db_path} is sharded; the data service only serves an unsharded workbook"
+        )
+
+
+class DataStore:
+
+    def __init__(self, db_path=DB):
+        # the store holds one workbook; shards would be invisible to it
+        _refuse_sharded(db_path)
+
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        # the interned tables are the only in-memory copy; string columns
+        # are rebuilt from the vocabularies for reads and workbook writes
+        self.encoded = encode_sheets(load_all_sheets(db_path))
+        self.started = time.time_ns()
+
+        # every write bumps `version`; a user's caches only follow writes to
+        # their own rows (user_versions) or ones not scoped to a user (shared)
+        self.version = 0
+        self.shared_version = 0
+        self.user_versions = {}
+
+    def _check(self):
+        # sharded while we were running: the direct path no longer reads this file
+        _refuse_sharded(self.db_path)
+
+    def _write(self, emails=None):
+        # hot copy is already changed; one workbook write for durability
+        self.version += 1
+
+        if emails is None:
+            self.shared_version += 1
+        else:
+            for email in emails:
+                self.user_versions[email] = self.user_versions.get(email, 0) + 1
+
+        write_workbook(self.db_path, self.encoded.sheets())
+
+    def versions(self, emails=()):
+        # sent back with every batch, so clients rarely ask for them separately
+        with self.lock:
+            return {
+                "all": [self.started, self.version],
+                "users": {
+                    e: [self.started, self.shared_version, self.user_versions.get(e, 0)]
+                    for e in emails
+                },
+            }
+
+    # ---------------- QUERIES ----------------
+    def user_table(self, table, email):
+        with self.lock:
+            if table not in self.encoded.tables:
+                return pd.DataFrame()
+            return self.encoded.user_table(table, email)
+
+    def table(self, table):
+        with self.lock:
+            return self.encoded.table(table)
+
+    # ---------------- MUTATIONS ----------------
+    def append(self, table, rows):
+        with self.lock:
+            self._check()
+            count = self.encoded.append(table, rows)
+            self._write(_row_emails(rows))
+            return count
+
+    def append_many(self, rows_by_table):
+        # several tables, one workbook write: all rows land or none do
+        with self.lock:
+            self._check()
+            count = sum(self.encoded.append(table, rows) for table, rows in rows_by_table.items())
+            self._write(_row_emails([row for rows in rows_by_table.values() for row in rows]))
+            return count
+
+    def update(self, table, where, values):
+        with self.lock:
+            self._check()
+            count = self.encoded.update(table, where, values)
+            if count:
+                # moving rows to another email changes two users: treat as shared
+                self._write(None if "email" in values else _where_emails(where))
+            return count
+
+    def delete(self, table, where):
+        with self.lock:
+            self._check()
+            count = self.encoded.delete(table, where)
+            if count:
+                self._write(_where_emails(where))
+            return count
+
+    def replace(self, table, df):
+        with self.lock:
+            self._check()
+            self.encoded.add_table(table, df)
+            self._write()
+            return len(df)
+
+    # ---------------- BATCH ----------------
+    def run(self, op):
+        kind = op["op"]
+
+        if kind == "version":
+            versions = self.versions(_op_emails(op))
+            return versions["users"].get(op.get("email"), versions["all"])
+        if kind == "user_table":
+            return frame_to_payload(self.user_table(op["table"], op["email"]))
+        if kind == "table":
+            return frame_to_payload(self.table(op["table"]))
+        if kind == "append":
+            return self.append(op["table"], op["rows"])
+        if kind == "append_many":
+            return self.append_many(op["rows"])
+        if kind == "update":
+            return self.update(op["table"], op["where"], op["values"])
+        if kind == "delete":
+            return self.delete(op["table"], op["where"])
+        if kind == "replace":
+            return self.replace(op["table"], payload_to_frame(op["frame"]))
+
+        raise ValueError(f"Unknown op: {kind}")
+
+    def run_batch(self, ops):
+        # the whole batch sees one consistent state; the versions after it
+        # ride along for every user the batch read or wrote
+        with self.lock:
+            results = [self.run(op) for op in ops]
+            emails = set().union(*[_op_emails(op) for op in ops])
+            return results, self.versions(emails)
+
+
+# ================= HTTP =================
+def make_handler(store):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def _reply(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._reply(200, {"ok": True, "tables": list(store.encoded.tables)})
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/batch":
+                self._reply(404, {"error": "not found"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                results, versions = store.run_batch(request.get("ops", []))
+            except Exception as e:
+                self._reply(400, {"error": str(e)})
+                return
+
+            self._reply(200, {"results": results, "versions": versions})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(db_path=DB, host=HOST, port=PORT):
+    store = DataStore(db_path)
+    server = ThreadingHTTPServer((host, port), make_handler(store))
+    print(f"Data service on http://{host}:{port} ({db_path})")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Student Productivity data service")
+    parser.add_argument("--db", default=DB)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+
+    try:
+        serve(args.db, args.host, args.port)
+    except ValueError as e:
+        parser.exit(1, f"{e}\n")
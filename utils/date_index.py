@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from utils.working_set import frame_bytes
+
+
+def _point(value, unit):
+    # date / datetime / string -> datetime64 at the index's unit; None stays open-ended
+    if value is None:
+        return None
+    return np.datetime64(pd.Timestamp(value).to_datetime64(), unit)
+
+
+class DateIndex:
+    # one user's rows of a table, sorted by date once, plus the sorted day
+    # array: any [start, end] window is two binary searches and a slice.
+    # unit "D" compares whole days; "m" keeps times (task deadlines)
+
+    def __init__(self, df, column="date", unit="D"):
+        self.unit = unit
+        days = pd.to_datetime(df[column], errors="coerce", format="mixed")
+        days = days.to_numpy().astype(f"datetime64[{unit}]")
+
+        # stable, so rows of the same day keep their stored order;
+        # unparseable dates (NaT) sort to the end and are never in a range
+        order = np.argsort(days, kind="stable")
+
+        self.frame = df.take(order).reset_index(drop=True)
+        self.days = days[order]
+        self.n_valid = int((~np.isnat(self.days)).sum())
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def nbytes(self):
+        return frame_bytes(self.frame) + self.days.nbytes
+
+    def bounds(self, start=None, end=None):
+        # row positions [lo, hi) of the inclusive date range, O(log n)
+        days = self.days[:self.n_valid]
+        lo = 0 if start is None else int(np.searchsorted(days, _point(start, self.unit), side="left"))
+        hi = self.n_valid if end is None else int(np.searchsorted(days, _point(end, self.unit), side="right"))
+        return lo, max(lo, hi)
+
+    def range(self, start=None, end=None):
+        # positional slice of the sorted frame: no copy is made (copy-on-write)
+        lo, hi = self.bounds(start, end)
+        return self.frame.iloc[lo:hi]
+
+    def on(self, day):
+        return self.range(day, day)
+
+    def count(self, start=None, end=None):
+        lo, hi = self.bounds(start, end)
+        return hi - lo
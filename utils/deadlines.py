@@ -0,0 +1,97 @@
+from datetime import datetime, time, timedelta
+
+import pandas as pd
+
+from utils.data_access import DB, data_version, load_tables, user_date_index
+from utils.date_index import DateIndex
+
+DUE_FORMAT = "%Y-%m-%d %H:%M"
+
+# reminders speed up as a deadline nears: (inside this window, every N hours).
+# windows and intervals both shrink, so a later tier is never slower
+DUE_ESCALATION = [
+    (timedelta(days=3), 6),
+    (timedelta(hours=24), 3),
+    (timedelta(hours=6), 1),
+]
+
+
+def parse_due(value):
+    # "" / NaN / garbage -> None (the task has no deadline)
+    if value is None or pd.isna(value) or not str(value).strip():
+        return None
+
+    due = pd.to_datetime(str(value).strip(), errors="coerce", format="mixed")
+    return None if pd.isna(due) else due.to_pydatetime()
+
+
+def reminder_due(last_sent, hours, due=None):
+    # earliest time the next reminder is owed: the priority cadence, or
+    # sooner once the task enters a tighter escalation window
+    at = last_sent + timedelta(hours=hours)
+
+    if due is None:
+        return at
+
+    for window, every in DUE_ESCALATION:
+        at = min(at, max(last_sent + timedelta(hours=every), due - window))
+
+    return at
+
+
+def urgency(due, now):
+    # label for mails and lists
+    if due is None:
+        return ""
+    if due <= now:
+        return "overdue"
+    if due - now <= timedelta(hours=24):
+        return "due soon"
+    return ""
+
+
+# ================= DEADLINE VIEWS =================
+def _pending(df):
+    return df[df["status"].astype(str).str.strip() == "Pending"]
+
+
+def due_views(index, now=None):
+    # overdue / due today / due in the next 7 days, as consecutive slices of a
+    # deadline-ordered index: three binary searches, no full-table filter
+    now = now or datetime.now()
+    end_of_today = datetime.combine(now.date(), time(23, 59))
+
+    _, overdue_end = index.bounds(None, now)
+    _, today_end = index.bounds(None, end_of_today)
+    _, week_end = index.bounds(None, now + timedelta(days=7))
+
+    frame = index.frame
+
+    return {
+        "overdue": _pending(frame.iloc[:overdue_end]),
+        "today": _pending(frame.iloc[overdue_end:today_end]),
+        "week": _pending(frame.iloc[today_end:week_end]),
+    }
+
+
+def user_deadlines(email, db_path=DB):
+    # one user's tasks in deadline order (tasks without a due date sort last)
+    return user_date_index(email, "Tasks", db_path, "due", "m")
+
+
+_global_cache = {}
+
+def deadline_index(db_path=DB):
+    # every user's pending tasks in deadline order, rebuilt when data changes
+    version = data_version(db_path)
+    cached = _global_cache.get(db_path)
+
+    if cached and cached[0] == version:
+        return cached[1]
+
+    tasks = load_tables(["Tasks"], db_path)["Tasks"]
+    tasks = _pending(tasks)
+    index = DateIndex(tasks[tasks["due"].notna()], "due", "m")
+
+    _global_cache[db_path] = (version, index)
+    return index
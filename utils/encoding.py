@@ -0,0 +1,298 @@
+import numpy as np
+import pandas as pd
+
+from utils.excel_utils import load_sheets, match_rows, normalize_sheet, sheet_column
+
+# ================= WHICH COLUMNS GET INTERNED =================
+# sheet -> {column: vocabulary name}
+ENCODED_COLUMNS = {
+    "Users": {"email": "email"},
+    "Habits": {"email": "email", "habit": "habit"},
+    "HabitLog": {"email": "email", "habit": "habit"},
+    "Subjects": {"email": "email", "subject": "subject"},
+    "StudyLog": {"email": "email", "subject": "subject"},
+    "Attendance": {"email": "email"},
+    "Tasks": {"email": "email"},
+    "Outbox": {"email": "email"},
+}
+
+MISSING_ID = -1
+
+
+# ================= LOOKUP TABLE =================
+class Vocabulary:
+
+    def __init__(self, values=()):
+        self.values = []
+        self.ids = {}
+
+        for value in values:
+            self.intern(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def intern(self, value):
+        value = str(value)
+
+        if value not in self.ids:
+            self.ids[value] = len(self.values)
+            self.values.append(value)
+
+        return self.ids[value]
+
+    def intern_many(self, series):
+        # factorize once, then intern only the distinct strings
+        codes, uniques = pd.factorize(series.astype(str))
+
+        mapping = np.array([self.intern(u) for u in uniques], dtype=np.int32)
+
+        if len(mapping) == 0:
+            return np.zeros(len(codes), dtype=np.int32)
+
+        return mapping[codes]
+
+    def lookup(self, value):
+        return self.ids.get(str(value), MISSING_ID)
+
+    def decode(self, codes):
+        values = np.array(self.values, dtype=object)
+        return values[np.asarray(codes, dtype=np.int64)]
+
+    def to_frame(self, name):
+        return pd.DataFrame({
+            f"{name}_id": np.arange(len(self.values), dtype=np.int32),
+            name: self.values,
+        })
+
+
+# ================= ENCODED TABLE SET =================
+class EncodedTables:
+
+    def __init__(self):
+        self.vocab = {
+            "email": Vocabulary(),
+            "habit": Vocabulary(),
+            "subject": Vocabulary(),
+        }
+        self.tables = {}
+        self.user_rows = {}
+        self.headers = {}
+
+    # ---------------- LOADING ----------------
+    def _encode(self, name, df):
+        # normalized frame with the interned columns swapped for *_id columns
+        df = normalize_sheet(df)
+
+        for col, vocab_name in ENCODED_COLUMNS.get(name, {}).items():
+            if col not in df.columns:
+                continue
+
+            values = df[col].astype(str).str.strip()
+
+            if vocab_name == "email":
+                values = values.str.lower()
+
+            df[f"{vocab_name}_id"] = self.vocab[vocab_name].intern_many(values)
+            df = df.drop(columns=[col])
+
+        return df.reset_index(drop=True)
+
+    def _index_users(self, name):
+        # integer groupby over email_id; nothing is interned again
+        df = self.tables[name]
+
+        if "email_id" in df.columns:
+            self.user_rows[name] = df.groupby("email_id", sort=False).indices
+        else:
+            self.user_rows[name] = {}
+
+    def add_table(self, name, df):
+        self.headers[name] = [str(c) for c in df.columns]
+        self.tables[name] = self._encode(name, df)
+        self._index_users(name)
+
+    # ---------------- MUTATIONS ----------------
+    def append(self, name, rows):
+        # only the new rows are interned; their positions extend the user index
+        if not rows:
+            return 0
+
+        rows = pd.DataFrame(rows)
+
+        if name not in self.tables:
+            self.add_table(name, pd.DataFrame(columns=rows.columns))
+
+        start = len(self.tables[name])
+        added = self._encode(name, rows)
+        self.tables[name] = pd.concat([self.tables[name], added], ignore_index=True)
+
+        if "email_id" in added.columns:
+            user_rows = self.user_rows[name]
+
+            for user, positions in added.groupby("email_id", sort=False).indices.items():
+                positions = positions + start
+                old = user_rows.get(user)
+                user_rows[user] = positions if old is None else np.concatenate([old, positions])
+
+        return len(added)
+
+    def _id_value(self, vocab_name, value):
+        value = str(value).strip()
+        return value.lower() if vocab_name == "email" else value
+
+    def _match(self, name, where):
+        # positions of the rows matching `where`; an email narrows the
+        # search to that user's rows before any column is compared
+        df = self.tables.get(name)
+        none = np.array([], dtype=np.int64)
+
+        if df is None or df.empty:
+            return none
+
+        where = dict(where)
+        encoded = ENCODED_COLUMNS.get(name, {})
+
+        if "email" in where and "email_id" in df.columns:
+            positions = self.user_rows[name].get(self.user_id(where.pop("email")), none)
+        else:
+            positions = np.arange(len(df))
+
+        rows = df.iloc[positions]
+        mask = np.ones(len(rows), dtype=bool)
+
+        for key, value in where.items():
+            vocab_name = encoded.get(key)
+
+            if vocab_name and f"{vocab_name}_id" in rows.columns:
+                wanted = self.vocab[vocab_name].lookup(self._id_value(vocab_name, value))
+                mask &= rows[f"{vocab_name}_id"].to_numpy() == wanted
+            else:
+                mask &= match_rows(rows, {key: value}, name).to_numpy()
+
+        return positions[mask]
+
+    def update(self, name, where, values):
+        positions = self._match(name, where)
+
+        if not len(positions):
+            return 0
+
+        df = self.tables[name]
+        encoded = ENCODED_COLUMNS.get(name, {})
+
+        for key, value in values.items():
+            value = "" if value is None else str(value)
+            vocab_name = encoded.get(key)
+
+            if vocab_name:
+                col = f"{vocab_name}_id"
+                value = self.vocab[vocab_name].intern(self._id_value(vocab_name, value))
+            else:
+                col = str(key).strip().lower()
+
+                if col not in df.columns:
+                    df[col] = ""
+                df[col] = df[col].astype(object)
+
+            df.iloc[positions, df.columns.get_loc(col)] = value
+
+        if "email" in values:
+            self._index_users(name)
+
+        return len(positions)
+
+    def delete(self, name, where):
+        positions = self._match(name, where)
+
+        if not len(positions):
+            return 0
+
+        keep = np.ones(len(self.tables[name]), dtype=bool)
+        keep[positions] = False
+
+        self.tables[name] = self.tables[name][keep].reset_index(drop=True)
+        self._index_users(name)
+        return len(positions)
+
+    # ---------------- READS ----------------
+    def user_id(self, email):
+        return self.vocab["email"].lookup(str(email).strip().lower())
+
+    def user_frame(self, name, email):
+        # integer index lookup instead of a string comparison over every row
+        df = self.tables.get(name)
+
+        if df is None:
+            return pd.DataFrame()
+
+        rows = self.user_rows[name].get(self.user_id(email))
+
+        if rows is None:
+            return df.iloc[0:0]
+
+        return df.iloc[rows]
+
+    def decode(self, df, name=None):
+        # turn *_id columns back into their string columns; with a table
+        # name the stored column order is restored as well
+        df = df.copy()
+
+        for vocab_name, vocab in self.vocab.items():
+            id_col = f"{vocab_name}_id"
+
+            if id_col in df.columns:
+                df[vocab_name] = vocab.decode(df[id_col].to_numpy())
+                df = df.drop(columns=[id_col])
+
+        if name in self.headers:
+            stored = [h.strip().lower() for h in self.headers[name]]
+            order = [c for c in stored if c in df.columns]
+            df = df[order + [c for c in df.columns if c not in order]]
+
+        return df
+
+    def user_table(self, name, email):
+        return self.decode(self.user_frame(name, email), name)
+
+    def table(self, name):
+        # whole table, normalized like a direct read
+        if name not in self.tables:
+            return pd.DataFrame()
+        return self.decode(self.tables[name], name)
+
+    def sheet(self, name):
+        # whole table as it is written back: stored header casing
+        df = self.table(name)
+        headers = self.headers.get(name, [])
+        stored = {h.strip().lower(): h for h in headers}
+        stub = pd.DataFrame(columns=headers)
+
+        return df.rename(columns={
+            c: stored.get(c) or sheet_column(stub, c, name) for c in df.columns
+        })
+
+    def sheets(self):
+        return {name: self.sheet(name) for name in self.tables}
+
+    def lookup_tables(self):
+        return {
+            name: vocab.to_frame(name)
+            for name, vocab in self.vocab.items()
+        }
+
+
+def encode_sheets(sheets):
+    encoded = EncodedTables()
+
+    for name, df in sheets.items():
+        encoded.add_table(name, df)
+
+    return encoded
+
+
+def load_encoded(db_path, sheet_names=None):
+    if sheet_names is None:
+        sheet_names = list(ENCODED_COLUMNS)
+
+    return encode_sheets(load_sheets(db_path, sheet_names))
@@ -1,21 +1,330 @@
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
 import pandas as pd
 
 def load_all_sheets(db_path):
+    # sheet_name=None parses every sheet from a single open of the file
     try:
-        xls = pd.ExcelFile(db_path)
-        return {
-            name: pd.read_excel(db_path, sheet_name=name, dtype=str)
-            for name in xls.sheet_names
-        }
+        return pd.read_excel(db_path, sheet_name=None, dtype=str)
     except:
         return {}
 
+def load_sheets(db_path, sheet_names):
+    # one workbook open for all requested sheets, missing sheets come back empty
+    try:
+        xls = pd.ExcelFile(db_path)
+    except:
+        return {name: pd.DataFrame() for name in sheet_names}
+
+    sheets = {}
+
+    for name in sheet_names:
+        if name in xls.sheet_names:
+            sheets[name] = xls.parse(name, dtype=str)
+        else:
+            sheets[name] = pd.DataFrame()
+
+    return sheets
+
+def normalize_sheet(df):
+    # lower-case / stripped column names, lower-case emails
+    df = df.copy()
+    df.columns = df.columns.astype(str).str.strip().str.lower()
+
+    if "email" in df.columns:
+        df["email"] = df["email"].astype(str).str.strip().str.lower()
+
+    if "date" in df.columns:
+        df["date"] = normalize_dates(df["date"])
+
+    return df
+
+def normalize_dates(series):
+    # sheets mix "2026-03-05" and "2026-03-05 00:00:00", parse each as it comes
+    parsed = pd.to_datetime(series, errors="coerce", format="mixed")
+    return parsed.dt.strftime("%Y-%m-%d").where(parsed.notna(), series)
+
 def safe_write(db_path, updated_sheets: dict):
     all_sheets = load_all_sheets(db_path)
 
     for sheet, df in updated_sheets.items():
         all_sheets[sheet] = df
 
-    with pd.ExcelWriter(db_path, engine="openpyxl", mode="w") as writer:
-        for sheet, df in all_sheets.items():
-            df.to_excel(writer, sheet_name=sheet, index=False)
+    write_workbook(db_path, all_sheets)
+
+def write_workbook(db_path, sheets: dict):
+    # write next to the target and swap in, so readers never see a half-written file
+    folder = os.path.dirname(os.path.abspath(db_path))
+    fd, tmp_path = tempfile.mkstemp(suffix=".xlsx", dir=folder)
+    os.close(fd)
+
+    try:
+        with pd.ExcelWriter(tmp_path, engine="openpyxl", mode="w") as writer:
+            for sheet, df in sheets.items():
+                df.to_excel(writer, sheet_name=sheet, index=False)
+
+        os.replace(tmp_path, db_path)
+    except:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def row_hashes_by_email(df):
+    # order-independent fingerprint of each user's rows in one table
+    if df.empty or "email" not in df.columns:
+        return pd.Series(dtype="uint64")
+
+    cols = sorted(df.columns)
+    row_hash = pd.util.hash_pandas_object(df[cols].astype(str), index=False)
+    return row_hash.groupby(df["email"].to_numpy()).sum()
+
+# ================= ROW LEVEL HELPERS =================
+# keys are lower-case column names, sheets keep their own column casing
+TITLE_CASE_SHEETS = {"Tasks"}
+
+def sheet_column(df, key, sheet=None):
+    for col in df.columns:
+        if str(col).strip().lower() == key:
+            return col
+
+    if sheet in TITLE_CASE_SHEETS:
+        return "_".join(part.capitalize() for part in key.split("_"))
+
+    return key
+
+def _comparable(series, key):
+    values = series.astype(str).str.strip()
+
+    if key == "email":
+        return values.str.lower()
+
+    if key == "date":
+        return normalize_dates(values)
+
+    return values
+
+def _comparable_value(value, key):
+    value = str(value).strip()
+
+    if key == "email":
+        return value.lower()
+
+    if key == "date":
+        parsed = pd.to_datetime(value, errors="coerce")
+        return value if pd.isna(parsed) else parsed.strftime("%Y-%m-%d")
+
+    return value
+
+def match_rows(df, where, sheet=None):
+    mask = pd.Series(True, index=df.index)
+
+    for key, value in where.items():
+        col = sheet_column(df, key, sheet)
+
+        if col not in df.columns:
+            return pd.Series(False, index=df.index)
+
+        mask &= _comparable(df[col], key) == _comparable_value(value, key)
+
+    return mask
+
+def append_frame_rows(df, rows, sheet=None):
+    if not rows:
+        return df
+
+    renamed = [
+        {sheet_column(df, key, sheet): value for key, value in row.items()}
+        for row in rows
+    ]
+
+    return pd.concat([df, pd.DataFrame(renamed)], ignore_index=True)
+
+def update_frame_rows(df, where, values, sheet=None):
+    df = df.copy()
+    mask = match_rows(df, where, sheet)
+
+    for key, value in values.items():
+        col = sheet_column(df, key, sheet)
+
+        if col not in df.columns:
+            df[col] = ""
+
+        df[col] = df[col].astype(object)
+        df.loc[mask, col] = "" if value is None else str(value)
+
+    return df, int(mask.sum())
+
+def delete_frame_rows(df, where, sheet=None):
+    mask = match_rows(df, where, sheet)
+    return df[~mask].reset_index(drop=True), int(mask.sum())
+
+# ================= STREAMING READS =================
+# openpyxl read_only mode parses rows lazily, so filters applied while
+# iterating keep memory proportional to the rows that survive them
+
+def _day(value):
+    # cell value -> "YYYY-MM-DD" (or None) without building a Series per row
+    if value is None:
+        return None
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d")
+
+    text = str(value).strip()
+    if len(text) >= 10 and text[4] == "-" and text[7] == "-":
+        return text[:10]
+
+    parsed = pd.to_datetime(text, errors="coerce", format="mixed")
+    return None if pd.isna(parsed) else parsed.strftime("%Y-%m-%d")
+
+def _cell_text(value):
+    # same strings pd.read_excel(dtype=str) produces, None stays missing
+    return None if value is None else str(value)
+
+def _stream_rows(ws, emails=None, columns=None, start=None, end=None):
+    # yields (header, row) pairs, filtering on email / date and projecting
+    # columns while the sheet is being parsed
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, None)
+
+    if header is None:
+        return
+
+    header = [str(h) for h in header]
+    keys = [h.strip().lower() for h in header]
+
+    keep = list(range(len(header)))
+    if columns is not None:
+        wanted = {c.lower() for c in columns} | {"email"}
+        keep = [i for i, k in enumerate(keys) if k in wanted]
+
+    email_pos = keys.index("email") if "email" in keys else None
+    date_pos = keys.index("date") if "date" in keys else None
+
+    if emails is not None and email_pos is None:
+        return
+    if (start is not None or end is not None) and date_pos is None:
+        return
+
+    start = None if start is None else str(start)
+    end = None if end is None else str(end)
+    out_header = [header[i] for i in keep]
+
+    for row in rows:
+        if emails is not None and str(row[email_pos]).strip().lower() not in emails:
+            continue
+
+        if start is not None or end is not None:
+            day = _day(row[date_pos])
+            if day is None or (start is not None and day < start) or (end is not None and day > end):
+                continue
+
+        yield out_header, [_cell_text(row[i]) if i < len(row) else None for i in keep]
+
+def _open_read_only(db_path):
+    from openpyxl import load_workbook
+
+    try:
+        return load_workbook(db_path, read_only=True, data_only=True)
+    except:
+        return None
+
+def _frame(header, buffer):
+    df = pd.DataFrame(buffer, columns=header, dtype=object)
+    return normalize_sheet(df.astype(str).where(df.notna()))
+
+def read_user_sheets(db_path, sheet_names, email, columns=None, start=None, end=None):
+    # one user's rows of several sheets from one streaming pass per sheet.
+    # columns: {sheet: [column, ...]} to read only those, start/end: date range
+    emails = {str(email).strip().lower()}
+    columns = columns or {}
+    frames = {name: pd.DataFrame() for name in sheet_names}
+
+    wb = _open_read_only(db_path)
+    if wb is None:
+        return frames
+
+    try:
+        for name in sheet_names:
+            if name not in wb.sheetnames:
+                continue
+
+            header, buffer = None, []
+            ws = wb[name]
+
+            for header, row in _stream_rows(ws, emails, columns.get(name), start, end):
+                buffer.append(row)
+
+            if header is None:
+                # nothing matched: still hand back the sheet's columns
+                first = next(ws.iter_rows(max_row=1, values_only=True), ())
+                header = [str(h) for h in first if h is not None]
+                if columns.get(name) is not None:
+                    wanted = {c.lower() for c in columns[name]} | {"email"}
+                    header = [h for h in header if h.strip().lower() in wanted]
+
+            frames[name] = _frame(header, buffer)
+    finally:
+        wb.close()
+
+    return frames
+
+def iter_sheet_rows(db_path, sheet, emails=None, chunk_rows=2000, columns=None, start=None, end=None):
+    # read-only openpyxl stream, yields normalized DataFrame chunks
+    # of at most chunk_rows, optionally keeping only the given emails
+    wb = _open_read_only(db_path)
+    if wb is None:
+        return
+
+    if emails is not None:
+        emails = {str(e).strip().lower() for e in emails}
+
+    try:
+        if sheet not in wb.sheetnames:
+            return
+
+        header, buffer = None, []
+
+        for header, row in _stream_rows(wb[sheet], emails, columns, start, end):
+            buffer.append(row)
+
+            if len(buffer) >= chunk_rows:
+                yield _frame(header, buffer)
+                buffer = []
+
+        if buffer:
+            yield _frame(header, buffer)
+
+    finally:
+        wb.close()
+
+
+# ================= LOCKING =================
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to an in-process lock
+    fcntl = None
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+@contextmanager
+def file_lock(path):
+    # exclusive lock for a read-modify-write of one workbook
+    lock_path = os.path.abspath(str(path)) + ".lock"
+
+    if fcntl is None:
+        with _thread_locks_guard:
+            lock = _thread_locks.setdefault(lock_path, threading.RLock())
+        with lock:
+            yield
+        return
+
+    with open(lock_path, "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,224 @@
+import argparse
+import json
+import os
+import tempfile
+import zipfile
+
+import pandas as pd
+
+from utils import sharding
+from utils.archive import ARCHIVE_DIR, ARCHIVED_TABLES, cold_cutoff, iter_cold
+from utils.data_access import DB, get_client
+from utils.excel_utils import iter_sheet_rows
+
+EXPORT_TABLES = ["Users", "Habits", "HabitLog", "Subjects", "StudyLog", "Attendance", "Tasks"]
+EXPORT_FORMATS = ["zip", "jsonl", "csv"]
+
+# st.download_button holds the whole file in memory, so exports served from the
+# app stop at this size; bigger ones go through the CLI below
+DOWNLOAD_MAX_MB = float(os.environ.get("EXPORT_DOWNLOAD_MB", "50"))
+
+
+# ================= ROW SOURCE =================
+def iter_table_chunks(table, emails, db_path=DB, archive_dir=ARCHIVE_DIR):
+    # full history: archived log tables add the cohort's cold partitions
+    hot = _iter_hot_chunks(table, emails, db_path)
+
+    if table in ARCHIVED_TABLES:
+        yield from _with_cold(table, emails, hot, archive_dir)
+    else:
+        yield from hot
+
+
+def _row_keys(df, columns):
+    df = df.reindex(columns=columns)
+    return list(zip(*[df[c].fillna("").astype(str).str.strip() for c in columns]))
+
+
+def _with_cold(table, emails, hot_chunks, archive_dir):
+    # hot chunks stream as they come, then one cold partition at a time.
+    # hot rows older than the cutoff are normally leftovers of a crashed
+    # archive run: they are held back and kept only if no partition has them
+    cutoff = cold_cutoff(table, archive_dir)
+    columns = None
+    held = []
+
+    for chunk in hot_chunks:
+        columns = columns or list(chunk.columns)
+
+        if cutoff is not None and "date" in chunk.columns:
+            old = chunk["date"].astype(str) < cutoff
+            held.append(chunk[old])
+            chunk = chunk[~old]
+
+        if not chunk.empty:
+            yield chunk
+
+    held = pd.concat(held, ignore_index=True) if held else pd.DataFrame()
+
+    for part in iter_cold(table, emails, archive_dir):
+        columns = columns or list(part.columns)
+
+        if not held.empty:
+            archived = set(_row_keys(part, columns))
+            held = held[[key not in archived for key in _row_keys(held, columns)]]
+
+        yield part.reindex(columns=columns)
+
+    if not held.empty:
+        yield held
+
+
+def _iter_hot_chunks(table, emails, db_path):
+    # per-user data path: only the cohort's rows are ever materialized
+    client = get_client()
+
+    if client:
+        for email in emails:
+            df = client.user_tables(email, [table])[table]
+            if not df.empty:
+                yield df
+        return
+
+    if not (sharding.is_user_table(table) and sharding.is_sharded(db_path)):
+        yield from iter_sheet_rows(db_path, table, emails=emails)
+        return
+
+    # only the shards that hold someone from the cohort are opened
+    by_shard = {}
+    for email in emails:
+        by_shard.setdefault(sharding.shard_for(email, db_path), []).append(email)
+
+    for path, shard_emails in by_shard.items():
+        yield from iter_sheet_rows(path, table, emails=shard_emails)
+
+
+# ================= FORMATS =================
+def iter_csv(table, emails, db_path=DB):
+    header = True
+
+    for chunk in iter_table_chunks(table, emails, db_path):
+        yield chunk.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+def iter_jsonl(emails, tables=EXPORT_TABLES, db_path=DB):
+    for table in tables:
+        for chunk in iter_table_chunks(table, emails, db_path):
+            records = chunk.astype(object).where(pd.notna(chunk), None).to_dict("records")
+            lines = "".join(
+                json.dumps({"table": table, **r}, default=str) + "\n" for r in records
+            )
+            yield lines.encode("utf-8")
+
+
+class _ChunkSink:
+    # write-only file object for zipfile, drained between entries
+    def __init__(self):
+        self.parts = []
+        self.pos = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.pos
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def iter_zip(emails, tables=EXPORT_TABLES, db_path=DB):
+    sink = _ChunkSink()
+
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for table in tables:
+            with zf.open(f"{table}.csv", mode="w") as entry:
+                for part in iter_csv(table, emails, db_path):
+                    entry.write(part)
+                    yield sink.drain()
+
+    yield sink.drain()
+
+
+def export_stream(emails, fmt="zip", tables=EXPORT_TABLES, db_path=DB):
+    emails = [str(e).strip().lower() for e in emails]
+
+    if fmt == "zip":
+        return iter_zip(emails, tables, db_path)
+    if fmt == "jsonl":
+        return iter_jsonl(emails, tables, db_path)
+    if fmt == "csv":
+        if len(tables) != 1:
+            raise ValueError("CSV export needs exactly one table")
+        return iter_csv(tables[0], emails, db_path)
+
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def write_export(path, emails, fmt="zip", tables=EXPORT_TABLES, db_path=DB, max_bytes=None):
+    written = 0
+
+    with open(path, "wb") as f:
+        for part in export_stream(emails, fmt, tables, db_path):
+            f.write(part)
+            written += len(part)
+
+            # stop streaming as soon as the cap is passed, not after the whole export
+            if max_bytes is not None and written > max_bytes:
+                raise ValueError(
+                    f"Export is larger than {max_bytes / 2**20:g} MB; "
+                    "use python -m utils.export for this one"
+                )
+
+    return written
+
+
+def write_temp_export(emails, fmt="zip", tables=EXPORT_TABLES, db_path=DB, prefix="export_",
+                      max_bytes=None):
+    # (path, size) of a fresh temp file: every export gets its own name, so
+    # concurrent sessions never overwrite each other; callers discard it
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}", prefix=prefix)
+    os.close(fd)
+
+    try:
+        return path, write_export(path, emails, fmt, tables, db_path, max_bytes)
+    except Exception:
+        discard_export(path)
+        raise
+
+
+def discard_export(path):
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# ================= CLI =================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export users' data")
+    parser.add_argument("emails", nargs="*", help="emails to export")
+    parser.add_argument("--emails-file", help="file with one email per line")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="zip")
+    parser.add_argument("--table", action="append", help="limit to table(s)")
+    parser.add_argument("--db", default=DB)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    emails = list(args.emails)
+
+    if args.emails_file:
+        with open(args.emails_file) as f:
+            emails += [line.strip() for line in f if line.strip()]
+
+    size = write_export(args.out, emails, args.format, args.table or EXPORT_TABLES, args.db)
+    print(f"Wrote {size} bytes to {args.out}")
@@ -0,0 +1,159 @@
+import base64
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+
+def day_number(day):
+    # proleptic ordinal, so every date maps to one bit position
+    if isinstance(day, str):
+        day = datetime.strptime(day[:10], "%Y-%m-%d").date()
+    elif isinstance(day, datetime):
+        day = day.date()
+    return day.toordinal()
+
+
+class DayBits:
+    # one (user, habit) history: bit i set = done on day `start + i`.
+    # a Python int grows as needed, so three years is ~140 bytes at most
+
+    __slots__ = ("start", "bits")
+
+    def __init__(self, start=None, bits=0):
+        self.start = start
+        self.bits = bits
+
+    # ---------------- BUILDING ----------------
+    @classmethod
+    def from_days(cls, days):
+        numbers = np.unique(np.asarray([day_number(d) for d in days], dtype=np.int64))
+        return cls.from_numbers(numbers)
+
+    @classmethod
+    def from_numbers(cls, numbers):
+        # sorted unique day numbers -> bitset, via one packbits call
+        if len(numbers) == 0:
+            return cls()
+
+        start = int(numbers[0])
+        flags = np.zeros(int(numbers[-1]) - start + 1, dtype=np.uint8)
+        flags[numbers - start] = 1
+
+        packed = np.packbits(flags, bitorder="little").tobytes()
+        return cls(start, int.from_bytes(packed, "little"))
+
+    def add(self, day):
+        n = day_number(day)
+
+        if self.start is None:
+            self.start, self.bits = n, 1
+        elif n < self.start:
+            self.bits = (self.bits << (self.start - n)) | 1
+            self.start = n
+        else:
+            self.bits |= 1 << (n - self.start)
+
+        return self
+
+    # ---------------- QUERIES ----------------
+    def _offset(self, day):
+        return day_number(day) - self.start
+
+    def has(self, day):
+        if self.start is None:
+            return False
+        i = self._offset(day)
+        return i >= 0 and bool(self.bits >> i & 1)
+
+    def _slice(self, first, last):
+        # bits for offsets first..last (inclusive), bit 0 = `first`
+        if self.start is None or last < 0 or last < first:
+            return 0
+        if first < 0:
+            return (self.bits & ((1 << (last + 1)) - 1)) << -first
+        return (self.bits >> first) & ((1 << (last - first + 1)) - 1)
+
+    def count(self, start=None, end=None):
+        # popcount over an inclusive day range (whole history by default)
+        if self.start is None:
+            return 0
+        if start is None and end is None:
+            return self.bits.bit_count()
+
+        first = self._offset(start) if start is not None else 0
+        last = self._offset(end) if end is not None else self.bits.bit_length() - 1
+        return self._slice(max(first, 0), last).bit_count()
+
+    def rate(self, start, end):
+        days = day_number(end) - day_number(start) + 1
+        return self.count(start, end) / days if days > 0 else 0.0
+
+    def window(self, start, days):
+        # bool array for `days` days beginning at `start` (7-day table, heatmaps)
+        if self.start is None:
+            return np.zeros(days, dtype=bool)
+
+        first = self._offset(start)
+        chunk = self._slice(first, first + days - 1)
+        raw = chunk.to_bytes((days + 7) // 8, "little")
+
+        return np.unpackbits(np.frombuffer(raw, dtype=np.uint8), bitorder="little")[:days].astype(bool)
+
+    def current_streak(self, today):
+        # run of ones ending at `today`: distance to the highest zero below it
+        if self.start is None:
+            return 0
+
+        t = self._offset(today)
+        if t < 0:
+            return 0
+
+        mask = (1 << (t + 1)) - 1
+        zeros = ~self.bits & mask
+
+        return t + 1 if zeros == 0 else t - (zeros.bit_length() - 1)
+
+    def longest_streak(self):
+        # each `x &= x >> 1` shortens every run by one
+        x, n = self.bits, 0
+        while x:
+            x &= x >> 1
+            n += 1
+        return n
+
+    # ---------------- PERSISTENCE ----------------
+    def to_text(self):
+        # "<first day>:<base64 bits>", small enough for a spreadsheet cell
+        if self.start is None:
+            return ""
+        raw = self.bits.to_bytes((self.bits.bit_length() + 7) // 8, "little")
+        return f"{date.fromordinal(self.start).isoformat()}:{base64.b64encode(raw).decode()}"
+
+    @classmethod
+    def from_text(cls, text):
+        if not isinstance(text, str) or ":" not in text:
+            return cls()
+        first, encoded = text.split(":", 1)
+        return cls(day_number(first), int.from_bytes(base64.b64decode(encoded), "little"))
+
+
+# ================= FRAMES =================
+def habit_bitsets(habit_log):
+    # {(email, habit): DayBits} for every pair in the log
+    if habit_log.empty:
+        return {}
+
+    log = habit_log[["email", "habit", "date"]].dropna()
+    log = log.assign(habit=log["habit"].astype(str).str.strip())
+    days = pd.to_datetime(log["date"], errors="coerce", format="mixed")
+    log = log.assign(day=days).dropna(subset=["day"])
+
+    numbers = log["day"].to_numpy().astype("datetime64[D]").astype(np.int64)
+    # datetime64 days count from 1970-01-01, ordinals from 0001-01-01
+    log = log.assign(n=numbers + date(1970, 1, 1).toordinal())
+
+    return {
+        key: DayBits.from_numbers(np.unique(group["n"].to_numpy()))
+        for key, group in log.groupby(["email", "habit"])
+    }
@@ -0,0 +1,380 @@
+import json
+import os
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils import sharding
+from utils.academic_calendar import attendance_totals, load_calendar
+from utils.attendance_bits import AttendanceMasks
+from utils.attendance_sim import flag_at_risk
+from utils.data_access import DB
+from utils.excel_utils import load_sheets, row_hashes_by_email
+from utils.habit_bits import habit_bitsets
+from utils.productivity import productivity_from_tables
+from utils.suggestions import messages_from_matches, evaluate_rules, user_aggregates
+
+BASE = Path(__file__).parent.parent
+MATERIALIZED_DB = BASE / "data" / "materialized.xlsx"
+
+SOURCE_TABLES = ["Habits", "HabitLog", "StudyLog", "Attendance", "Tasks"]
+MATERIALIZED_TABLES = [
+    "UserScores", "HabitStreaks", "StudyRollups", "AttendanceRisk", "AttendanceBreakdown", "Suggestions"
+]
+
+# cohort comparisons: metric -> (label, derived from a UserScores row)
+COHORT_METRICS = {
+    "study_hours_7d": ("Study hours (last 7 days)", lambda s: s["study_minutes_7d"] / 60),
+    "attendance_percent": ("Attendance %", lambda s: s["attendance_percent"]),
+    "habit_rate_7d": ("Habit completion (last 7 days)", lambda s: s["habit_rate_7d"] * 100),
+}
+COHORT_QUANTILES = [0.25, 0.5, 0.75, 0.9]
+
+
+# ================= AGGREGATES =================
+def habit_streaks(habit_log, today):
+    # current streak (ending today) and longest streak per (email, habit),
+    # plus the packed day history so pages can draw windows without the log
+    columns = ["email", "habit", "current_streak", "longest_streak", "days_done", "history"]
+
+    bitsets = habit_bitsets(habit_log)
+
+    if not bitsets:
+        return pd.DataFrame(columns=columns)
+
+    return pd.DataFrame([
+        {
+            "email": email,
+            "habit": habit,
+            "current_streak": bits.current_streak(today),
+            "longest_streak": bits.longest_streak(),
+            "days_done": bits.count(),
+            "history": bits.to_text(),
+        }
+        for (email, habit), bits in bitsets.items()
+    ], columns=columns)
+
+
+def study_rollups(study_log):
+    columns = ["email", "month", "subject", "minutes"]
+
+    if study_log.empty:
+        return pd.DataFrame(columns=columns)
+
+    df = study_log.assign(
+        month=study_log["date"].astype(str).str[:7],
+        minutes=pd.to_numeric(study_log["minutes"], errors="coerce").fillna(0),
+    )
+
+    return df.groupby(["email", "month", "subject"], as_index=False)["minutes"].sum()[columns]
+
+
+def attendance_breakdown(attendance, calendar, today):
+    # attended / held per period and per weekday, from the bitmask matrix
+    columns = ["email", "kind", "name", "attended", "held"]
+
+    if attendance.empty:
+        return pd.DataFrame(columns=columns)
+
+    masks = AttendanceMasks(attendance, calendar, today)
+
+    return pd.concat([
+        masks.per_period().rename(columns={"period": "name"}).assign(kind="period"),
+        masks.by_weekday().rename(columns={"weekday": "name"}).assign(kind="weekday"),
+    ], ignore_index=True)[columns]
+
+
+def user_scores(tables, aggregates, risk, today, periods_today):
+    rows = []
+
+    for email, user_tables in split_by_user(tables).items():
+        rows.append({
+            "email": email,
+            "score": productivity_from_tables(user_tables, today, periods_today),
+        })
+
+    scores = pd.DataFrame(rows, columns=["email", "score"]).set_index("email")
+    scores = scores.join(aggregates[["habit_rate_7d", "study_minutes_7d", "pending", "completed"]])
+
+    if not risk.empty:
+        scores = scores.join(risk.set_index("email")[["percent"]].rename(columns={"percent": "attendance_percent"}))
+
+    scores["computed_on"] = today.strftime("%Y-%m-%d")
+
+    return scores.reset_index()
+
+
+def split_by_user(tables):
+    emails = set()
+    for df in tables.values():
+        emails.update(df["email"].dropna().unique())
+
+    grouped = {name: dict(tuple(df.groupby("email"))) for name, df in tables.items()}
+
+    return {
+        email: {
+            name: grouped[name].get(email, tables[name].iloc[0:0])
+            for name in tables
+        }
+        for email in emails
+    }
+
+
+def compute_materialized(tables, today=None, calendar=None):
+    today = today or date.today()
+    calendar = calendar or load_calendar()
+
+    aggregates = user_aggregates(tables, today)
+    risk = flag_at_risk(attendance_totals(tables["Attendance"], calendar, today), calendar)
+
+    suggestions = messages_from_matches(evaluate_rules(aggregates))
+    suggestion_rows = [
+        {"email": email, "rank": i + 1, "message": message}
+        for email, messages in suggestions.items()
+        for i, message in enumerate(messages)
+    ]
+
+    return {
+        "UserScores": user_scores(tables, aggregates, risk, today, calendar.period_count(today)),
+        "HabitStreaks": habit_streaks(tables["HabitLog"], today),
+        "StudyRollups": study_rollups(tables["StudyLog"]),
+        "AttendanceRisk": risk,
+        "AttendanceBreakdown": attendance_breakdown(tables["Attendance"], calendar, today),
+        "Suggestions": pd.DataFrame(suggestion_rows, columns=["email", "rank", "message"]),
+    }
+
+
+# ================= INCREMENTAL STATE =================
+def user_fingerprints(tables):
+    hashes = {name: row_hashes_by_email(df) for name, df in tables.items()}
+
+    emails = set()
+    for h in hashes.values():
+        emails.update(h.index)
+
+    return {
+        email: [str(int(hashes[name].get(email, 0))) for name in sorted(tables)]
+        for email in emails
+    }
+
+
+def state_path(out_path=MATERIALIZED_DB):
+    out_path = Path(out_path)
+    return out_path.with_name(out_path.stem + "_state.json")
+
+
+def load_state(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, path):
+    tmp = Path(str(path) + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    tmp.replace(path)
+
+
+def changed_users(fingerprints, state, today):
+    # a new day invalidates every date-relative metric (streaks, 7-day windows)
+    if state.get("date") != today.strftime("%Y-%m-%d"):
+        return None
+
+    previous = state.get("users", {})
+
+    return {
+        email for email, fp in fingerprints.items() if previous.get(email) != fp
+    } | (set(previous) - set(fingerprints))
+
+
+def merge_materialized(existing, fresh, emails):
+    # replace only the rows of the users that were recomputed
+    merged = {}
+
+    for name, df in fresh.items():
+        old = existing.get(name, pd.DataFrame())
+
+        if not old.empty and "email" in old.columns:
+            old = old[~old["email"].isin(emails)]
+            merged[name] = pd.concat([old, df], ignore_index=True)
+        else:
+            merged[name] = df
+
+    return merged
+
+
+# ================= READS FOR PAGES =================
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def load_materialized(tables=MATERIALIZED_TABLES, path=MATERIALIZED_DB):
+    return load_sheets(path, tables)
+
+
+_sheets_cache = {}
+
+def _materialized_sheets(path=MATERIALIZED_DB):
+    # parsed once per materialize run, shared by every session
+    version = _stamp(path)
+    cached = _sheets_cache.get(str(path))
+
+    if cached and cached[0] == version:
+        return cached[1]
+
+    sheets = load_materialized(path=path) if version else {}
+
+    for df in sheets.values():
+        if "email" in df.columns:
+            df["email"] = df["email"].astype(str).str.strip().str.lower()
+
+    _sheets_cache[str(path)] = (version, sheets)
+    return sheets
+
+
+def user_materialized(email, table, path=MATERIALIZED_DB):
+    df = _materialized_sheets(path).get(table, pd.DataFrame())
+
+    if df.empty or "email" not in df.columns:
+        return df
+
+    return df[df["email"] == str(email).strip().lower()]
+
+
+_as_of_cache = {}
+
+def materialized_as_of(path=MATERIALIZED_DB):
+    # (day the rows were computed for, when the job read the source data)
+    state_file = state_path(path)
+    version = _stamp(state_file)
+    cached = _as_of_cache.get(str(state_file))
+
+    if cached and cached[0] == version:
+        return cached[1]
+
+    state = load_state(state_file) if version else {}
+    as_of = (state.get("date"), state.get("source_read_ns"))
+
+    _as_of_cache[str(state_file)] = (version, as_of)
+    return as_of
+
+
+def _user_data_ns(email, db_path):
+    # last change to any workbook holding this user's rows
+    paths = [db_path]
+    if sharding.is_sharded(db_path):
+        paths.append(sharding.shard_for(email, db_path))
+
+    return max((_stamp(p) or (0,))[0] for p in paths)
+
+
+def current_rows(email, table, db_path=DB, path=MATERIALIZED_DB, today=None):
+    # the user's materialized rows while they still describe the stored data:
+    # computed for today, and nothing this user's rows live in was written
+    # after the job read it. None = missing or stale, compute live instead
+    today = today or date.today()
+    day, read_ns = materialized_as_of(path)
+
+    if day != today.strftime("%Y-%m-%d") or read_ns is None:
+        return None
+    if _user_data_ns(email, db_path) > read_ns:
+        return None
+
+    rows = user_materialized(email, table, path)
+    return None if rows.empty else rows
+
+
+# ================= COHORT COMPARISONS =================
+_cohort_cache = {}
+
+def cohort_stats(path=MATERIALIZED_DB):
+    # class quantiles and sorted values per metric, from UserScores only;
+    # rebuilt when materialize.py rewrites the file (i.e. once per period)
+    try:
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        version = None
+
+    cached = _cohort_cache.get(str(path))
+    if cached and cached[0] == version:
+        return cached[1]
+
+    scores = load_sheets(path, ["UserScores"])["UserScores"] if version else pd.DataFrame()
+    stats = None
+
+    if not scores.empty:
+        numeric = scores.reindex(
+            columns=["study_minutes_7d", "attendance_percent", "habit_rate_7d"]
+        ).apply(pd.to_numeric, errors="coerce")
+        metrics = pd.DataFrame({
+            name: derive(numeric) for name, (_, derive) in COHORT_METRICS.items()
+        })
+        values = metrics.to_numpy(dtype=float)
+
+        # one vectorized pass for every metric and quantile
+        quantiles = np.nanquantile(values, COHORT_QUANTILES, axis=0) if len(values) else None
+
+        stats = {
+            "computed_on": str(scores["computed_on"].iloc[0]) if "computed_on" in scores.columns else "",
+            "users": len(scores),
+            "emails": scores["email"].astype(str).str.strip().str.lower().to_numpy(),
+            "values": values,
+            "quantiles": pd.DataFrame(quantiles, index=COHORT_QUANTILES, columns=list(COHORT_METRICS)),
+            "sorted": {
+                name: np.sort(col[~np.isnan(col)]) for name, col in zip(COHORT_METRICS, values.T)
+            },
+        }
+
+    _cohort_cache[str(path)] = (version, stats)
+    return stats
+
+
+def cohort_position(email, path=MATERIALIZED_DB):
+    # one row per metric: the user's value, percentile rank and class quantiles
+    stats = cohort_stats(path)
+
+    if stats is None:
+        return pd.DataFrame()
+
+    email = str(email).strip().lower()
+    match = np.flatnonzero(stats["emails"] == email)
+
+    if not len(match):
+        return pd.DataFrame()
+
+    mine = stats["values"][match[0]]
+    rows = []
+
+    for i, (name, (label, _)) in enumerate(COHORT_METRICS.items()):
+        ordered = stats["sorted"][name]
+        value = mine[i]
+
+        if np.isnan(value) or not len(ordered):
+            continue
+
+        # midpoint rank, so ties land in the middle rather than at the top
+        below = np.searchsorted(ordered, value, side="left")
+        upto = np.searchsorted(ordered, value, side="right")
+
+        q = stats["quantiles"][name]
+        rows.append({
+            "metric": label,
+            "you": value,
+            "percentile": (below + upto) / 2 / len(ordered) * 100,
+            "p25": q[0.25],
+            "median": q[0.5],
+            "p75": q[0.75],
+            "p90": q[0.9],
+        })
+
+    return pd.DataFrame(rows)
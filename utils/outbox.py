@@ -0,0 +1,276 @@
+import argparse
+import hashlib
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+
+import pandas as pd
+
+from utils.data_access import DB, data_version, load_tables, update_rows
+
+OUTBOX = "Outbox"
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# pending -> sending -> sent, or back to pending with a later next_attempt;
+# after MAX_ATTEMPTS failures a message is parked as dead for a human to look at
+MAX_ATTEMPTS = 6
+BASE_DELAY_SECONDS = 30
+MAX_DELAY_SECONDS = 3600
+
+# a "sending" claim older than this belongs to a worker that died mid-send
+SEND_LEASE_SECONDS = 120
+POLL_SECONDS = 5
+
+
+# ================= SMTP SETTINGS =================
+def smtp_settings(**overrides):
+    # SMTP_HOST=localhost SMTP_PORT=1025 SMTP_STARTTLS=0 points at a local stand-in
+    settings = {
+        "host": os.environ.get("SMTP_HOST", "smtp.gmail.com"),
+        "port": int(os.environ.get("SMTP_PORT", "587")),
+        "starttls": os.environ.get("SMTP_STARTTLS", "1") != "0",
+        "user": os.environ.get("SMTP_USER", ""),
+        "password": os.environ.get("SMTP_PASSWORD", ""),
+        "sender": os.environ.get("SMTP_SENDER", ""),
+        "timeout": float(os.environ.get("SMTP_TIMEOUT", "20")),
+    }
+    settings.update({k: v for k, v in overrides.items() if v not in (None, "")})
+    settings["sender"] = settings["sender"] or settings["user"] or "student-productivity@localhost"
+    return settings
+
+
+# ================= MESSAGES =================
+def message_id(*parts):
+    # idempotency key: the same logical notification always gets the same id
+    return hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:20]
+
+
+def outbox_row(key, email, subject, body, now=None):
+    now = now or datetime.now()
+
+    return {
+        "id": key,
+        "email": str(email).strip().lower(),
+        "subject": subject,
+        "body": body,
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt": now.strftime(TIME_FORMAT),
+        "last_error": "",
+        "created": now.strftime(TIME_FORMAT),
+        "sent_at": "",
+    }
+
+
+def task_message(task, priority):
+    # (subject, body) for a task notification, worded by priority
+    if priority == "High":
+        subject = "🚨 HIGH PRIORITY TASK ALERT"
+        body = f"""
+Hello,
+
+You have a HIGH PRIORITY task pending.
+
+Task: {task}
+
+Please complete it immediately.
+
+- Student Productivity Tracker
+"""
+
+    elif priority == "Medium":
+        subject = "⏰ Task Reminder"
+        body = f"""
+Hello,
+
+Reminder to complete your task:
+
+Task: {task}
+Priority: Medium
+
+Try to finish it soon.
+
+- Student Productivity Tracker
+"""
+
+    else:  # LOW PRIORITY
+        subject = "📝 Friendly Task Reminder"
+        body = f"""
+Hello,
+
+This is a gentle reminder for your task.
+
+Task: {task}
+Priority: Low
+
+You can complete it whenever you are free.
+
+- Student Productivity Tracker
+"""
+
+    return subject, body
+
+
+def send_message(row, settings):
+    msg = MIMEText(str(row["body"]), "plain")
+    msg["From"] = settings["sender"]
+    msg["To"] = row["email"]
+    msg["Subject"] = str(row["subject"])
+    # lets mail clients drop the duplicate if a retry follows a lost ack
+    msg["Message-ID"] = f"<{row['id']}@student-productivity>"
+
+    with smtplib.SMTP(settings["host"], settings["port"], timeout=settings["timeout"]) as server:
+        if settings["starttls"]:
+            server.starttls()
+        if settings["user"]:
+            server.login(settings["user"], settings["password"])
+        server.send_message(msg)
+
+
+# ================= DELIVERY =================
+def backoff_seconds(attempts):
+    return min(BASE_DELAY_SECONDS * 2 ** max(attempts - 1, 0), MAX_DELAY_SECONDS)
+
+
+def due_messages(outbox, now):
+    status = outbox["status"].astype(str)
+
+    # a crashed worker's claim expires through next_attempt as well
+    due = status.isin(["pending", "sending"]) & (outbox["next_attempt"].astype(str) <= now.strftime(TIME_FORMAT))
+
+    return outbox[due].drop_duplicates("id")
+
+
+def deliver_due(settings, db_path=DB, now=None, send=send_message):
+    # one pass over the outbox; returns counts and when the next message is due
+    now = now or datetime.now()
+    now_str = now.strftime(TIME_FORMAT)
+    outbox = load_tables([OUTBOX], db_path)[OUTBOX]
+    result = {"sent": 0, "retry": 0, "dead": 0, "next_due": None}
+
+    waiting = outbox[outbox["status"].astype(str).isin(["pending", "sending"])]
+    upcoming = waiting.loc[waiting["next_attempt"].astype(str) > now_str, "next_attempt"].tolist()
+
+    for _, row in due_messages(outbox, now).iterrows():
+        key = {"email": row["email"], "id": row["id"]}
+        attempts = pd.to_numeric(row["attempts"], errors="coerce")
+        attempts = 0 if pd.isna(attempts) else int(attempts)
+
+        # compare-and-set under the workbook lock: if another worker got
+        # here first the row no longer matches and we skip it
+        lease = (now + timedelta(seconds=SEND_LEASE_SECONDS)).strftime(TIME_FORMAT)
+        claimed = update_rows(
+            OUTBOX,
+            {**key, "status": row["status"], "next_attempt": row["next_attempt"]},
+            {"status": "sending", "next_attempt": lease},
+            db_path,
+        )
+
+        if not claimed:
+            continue
+
+        try:
+            send(row, settings)
+        except Exception as e:
+            attempts += 1
+
+            if attempts >= MAX_ATTEMPTS:
+                values = {"status": "dead"}
+                result["dead"] += 1
+            else:
+                retry_at = now + timedelta(seconds=backoff_seconds(attempts))
+                values = {"status": "pending", "next_attempt": retry_at.strftime(TIME_FORMAT)}
+                upcoming.append(values["next_attempt"])
+                result["retry"] += 1
+
+            update_rows(OUTBOX, key, {**values, "attempts": attempts, "last_error": str(e)[:300]}, db_path)
+            continue
+
+        update_rows(OUTBOX, key, {
+            "status": "sent",
+            "attempts": attempts + 1,
+            "sent_at": datetime.now().strftime(TIME_FORMAT),
+        }, db_path)
+        result["sent"] += 1
+
+    if upcoming:
+        result["next_due"] = datetime.strptime(str(min(upcoming)), TIME_FORMAT)
+
+    return result
+
+
+# ================= WORKER =================
+class OutboxWorker(threading.Thread):
+    # sleeps until a message is due or the data changes; wake() after enqueueing
+
+    def __init__(self, settings, db_path=DB, poll_seconds=POLL_SECONDS):
+        super().__init__(daemon=True)
+        self.settings = settings
+        self.db_path = db_path
+        self.poll_seconds = poll_seconds
+        self.wake_event = threading.Event()
+        self.stop_event = threading.Event()
+
+    def wake(self):
+        self.wake_event.set()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake_event.set()
+
+    def run(self):
+        version = None
+        due_at = None
+
+        while not self.stop_event.is_set():
+            current = data_version(self.db_path)
+
+            if current != version or (due_at is not None and datetime.now() >= due_at):
+                try:
+                    due_at = deliver_due(self.settings, self.db_path)["next_due"]
+                except Exception as e:
+                    print("OUTBOX ERROR:", e)
+                # our own status updates moved the version too
+                version = data_version(self.db_path)
+
+            self.wake_event.wait(self.poll_seconds)
+            self.wake_event.clear()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+def ensure_worker(settings, db_path=DB):
+    # one sender per process, however many sessions call this
+    global _worker
+
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = OutboxWorker(settings, db_path)
+            _worker.start()
+
+    return _worker
+
+
+# ================= CLI =================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deliver queued notification emails")
+    parser.add_argument("--db", default=DB)
+    parser.add_argument("--once", action="store_true", help="one delivery pass, then exit")
+    args = parser.parse_args()
+
+    settings = smtp_settings()
+
+    if args.once:
+        print(deliver_due(settings, args.db))
+    else:
+        worker = OutboxWorker(settings, args.db)
+        worker.start()
+        try:
+            while worker.is_alive():
+                time.sleep(1)
+        except KeyboardInterrupt:
+            worker.stop()
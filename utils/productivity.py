@@ -1,29 +1,38 @@
 import pandas as pd
 from datetime import date
+from utils.data_access import load_user_tables, query_range
+from utils.academic_calendar import load_calendar
 
 DB = "data/database.xlsx"
 TODAY = date.today()
 
 def calculate_productivity(user_email):
 
+    data = load_user_tables(user_email, ["Habits", "Tasks"], DB)
+
+    # only today's rows of the logs are scored
+    for table in ["HabitLog", "Attendance", "StudyLog"]:
+        data[table] = query_range(user_email, table, TODAY, TODAY, DB)
+
+    return productivity_from_tables(data)
+
+def productivity_from_tables(data, today=None, periods_today=None):
+
+    # data: one user's tables, already loaded by the caller
+    today = today or TODAY
     score = 0
 
     # ================= HABITS =================
     try:
-        habits = pd.read_excel(DB, sheet_name="Habits")
-        habit_log = pd.read_excel(DB, sheet_name="HabitLog")
-
-        habits.columns = habits.columns.str.lower()
-        habit_log.columns = habit_log.columns.str.lower()
+        habits = data["Habits"]
+        habit_log = data["HabitLog"].copy()
 
         total_habits = len(habits)
 
         habit_log["date"] = pd.to_datetime(habit_log["date"], errors="coerce").dt.date
-        habit_log["email"] = habit_log["email"].astype(str).str.lower()
 
         completed_habits = habit_log[
-            (habit_log["email"] == user_email) &
-            (habit_log["date"] == TODAY)
+            habit_log["date"] == today
         ].shape[0]
 
         if total_habits > 0:
@@ -35,20 +44,21 @@ def calculate_productivity(user_email):
 
     # ================= ATTENDANCE =================
     try:
-        attendance = pd.read_excel(DB, sheet_name="Attendance")
+        attendance = data["Attendance"].copy()
 
-        attendance.columns = attendance.columns.str.lower()
-        attendance["email"] = attendance["email"].astype(str).str.lower()
         attendance["date"] = pd.to_datetime(attendance["date"], errors="coerce").dt.date
 
         today_att = attendance[
-            (attendance["email"] == user_email) &
-            (attendance["date"] == TODAY)
+            attendance["date"] == today
         ]
 
         periods_attended = len(today_att)
 
-        score += (periods_attended / 5) * 25
+        if periods_today is None:
+            periods_today = load_calendar().period_count(today)
+
+        if periods_today > 0:
+            score += min(periods_attended / periods_today, 1) * 25
 
     except:
         pass
@@ -56,11 +66,7 @@ def calculate_productivity(user_email):
 
     # ================= TASKS =================
     try:
-        tasks = pd.read_excel(DB, sheet_name="Tasks")
-
-        tasks.columns = tasks.columns.str.lower()
-
-        user_tasks = tasks[tasks["email"].astype(str).str.lower() == user_email]
+        user_tasks = data["Tasks"]
 
         total_tasks = len(user_tasks)
 
@@ -77,11 +83,7 @@ def calculate_productivity(user_email):
 
     # ================= STUDY =================
     try:
-        study = pd.read_excel(DB, sheet_name="StudyLog")
-
-        study.columns = study.columns.str.lower()
-
-        study["email"] = study["email"].astype(str).str.lower()
+        study = data["StudyLog"].copy()
 
         date_col = next((c for c in study.columns if "date" in c), None)
 
@@ -89,8 +91,7 @@ def calculate_productivity(user_email):
             study[date_col] = pd.to_datetime(study[date_col], errors="coerce")
 
             today_minutes = study[
-                (study["email"] == user_email) &
-                (study[date_col].dt.date == TODAY)
+                study[date_col].dt.date == today
             ]["minutes"].astype(float).sum()
 
             study_hours = today_minutes / 60
@@ -0,0 +1,141 @@
+import math
+import re
+from bisect import bisect_left, insort
+
+import pandas as pd
+
+# table -> (key columns, text column, extra columns shown with a hit)
+SEARCH_FIELDS = {
+    "Tasks": (("id", "task", "created_date"), "task", ("status", "priority", "due")),
+    "Habits": (("habit",), "habit", ()),
+    "Subjects": (("subject",), "subject", ()),
+}
+
+TOKEN = re.compile(r"\w+")
+PREFIX_WEIGHT = 0.6
+
+
+def tokenize(text):
+    return TOKEN.findall(str(text).lower())
+
+
+class SearchIndex:
+    # per-user inverted index: token -> {doc: term count}, plus a sorted
+    # vocabulary so prefix matches are a bisect range instead of a scan
+
+    def __init__(self):
+        self.postings = {}
+        self.vocabulary = []
+        self.docs = {}
+        self.keys_by_table = {}
+
+    # ---------------- MAINTENANCE ----------------
+    def _add(self, doc, text):
+        for token in tokenize(text):
+            postings = self.postings.get(token)
+
+            if postings is None:
+                postings = self.postings[token] = {}
+                insort(self.vocabulary, token)
+
+            postings[doc] = postings.get(doc, 0) + 1
+
+    def _remove(self, doc):
+        for token in set(tokenize(self.docs[doc]["text"])):
+            postings = self.postings.get(token, {})
+            postings.pop(doc, None)
+
+            if not postings:
+                self.postings.pop(token, None)
+                i = bisect_left(self.vocabulary, token)
+                if i < len(self.vocabulary) and self.vocabulary[i] == token:
+                    self.vocabulary.pop(i)
+
+        del self.docs[doc]
+
+    def sync(self, table, df):
+        # bring one table up to date: only new rows are tokenized, gone rows
+        # are unlinked, and surviving rows just get their fields refreshed
+        key_cols, text_col, extra_cols = SEARCH_FIELDS[table]
+        seen = set()
+
+        if not df.empty:
+            blank = pd.Series("", index=df.index)
+            columns = [(df[c] if c in df.columns else blank).astype(str).str.strip() for c in key_cols]
+            texts = df[text_col].astype(str).str.strip()
+            extras = [df[c] if c in df.columns else blank for c in extra_cols]
+
+            for key, text, *extra in zip(zip(*columns), texts, *extras):
+                doc = (table, key)
+                seen.add(doc)
+
+                if doc not in self.docs:
+                    self._add(doc, text)
+
+                self.docs[doc] = {
+                    "table": table,
+                    "text": text,
+                    **{c: ("" if pd.isna(v) else v) for c, v in zip(extra_cols, extra)},
+                }
+
+        for doc in self.keys_by_table.get(table, set()) - seen:
+            self._remove(doc)
+
+        self.keys_by_table[table] = seen
+
+    # ---------------- QUERIES ----------------
+    def _matches(self, term):
+        # {doc: weight} for one query term: exact hits, plus any token it prefixes
+        n_docs = max(len(self.docs), 1)
+        scores = {}
+
+        i = bisect_left(self.vocabulary, term)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(term):
+            token = self.vocabulary[i]
+            postings = self.postings[token]
+            idf = math.log(1 + n_docs / len(postings))
+            weight = 1.0 if token == term else PREFIX_WEIGHT
+
+            for doc, tf in postings.items():
+                scores[doc] = max(scores.get(doc, 0), tf * idf * weight)
+            i += 1
+
+        return scores
+
+    def search(self, query, limit=20):
+        # every term must match (as a word or word prefix); best score first
+        terms = tokenize(query)
+
+        if not terms:
+            return []
+
+        scores = None
+
+        for term in sorted(set(terms), key=len, reverse=True):
+            matches = self._matches(term)
+
+            if scores is None:
+                scores = matches
+            else:
+                scores = {doc: s + matches[doc] for doc, s in scores.items() if doc in matches}
+
+            if not scores:
+                return []
+
+        phrase = " ".join(terms)
+        ranked = []
+
+        for doc, score in scores.items():
+            info = self.docs[doc]
+            text = info["text"].lower()
+
+            # whole query as typed at the start of the name beats scattered words
+            if text.startswith(phrase):
+                score += 1.0
+            if info.get("status") == "Completed":
+                score *= 0.8
+
+            ranked.append((-score, len(text), doc))
+
+        ranked.sort()
+        return [{**self.docs[doc], "score": -neg} for neg, _, doc in ranked[:limit]]
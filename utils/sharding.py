@@ -0,0 +1,169 @@
+import argparse
+import json
+import zlib
+from pathlib import Path
+
+import pandas as pd
+
+from utils.excel_utils import file_lock, load_all_sheets, write_workbook
+
+# tables without an email column stay in the main workbook
+GLOBAL_TABLES = {"Timetable", "Holidays"}
+
+SHARD_DIR_NAME = "shards"
+SHARD_MAP_NAME = "shard_map.json"
+
+
+# ================= SHARD MAP =================
+def shard_dir(db_path):
+    return Path(db_path).parent / SHARD_DIR_NAME
+
+
+def shard_map_path(db_path):
+    return shard_dir(db_path) / SHARD_MAP_NAME
+
+
+_map_cache = {}
+
+def load_shard_map(db_path):
+    # {"count": N, "files": [...]} or None when the workbook is not sharded
+    path = shard_map_path(db_path)
+
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+    cached = _map_cache.get(str(path))
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(path) as f:
+        shard_map = json.load(f)
+
+    _map_cache[str(path)] = (mtime, shard_map)
+    return shard_map
+
+
+def save_shard_map(shard_map, db_path):
+    path = shard_map_path(db_path)
+    tmp = path.with_suffix(".tmp")
+
+    with open(tmp, "w") as f:
+        json.dump(shard_map, f, indent=2)
+
+    tmp.replace(path)
+
+
+def is_sharded(db_path):
+    return load_shard_map(db_path) is not None
+
+
+def is_user_table(table):
+    return table not in GLOBAL_TABLES
+
+
+# ================= ROUTING =================
+def shard_index(email, count):
+    # stable across processes and restarts, unlike hash()
+    key = str(email).strip().lower().encode("utf-8")
+    return zlib.crc32(key) % count
+
+
+def shard_paths(db_path):
+    shard_map = load_shard_map(db_path)
+    return [str(shard_dir(db_path) / name) for name in shard_map["files"]]
+
+
+def shard_for(email, db_path):
+    paths = shard_paths(db_path)
+    return paths[shard_index(email, len(paths))]
+
+
+def table_path(table, email, db_path):
+    # workbook holding this user's rows of this table
+    if is_user_table(table) and is_sharded(db_path):
+        return shard_for(email, db_path)
+    return db_path
+
+
+def group_by_shard(rows, db_path):
+    # {shard path: [rows]} so each shard is locked and rewritten once
+    paths = shard_paths(db_path)
+    grouped = {}
+
+    for row in rows:
+        path = paths[shard_index(row.get("email", ""), len(paths))]
+        grouped.setdefault(path, []).append(row)
+
+    return grouped
+
+
+def _shard_indexes(df, count):
+    email_col = next((c for c in df.columns if str(c).strip().lower() == "email"), None)
+
+    if email_col is None:
+        return pd.Series(0, index=df.index)
+
+    return df[email_col].map(lambda e: shard_index(e, count))
+
+
+def split_frame(df, paths):
+    # {shard path: rows of df that belong there}, keyed on the email column
+    index = _shard_indexes(df, len(paths))
+
+    return {
+        path: df[index == i].reset_index(drop=True)
+        for i, path in enumerate(paths)
+    }
+
+
+# ================= MIGRATION =================
+def create_shards(count, db_path):
+    # split every user table of the main workbook across `count` shard files
+    if is_sharded(db_path):
+        raise ValueError("workbook is already sharded")
+
+    directory = shard_dir(db_path)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    files = [f"shard_{i:02d}.xlsx" for i in range(count)]
+    shard_map = {"count": count, "files": files}
+
+    with file_lock(db_path):
+        sheets = load_all_sheets(db_path)
+        user_sheets = {name: df for name, df in sheets.items() if is_user_table(name)}
+
+        paths = [str(directory / name) for name in files]
+        per_shard = {path: {} for path in paths}
+
+        for table, df in user_sheets.items():
+            for path, part in split_frame(df, paths).items():
+                per_shard[path][table] = part
+
+        for path, frames in per_shard.items():
+            write_workbook(path, frames)
+
+        # once the map exists readers go to the shards, so the main
+        # workbook is only emptied (global tables kept) after that
+        save_shard_map(shard_map, db_path)
+
+        write_workbook(db_path, {
+            name: (df if not is_user_table(name) else df.iloc[0:0])
+            for name, df in sheets.items()
+        })
+
+    return shard_map
+
+
+# ================= CLI =================
+if __name__ == "__main__":
+    from utils.data_access import DB
+
+    parser = argparse.ArgumentParser(description="Split user data across N shard workbooks")
+    parser.add_argument("--shards", type=int, required=True)
+    parser.add_argument("--db", default=DB)
+    args = parser.parse_args()
+
+    shard_map = create_shards(args.shards, args.db)
+    print(f"{shard_map['count']} shards written to {shard_dir(args.db)}")
@@ -0,0 +1,89 @@
+from datetime import date
+
+import pandas as pd
+
+from utils.academic_calendar import load_calendar
+from utils.data_access import DB, cached_for_user, load_user_tables, user_date_index
+from utils.materialized import current_rows
+from utils.productivity import productivity_from_tables
+from utils.suggestions import suggestions_for
+
+SNAPSHOT_TABLES = ["Habits", "HabitLog", "StudyLog", "Attendance", "Tasks"]
+DATED_TABLES = ["HabitLog", "StudyLog", "Attendance"]
+
+
+def _compute(email, today, db_path):
+    # every dashboard number from a single read of each table
+    data = load_user_tables(email, SNAPSHOT_TABLES, db_path)
+    periods_today = load_calendar(db_path).period_count(today)
+
+    # date windows are binary searches over the cached sorted logs
+    index = {t: user_date_index(email, t, db_path) for t in DATED_TABLES}
+    today_data = {**data, **{t: index[t].on(today) for t in DATED_TABLES}}
+
+    habits = data["Habits"]
+    tasks = data["Tasks"]
+
+    # ---------------- HABITS ----------------
+    total_habits = len(habits)
+    completed_habits = index["HabitLog"].count(today, today)
+
+    # ---------------- STUDY (THIS MONTH) ----------------
+    month_end = (pd.Timestamp(today) + pd.offsets.MonthEnd(0)).date()
+    month_minutes = pd.to_numeric(
+        index["StudyLog"].range(today.replace(day=1), month_end)["minutes"],
+        errors="coerce"
+    ).sum()
+
+    # ---------------- ATTENDANCE (TODAY) ----------------
+    present_today = index["Attendance"].count(today, today)
+    attendance_percent = round(
+        present_today / periods_today * 100, 1
+    ) if periods_today else 0
+
+    # ---------------- TASKS ----------------
+    total_tasks = len(tasks)
+    completed_tasks = int((tasks["status"].astype(str).str.lower() == "completed").sum())
+    task_percent = int(completed_tasks / total_tasks * 100) if total_tasks else 0
+
+    # ---------------- SCORE / SUGGESTIONS ----------------
+    # precomputed by materialize.py; computed here only when those rows are
+    # missing or older than this user's data
+    scores = current_rows(email, "UserScores", db_path, today=today)
+    tips = current_rows(email, "Suggestions", db_path, today=today)
+
+    if scores is not None:
+        score = int(float(scores["score"].iloc[0]))
+    else:
+        # the score only looks at today's rows of the dated logs
+        score = productivity_from_tables(today_data, today, periods_today)
+
+    if tips is not None:
+        tips = tips.assign(rank=pd.to_numeric(tips["rank"])).sort_values("rank")["message"].tolist()
+    else:
+        tips = suggestions_for(email, data, today)
+
+    return {
+        "total_habits": total_habits,
+        "completed_habits": completed_habits,
+        "study_hours": round(float(month_minutes) / 60, 2),
+        "periods_today": periods_today,
+        "present_periods_today": present_today,
+        "attendance_percent": attendance_percent,
+        "total_tasks": total_tasks,
+        "completed_tasks": completed_tasks,
+        "task_percent": task_percent,
+        "score": score,
+        "suggestions": tips,
+    }
+
+
+def dashboard_snapshot(email, today=None, db_path=DB):
+    # memoized next to the user's cached rows: unchanged data costs one lookup,
+    # and the snapshot is dropped with them on that user's next write
+    email = str(email).strip().lower()
+    today = today or date.today()
+
+    return cached_for_user(
+        email, ("snapshot", today), lambda: _compute(email, today, db_path), db_path
+    )
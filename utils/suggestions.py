@@ -1,39 +1,188 @@
+from datetime import date, timedelta
+
+import numpy as np
 import pandas as pd
 
+from utils.data_access import load_tables, load_user_tables
+from utils.excel_utils import row_hashes_by_email
+
 DB = "data/database.xlsx"
 
-def get_suggestions(user_email):
+RULE_TABLES = ["Tasks", "Habits", "HabitLog", "StudyLog", "Attendance"]
+
+# ================= RULES =================
+# each rule is a pandas expression over the per-user aggregates below,
+# evaluated for every user at once
+RULES = [
+    ("no_tasks", "pending == 0 and completed == 0",
+     "Add tasks regularly to monitor your studies."),
+    ("backlog", "pending > completed",
+     "You have more pending tasks than completed ones. Focus on clearing backlog."),
+    ("high_priority", "high_pending >= 2",
+     "High priority tasks are pending. Complete them immediately."),
+    ("consistent", "completed >= 5",
+     "Great consistency! Maintain this study routine."),
+    ("too_many_pending", "pending >= 5",
+     "Too many pending tasks detected. Plan a study schedule today."),
+    ("habits_slipping", "habits > 0 and habit_rate_7d < 0.5",
+     "You completed less than half of your habits this week. Pick one to focus on today."),
+    ("low_study", "study_days_7d > 0 and study_minutes_7d < 120",
+     "Less than 2 hours of study this week. Block a fixed study slot in your day."),
+    ("attendance_gap", "attendance_total > 0 and attendance_7d == 0",
+     "No attendance marked this week. Don't forget to mark your classes."),
+]
+
+FALLBACK = "Your performance is balanced. Keep going!"
+NO_DATA = "Start adding your academic tasks to track performance."
+
+AGGREGATE_COLUMNS = [
+    "pending", "completed", "high_pending",
+    "habits", "habit_rate_7d",
+    "study_minutes_7d", "study_days_7d",
+    "attendance_total", "attendance_7d",
+]
+
+
+# ================= PER-USER AGGREGATES =================
+def user_aggregates(tables, today=None):
+    # one row per email, computed with groupby over any number of users
+    today = today or date.today()
+    week_start = (today - timedelta(days=6)).strftime("%Y-%m-%d")
+    today_str = today.strftime("%Y-%m-%d")
+
+    tasks = tables["Tasks"]
+    status = tasks["status"].astype(str).str.strip()
+
+    task_counts = pd.DataFrame({
+        "email": tasks["email"],
+        "pending": status == "Pending",
+        "completed": status == "Completed",
+        "high_pending": (status == "Pending") & (tasks["priority"].astype(str).str.strip() == "High"),
+    }).groupby("email").sum()
+
+    habits = tables["Habits"].groupby("email").size().rename("habits")
+
+    log = tables["HabitLog"]
+    recent_log = log[(log["date"] >= week_start) & (log["date"] <= today_str)]
+    habits_done = recent_log.drop_duplicates(["email", "habit", "date"]).groupby("email").size()
+
+    study = tables["StudyLog"]
+    recent_study = study[(study["date"] >= week_start) & (study["date"] <= today_str)]
+    study_minutes = pd.to_numeric(recent_study["minutes"], errors="coerce").groupby(
+        recent_study["email"]
+    ).sum()
+    study_days = recent_study.groupby("email")["date"].nunique()
+
+    att = tables["Attendance"]
+    attendance_total = att.groupby("email").size()
+    recent_att = att[(att["date"] >= week_start) & (att["date"] <= today_str)]
+    attendance_7d = recent_att.groupby("email").size()
+
+    agg = task_counts.join(habits, how="outer")
+    agg = agg.join(habits_done.rename("habits_done_7d"), how="outer")
+    agg = agg.join(study_minutes.rename("study_minutes_7d"), how="outer")
+    agg = agg.join(study_days.rename("study_days_7d"), how="outer")
+    agg = agg.join(attendance_total.rename("attendance_total"), how="outer")
+    agg = agg.join(attendance_7d.rename("attendance_7d"), how="outer")
+    agg = agg.fillna(0)
+
+    for col in ["pending", "completed", "high_pending", "habits", "habits_done_7d",
+                "study_minutes_7d", "study_days_7d", "attendance_total", "attendance_7d"]:
+        if col not in agg.columns:
+            agg[col] = 0
+
+    agg["habit_rate_7d"] = np.divide(
+        agg["habits_done_7d"], agg["habits"] * 7,
+        out=np.zeros(len(agg)), where=agg["habits"].to_numpy() > 0
+    )
+
+    return agg[AGGREGATE_COLUMNS]
 
-    try:
-        tasks = pd.read_excel(DB, sheet_name="Tasks")
-    except:
-        return ["Start adding your academic tasks to track performance."]
 
-    user_tasks = tasks[tasks["Email"] == user_email]
+def evaluate_rules(aggregates, rules=RULES):
+    # boolean matrix users x rules, one vectorized eval per rule
+    if aggregates.empty:
+        return pd.DataFrame(index=aggregates.index, columns=[r[0] for r in rules], dtype=bool)
 
-    suggestions = []
+    return pd.DataFrame({
+        rule_id: aggregates.eval(expr).astype(bool)
+        for rule_id, expr, _ in rules
+    }, index=aggregates.index)
 
-    pending = len(user_tasks[user_tasks["Status"] == "Pending"])
-    completed = len(user_tasks[user_tasks["Status"] == "Completed"])
 
-    high_pending = len(user_tasks[(user_tasks["Priority"] == "High") & (user_tasks["Status"] == "Pending")])
+def messages_from_matches(matches, rules=RULES):
+    text = {rule_id: message for rule_id, _, message in rules}
+    result = {}
 
-    if pending == 0 and completed == 0:
-        suggestions.append("Add tasks regularly to monitor your studies.")
+    for email, row in matches.iterrows():
+        fired = [text[rule_id] for rule_id in matches.columns if row[rule_id]]
+        result[email] = fired or [FALLBACK]
 
-    if pending > completed:
-        suggestions.append("You have more pending tasks than completed ones. Focus on clearing backlog.")
+    return result
 
-    if high_pending >= 2:
-        suggestions.append("High priority tasks are pending. Complete them immediately.")
 
-    if completed >= 5:
-        suggestions.append("Great consistency! Maintain this study routine.")
+# ================= PRECOMPUTED TABLE =================
+class SuggestionTable:
 
-    if pending >= 5:
-        suggestions.append("Too many pending tasks detected. Plan a study schedule today.")
+    def __init__(self):
+        # email -> (fingerprint of that user's rows, suggestions)
+        self.entries = {}
 
-    if not suggestions:
-        suggestions.append("Your performance is balanced. Keep going!")
+    @staticmethod
+    def row_hashes(tables):
+        # per-email hash of each table's rows, independent of column order
+        return {name: row_hashes_by_email(tables[name]) for name in RULE_TABLES}
+
+    @staticmethod
+    def fingerprint(hashes, email, today):
+        return (str(today),) + tuple(
+            int(hashes[name].get(email, 0)) for name in RULE_TABLES
+        )
+
+    def build(self, tables, today=None):
+        # whole population in one pass, used by batch jobs
+        today = today or date.today()
+        result = messages_from_matches(evaluate_rules(user_aggregates(tables, today)))
+        hashes = self.row_hashes(tables)
+
+        for email, messages in result.items():
+            self.entries[email] = (self.fingerprint(hashes, email, today), messages)
+
+        return result
+
+    def get(self, email, user_tables, today=None):
+        # recomputed only when this user's rows changed
+        today = today or date.today()
+        fp = self.fingerprint(self.row_hashes(user_tables), email, today)
+        entry = self.entries.get(email)
+
+        if entry and entry[0] == fp:
+            return entry[1]
+
+        # users with no rows at all still get a zero aggregate row
+        aggregates = user_aggregates(user_tables, today).reindex([email], fill_value=0)
+        messages = messages_from_matches(evaluate_rules(aggregates))[email]
+
+        self.entries[email] = (fp, messages)
+        return messages
+
+
+suggestion_table = SuggestionTable()
+
+
+def suggestions_for(user_email, user_tables, today=None):
+    return suggestion_table.get(str(user_email).strip().lower(), user_tables, today)
+
+
+def build_all_suggestions(db_path=DB, today=None):
+    return suggestion_table.build(load_tables(RULE_TABLES, db_path), today)
+
+
+def get_suggestions(user_email):
+
+    try:
+        user_tables = load_user_tables(user_email, RULE_TABLES, DB)
+    except:
+        return [NO_DATA]
 
-    return suggestions
+    return suggestions_for(user_email, user_tables)
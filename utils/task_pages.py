@@ -0,0 +1,81 @@
+import uuid
+
+import numpy as np
+import pandas as pd
+
+PRIORITY_RANK = {"High": 0, "Medium": 1, "Low": 2}
+
+# sort name -> (columns, ascending); ties keep the stored order
+TASK_SORTS = {
+    "newest": (["created_date"], [False]),
+    "oldest": (["created_date"], [True]),
+    "priority": (["_priority", "created_date"], [True, False]),
+    "due": (["_due", "_priority"], [True, True]),
+}
+PAGE_SIZES = [10, 20, 50]
+
+
+def sort_tasks(tasks, sort="newest"):
+    # full ordering for one sort key; computed once per data version by callers
+    columns, ascending = TASK_SORTS[sort]
+
+    for col in ["task", "priority", "status", "created_date", "due"]:
+        if col not in tasks.columns:
+            tasks = tasks.assign(**{col: pd.Series(dtype=object, index=tasks.index)})
+
+    due = tasks["due"].astype(str).str.strip()
+
+    keyed = tasks.assign(
+        _priority=tasks["priority"].astype(str).str.strip().map(PRIORITY_RANK).fillna(len(PRIORITY_RANK)),
+        # tasks without a deadline go last
+        _due=due.where(~due.isin(["", "nan", "None"])),
+    )
+    ordered = keyed.sort_values(columns, ascending=ascending, kind="stable", na_position="last")
+
+    return ordered.drop(columns=["_priority", "_due"]).reset_index(drop=True)
+
+
+def task_page(ordered, status=None, priority=None, start=None, end=None, page=0, page_size=20):
+    # (rows of one page, total matching): filters are vectorized masks over the
+    # pre-sorted tasks, and only the page's rows are ever taken out
+    mask = np.ones(len(ordered), dtype=bool)
+
+    if status:
+        mask &= ordered["status"].astype(str).str.strip().isin(status).to_numpy()
+    if priority:
+        mask &= ordered["priority"].astype(str).str.strip().isin(priority).to_numpy()
+
+    created = ordered["created_date"].astype(str).str[:10]
+    if start is not None:
+        mask &= (created >= str(start)).to_numpy()
+    if end is not None:
+        mask &= (created <= str(end)).to_numpy()
+
+    positions = np.flatnonzero(mask)
+    total = len(positions)
+
+    first = max(int(page), 0) * page_size
+    return ordered.take(positions[first:first + page_size]), total
+
+
+# ================= TASK IDS =================
+def new_task_id():
+    return uuid.uuid4().hex
+
+
+def _has_id(row):
+    value = row.get("id")
+    return value is not None and not pd.isna(value) and str(value).strip() not in ["", "nan"]
+
+
+def task_ref(row):
+    # identity parts after the task name; tasks stored before ids existed
+    # fall back to their created date, which keeps their old message ids
+    return (str(row["id"]).strip(),) if _has_id(row) else (str(row["created_date"]),)
+
+
+def task_key(row):
+    # `where` for update_rows / delete_rows that hits exactly this task
+    if _has_id(row):
+        return {"email": row["email"], "id": str(row["id"]).strip()}
+    return {"email": row["email"], "task": row["task"], "created_date": row["created_date"]}
@@ -0,0 +1,218 @@
+import pandas as pd
+
+from utils.data_access import (
+    DB,
+    append_rows,
+    append_rows_many,
+    data_version,
+    delete_rows,
+    load_user_tables,
+    update_rows,
+    with_schema,
+)
+from utils.date_index import DateIndex
+from utils.excel_utils import delete_frame_rows, normalize_sheet, update_frame_rows
+from utils.search import SEARCH_FIELDS, SearchIndex
+from utils.task_pages import sort_tasks
+
+SESSION_KEY = "user_view"
+
+# "already done?" questions pages ask per item, answered by set membership
+MEMBERSHIP_KEYS = {
+    "HabitLog": ("habit", "date"),
+    "Attendance": ("date", "period"),
+    "Habits": ("habit",),
+    "Subjects": ("subject",),
+}
+
+
+def _stored_form(rows):
+    # what a read would return for these rows: strings, normalized columns/dates
+    df = pd.DataFrame(rows).map(lambda v: v if pd.isna(v) else str(v))
+    return normalize_sheet(df)
+
+
+def _key_tuples(df, columns):
+    if df.empty:
+        return set()
+    parts = [df[c].astype(str).str.strip() for c in columns]
+    return set(zip(*parts))
+
+
+def _key_tuples_list(rows, columns):
+    # keys of not-yet-stored rows, in the same normalized form as _key_tuples
+    df = _stored_form(rows)
+    parts = [df[c].astype(str).str.strip() for c in columns]
+    return list(zip(*parts))
+
+
+class UserView:
+    # session-local copy of one user's tables. Mutations write through to
+    # storage and patch the copy, so the next render reads nothing back
+
+    def __init__(self, email, db_path=DB):
+        self.email = str(email).strip().lower()
+        self.db_path = db_path
+        self.frames = {}
+        self.key_sets = {}
+        self.indexes = {}
+        self.search_index = SearchIndex()
+        self.version = None
+
+    # ---------------- READS ----------------
+    def _refresh(self):
+        # someone else wrote (another tab, the scheduler): start over
+        version = data_version(self.db_path, self.email)
+
+        if version != self.version:
+            self.frames = {}
+            self.key_sets = {}
+            self.indexes = {}
+            self.version = version
+
+    def tables(self, names):
+        self._refresh()
+        missing = [t for t in names if t not in self.frames]
+
+        if missing:
+            self.frames.update(load_user_tables(self.email, missing, self.db_path))
+
+        return {t: self.frames[t].copy(deep=False) for t in names}
+
+    def table(self, name):
+        return self.tables([name])[name]
+
+    def keys(self, table):
+        # set of MEMBERSHIP_KEYS tuples, e.g. ("Exercise", "2026-03-05") in
+        # view.keys("HabitLog"); built once per load, kept current on append
+        df = self.table(table)
+
+        if table not in self.key_sets:
+            self.key_sets[table] = _key_tuples(df, MEMBERSHIP_KEYS[table])
+
+        return self.key_sets[table]
+
+    def has(self, table, *key):
+        return tuple(str(k).strip() for k in key) in self.keys(table)
+
+    def index(self, table, column="date", unit="D"):
+        # DateIndex over this user's rows, kept until the table changes
+        df = self.table(table)
+        key = (table, column, unit)
+
+        if key not in self.indexes:
+            self.indexes[key] = DateIndex(df, column, unit)
+
+        return self.indexes[key]
+
+    def range(self, table, start=None, end=None, column="date", unit="D"):
+        # rows dated within [start, end] (inclusive)
+        return self.index(table, column, unit).range(start, end)
+
+    def task_order(self, sort="newest"):
+        # this user's tasks in one TASK_SORTS order, kept until Tasks changes,
+        # so paging and filtering never sort again
+        df = self.table("Tasks")
+        key = ("Tasks", "order", sort)
+
+        if key not in self.indexes:
+            self.indexes[key] = sort_tasks(df, sort)
+
+        return self.indexes[key]
+
+    def search(self, query, limit=20):
+        # tasks, habits and subjects by word / word prefix. the index survives
+        # reloads; syncing only tokenizes rows it has not seen before
+        for table, df in self.tables(list(SEARCH_FIELDS)).items():
+            self.search_index.sync(table, df)
+
+        return self.search_index.search(query, limit)
+
+    # ---------------- WRITES ----------------
+    def _store(self, table, df, added=None):
+        # our own write moved the version; adopt it instead of re-reading.
+        # appends extend the key set, anything else rebuilds it on next use
+        self.frames[table] = df
+        self.indexes = {k: v for k, v in self.indexes.items() if k[0] != table}
+        self.version = data_version(self.db_path, self.email)
+
+        if added is not None and table in self.key_sets:
+            self.key_sets[table] |= _key_tuples(added, MEMBERSHIP_KEYS[table])
+        else:
+            self.key_sets.pop(table, None)
+
+        return df.copy(deep=False)
+
+    def append(self, table, rows):
+        rows = [{**row, "email": self.email} for row in rows]
+        current = self.table(table)
+
+        append_rows(table, rows, self.db_path)
+
+        added = _stored_form(rows)
+        df = pd.concat([current, added], ignore_index=True)
+        return self._store(table, with_schema(table, df), added)
+
+    def append_unique(self, table, rows):
+        # skips rows whose membership key is already stored; returns (frame, added)
+        columns = MEMBERSHIP_KEYS[table]
+        existing = set(self.keys(table))
+        fresh = []
+
+        for row, key in zip(rows, _key_tuples_list(rows, columns)):
+            if key not in existing:
+                existing.add(key)
+                fresh.append(row)
+
+        if not fresh:
+            return self.table(table), 0
+
+        return self.append(table, fresh), len(fresh)
+
+    def append_many(self, rows_by_table):
+        # atomic multi-table append; returns {table: updated frame}
+        rows_by_table = {
+            table: [{**row, "email": self.email} for row in rows]
+            for table, rows in rows_by_table.items()
+        }
+        current = self.tables(list(rows_by_table))
+
+        append_rows_many(rows_by_table, self.db_path)
+
+        result = {}
+
+        for table, rows in rows_by_table.items():
+            added = _stored_form(rows)
+            df = pd.concat([current[table], added], ignore_index=True)
+            result[table] = self._store(table, with_schema(table, df), added)
+
+        return result
+
+    def update(self, table, where, values):
+        where = {**where, "email": self.email}
+        current = self.table(table)
+
+        count = update_rows(table, where, values, self.db_path)
+
+        df, _ = update_frame_rows(current, where, values, table)
+        return self._store(table, df), count
+
+    def delete(self, table, where):
+        where = {**where, "email": self.email}
+        current = self.table(table)
+
+        count = delete_rows(table, where, self.db_path)
+
+        df, _ = delete_frame_rows(current, where, table)
+        return self._store(table, df), count
+
+
+def session_view(state, email, db_path=DB):
+    # one view per browser session, e.g. session_view(st.session_state, email)
+    view = state.get(SESSION_KEY)
+
+    if view is None or view.email != str(email).strip().lower() or view.db_path != db_path:
+        view = UserView(email, db_path)
+        state[SESSION_KEY] = view
+
+    return view
@@ -0,0 +1,160 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# per-process budget for cached user rows, e.g. USER_CACHE_MB=256
+DEFAULT_BUDGET_MB = 64
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class _Entry:
+
+    def __init__(self, version):
+        self.version = version
+        self.tables = {}
+        self.derived = {}
+        self.nbytes = 0
+
+
+class WorkingSetCache:
+    # one user's rows from each table (plus values derived from them),
+    # kept in LRU order and evicted once the byte budget is exceeded
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # ---------------- LOOKUP ----------------
+    def _entry(self, key, version):
+        entry = self.entries.get(key)
+
+        if entry is not None and entry.version != version:
+            self._drop(key)
+            self.invalidations += 1
+            entry = None
+
+        if entry is None:
+            entry = _Entry(version)
+            self.entries[key] = entry
+
+        self.entries.move_to_end(key)
+        return entry
+
+    def get_tables(self, key, version, tables, load):
+        # load(missing_tables) -> {table: df} is only called for tables not cached
+        with self.lock:
+            entry = self._entry(key, version)
+            missing = [t for t in tables if t not in entry.tables]
+
+            self.hits += len(tables) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            loaded = load(missing)
+
+            with self.lock:
+                # a write may have landed while loading; only keep fresh data
+                if self.entries.get(key) is entry:
+                    for t, df in loaded.items():
+                        self._add(entry, df)
+                        entry.tables[t] = df
+                    self._evict(keep=key)
+        else:
+            loaded = {}
+
+        # shallow copies: callers may add or overwrite columns freely
+        return {
+            t: (loaded[t] if t in loaded else entry.tables[t]).copy(deep=False)
+            for t in tables
+        }
+
+    def get_derived(self, key, version, name, compute):
+        with self.lock:
+            entry = self._entry(key, version)
+
+            if name in entry.derived:
+                self.hits += 1
+                return entry.derived[name]
+
+            self.misses += 1
+
+        value = compute()
+
+        with self.lock:
+            if self.entries.get(key) is entry:
+                entry.derived[name] = value
+                self._add(entry, value)
+                self._evict(keep=key)
+
+        return value
+
+    # ---------------- SIZE / EVICTION ----------------
+    def _add(self, entry, value):
+        if isinstance(value, pd.DataFrame):
+            size = frame_bytes(value)
+        else:
+            size = getattr(value, "nbytes", 1024)
+        entry.nbytes += size
+        self.nbytes += size
+
+    def _drop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry.nbytes
+
+    def _evict(self, keep=None):
+        # least recently used first; the entry just filled is never evicted
+        while self.nbytes > self.budget_bytes and len(self.entries) > 1:
+            key = next(iter(self.entries))
+            if key == keep:
+                break
+            self._drop(key)
+            self.evictions += 1
+
+    # ---------------- WRITES ----------------
+    def invalidate(self, key):
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+                self.invalidations += 1
+
+    def invalidate_where(self, predicate):
+        with self.lock:
+            for key in [k for k in self.entries if predicate(k)]:
+                self._drop(key)
+                self.invalidations += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "users": len(self.entries),
+                "bytes": self.nbytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def budget_from_env():
+    try:
+        mb = float(os.environ.get("USER_CACHE_MB", DEFAULT_BUDGET_MB))
+    except ValueError:
+        mb = DEFAULT_BUDGET_MB
+
+    return int(mb * 1024 * 1024)